@@ -0,0 +1,2 @@
+# Benchmarks for the PyECOM components
+# Run from the repository root, e.g.: python -m benchmarks.hm_parser_benchmark
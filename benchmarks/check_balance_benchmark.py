@@ -0,0 +1,92 @@
+# Benchmark of the energy-balance repair (HMRepair.check_balance)
+# Compares the axis reductions against the previous path, which built one Python list per resource kind at every
+# time step, on synthetic instances with a growing number of units (of each kind) and time steps.
+
+import timeit
+
+import numpy as np
+
+from src.parsers import SyntheticParser
+from src.repairs import HMRepair
+
+from benchmarks.components import build_components
+
+# Units of each kind (generators, loads, storages and EVs) and time steps
+UNITS = [10, 100, 500]
+HORIZONS = [24, 96, 1440]
+
+
+def legacy_check_balance(repair: HMRepair, x: dict):
+    """
+    Previous balance repair: per-step sums of Python lists over the units.
+    """
+
+    balance_gens = np.zeros(repair.n_steps, dtype=repair.dtype)
+    balance_loads = np.zeros(repair.n_steps, dtype=repair.dtype)
+    balance_stor = np.zeros(repair.n_steps, dtype=repair.dtype)
+    balance_cs = np.zeros(repair.n_steps, dtype=repair.dtype)
+
+    for t in range(repair.n_steps):
+        balance_gens[t] = np.sum([x['genActPower'][g, t] - x['genExcActPower'][g, t] for g in range(repair.n_gen)])
+
+        balance_loads[t] = np.sum([x['loadRedActPower'][l, t] + x['loadCutActPower'][l, t] + x['loadENS'][l, t] +
+                                   -repair.components['loads'].upper_bound[l, t] for l in range(repair.n_load)])
+
+        balance_stor[t] = np.sum([x['storDchActPower'][s, t] - x['storChActPower'][s, t]
+                                  for s in range(repair.n_stor)])
+
+        balance_cs[t] = np.sum([x['v2gDchActPower'][v, t] - x['v2gChActPower'][v, t] for v in range(repair.n_v2g)])
+
+    balance_rest = balance_gens + balance_loads + balance_stor + balance_cs
+
+    mask = balance_rest > 0
+    x['pImp'][mask] *= 0.0
+    x['pExp'][mask] = balance_rest[mask]
+
+    mask = balance_rest < 0
+    x['pExp'][mask] *= 0.0
+    x['pImp'][mask] = abs(balance_rest)[mask]
+
+    return
+
+
+def make_member(n_units: int, n_steps: int, seed: int):
+    data = SyntheticParser(n_gen=n_units, n_load=n_units, n_stor=n_units, n_v2g=n_units, n_cs=5, n_steps=n_steps,
+                           seed=seed)
+    data.parse()
+    repair = HMRepair(build_components(data))
+
+    # Random values for every variable of the member
+    rng = np.random.default_rng(seed)
+    member = {name: rng.uniform(size=value.shape).astype(repair.dtype)
+              for name, value in repair.__initial_variables__.items()}
+
+    return repair, member
+
+
+def main(repeats: int = 3, seed: int = 0):
+    print('{:>8}{:>8}{:>14}{:>14}{:>10}{:>14}'.format('units', 'n_steps', 'legacy', 'vectorized', 'speed-up',
+                                                      'max diff'))
+
+    for n_units in UNITS:
+        for n_steps in HORIZONS:
+            repair, member = make_member(n_units, n_steps, seed)
+            legacy_member = {name: value.copy() for name, value in member.items()}
+            vectorized_member = {name: value.copy() for name, value in member.items()}
+
+            legacy = min(timeit.repeat(lambda: legacy_check_balance(repair, legacy_member), number=1,
+                                       repeat=repeats))
+            vectorized = min(timeit.repeat(lambda: repair.check_balance(vectorized_member), number=1,
+                                           repeat=repeats))
+
+            difference = max(np.max(np.abs(legacy_member[name] - vectorized_member[name])) for name in ['pImp', 'pExp'])
+
+            print('{:>8}{:>8}{:>12.3f}ms{:>12.3f}ms{:>9.1f}x{:>14.2e}'.format(n_units, n_steps, legacy * 1e3,
+                                                                            vectorized * 1e3, legacy / vectorized,
+                                                                            difference))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
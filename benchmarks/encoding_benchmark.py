@@ -0,0 +1,61 @@
+# Benchmark of the reduced encoding of HMProblemScene on EC_V4.xlsx
+# Runs HyDE-DF with the full encoding and with the reduced encoding (variables derived by the repair are left out
+# of the optimizer vector) over the same seeds, and compares the best objective along the iterations.
+
+import timeit
+
+import numpy as np
+
+from src.parsers import HMParser
+from src.scenes import HMProblemScene
+
+from benchmarks.components import build_components
+
+FILE_PATH = 'data/EC_V4.xlsx'
+EC_ID = 1
+
+# Iterations at which the best objective is reported
+CHECKPOINTS = [10, 25, 50, 100, 200]
+
+
+def run_scene(data, encoding: str, n_iter: int, pop_size: int, seed: int):
+    scene = HMProblemScene(name='EC{}'.format(EC_ID), data=build_components(data), hm_parser=data,
+                           n_iter=n_iter, iter_tolerance=n_iter, pop_size=pop_size, encoding=encoding)
+    scene.initialize()
+
+    np.random.seed(seed)
+    timer = timeit.default_timer()
+    scene.run()
+    elapsed = timeit.default_timer() - timer
+
+    # Best objective after each iteration, carried forward if the run stopped early
+    history = np.minimum.accumulate(scene.algo.population_history_fitness)
+    history = np.concatenate([history, np.repeat(history[-1], n_iter - history.shape[0])])
+
+    return scene.lower_bounds.shape[0], history, elapsed
+
+
+def main(n_iter: int = 200, pop_size: int = 20, seeds: tuple = (0, 1, 2, 3, 4)):
+    data = HMParser(file_path=FILE_PATH, ec_id=EC_ID)
+    data.parse()
+
+    checkpoints = [checkpoint for checkpoint in CHECKPOINTS if checkpoint <= n_iter]
+    print('Mean best objective over {} seeds'.format(len(seeds)))
+    print('{:<10}{:>8}'.format('encoding', 'pop_dim') + ''.join('{:>12}'.format('it {}'.format(checkpoint))
+                                                            for checkpoint in checkpoints) + '{:>10}'.format('time'))
+
+    for encoding in ['full', 'reduced']:
+        results = [run_scene(data, encoding, n_iter, pop_size, seed) for seed in seeds]
+        pop_dim = results[0][0]
+        history = np.mean([result[1] for result in results], axis=0)
+        elapsed = np.mean([result[2] for result in results])
+
+        print('{:<10}{:>8}'.format(encoding, pop_dim) +
+              ''.join('{:>12.2f}'.format(history[checkpoint - 1]) for checkpoint in checkpoints) +
+              '{:>9.2f}s'.format(elapsed))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
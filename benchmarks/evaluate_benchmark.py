@@ -0,0 +1,98 @@
+# Benchmark of the HMProblemScene objective function
+# Compares the array-expression evaluate against the previous path, which summed the storage, V2G and market
+# terms with Python generator expressions over every (t, resource) pair, on synthetic instances of growing horizon.
+
+import timeit
+
+import numpy as np
+
+from src.parsers import SyntheticParser
+from src.scenes import HMProblemScene
+
+from benchmarks.components import build_components
+
+# Time steps of the synthetic horizons (hourly, 15 minutes and 1 minute)
+HORIZONS = [24, 96, 1440]
+
+
+def legacy_evaluate(scene: HMProblemScene, x: dict) -> float:
+    """
+    Previous evaluation path: Python loops over the time steps and resources.
+    """
+
+    t_range = range(scene.n_steps)
+    stor_range = range(scene.n_stor)
+    v2g_range = range(scene.n_v2g)
+
+    balance_penalty = 0.0
+    for t in t_range:
+        if x['pImp'][t] > scene.components['pimp'].upper_bound[t]:
+            balance_penalty += 100000
+
+        if x['pExp'][t] > scene.components['pexp'].upper_bound[t]:
+            balance_penalty += 100000
+
+    temp_gens = np.sum([x['genActPower'] * scene.components['gen'].cost +
+                        x['genExcActPower'] * scene.components['gen'].cost_nde])
+
+    temp_loads = np.sum([x['loadRedActPower'] * scene.components['loads'].cost_reduce +
+                         x['loadCutActPower'] * scene.components['loads'].cost_cut +
+                         x['loadENS'] * scene.components['loads'].cost_ens])
+
+    temp_stor = sum([scene.components['stor'].capital_cost[s] *
+                     (x['storEnerState'][s, t] / scene.components['stor'].capacity_max[s] - 0.63) ** 2 +
+                     x['storDchActPower'][s, t] * scene.components['stor'].cost_discharge[s, t] +
+                     x['storChActPower'][s, t] * scene.components['stor'].cost_charge[s, t] +
+                     6.5e-3 / scene.components['stor'].capacity_max[s] * x['storChActPower'][s, t] ** 2
+                     for t in t_range for s in stor_range])
+
+    temp_v2g = sum([scene.components['evs'].capital_cost[v] *
+                    (x['v2gEnerState'][v, t] / scene.components['evs'].capacity_max[v] - 0.63) ** 2 +
+                    x['v2gDchActPower'][v, t] * scene.components['evs'].cost_discharge[v] +
+                    x['v2gChActPower'][v, t] * scene.components['evs'].cost_charge[v] +
+                    6.5e-3 / scene.components['evs'].capacity_max[v] * x['v2gChActPower'][v, t] ** 2
+                    for t in t_range for v in v2g_range])
+
+    temp_rest = sum([x['pImp'][t] * scene.components['pimp'].cost[t] +
+                     x['pExp'][t] * scene.components['pexp'].cost[t]
+                     for t in t_range])
+
+    return temp_gens + temp_loads + temp_stor + temp_v2g + temp_rest + balance_penalty
+
+
+def make_member(n_steps: int, seed: int):
+    data = SyntheticParser(n_gen=10, n_load=10, n_stor=10, n_v2g=20, n_cs=5, n_steps=n_steps, seed=seed)
+    data.parse()
+
+    scene = HMProblemScene(name='synthetic', data=build_components(data), hm_parser=data)
+    scene.initialize()
+
+    # Repaired random member
+    rng = np.random.default_rng(seed)
+    vector = scene.lower_bounds + rng.uniform(size=scene.lower_bounds.shape) * (scene.upper_bounds -
+                                                                                 scene.lower_bounds)
+    member = scene.repair(scene.decode(scene.expand(vector.astype(scene.dtype))))
+
+    return scene, member
+
+
+def main(repeats: int = 5, number: int = 20, seed: int = 0):
+    print('{:>8}{:>14}{:>14}{:>10}{:>14}'.format('n_steps', 'legacy', 'vectorized', 'speed-up', 'rel. diff'))
+
+    for n_steps in HORIZONS:
+        scene, member = make_member(n_steps, seed)
+
+        legacy = min(timeit.repeat(lambda: legacy_evaluate(scene, member), number=number, repeat=repeats)) / number
+        vectorized = min(timeit.repeat(lambda: scene.evaluate(member), number=number, repeat=repeats)) / number
+
+        reference = legacy_evaluate(scene, member)
+        difference = abs(scene.evaluate(member) - reference) / abs(reference)
+
+        print('{:>8}{:>12.3f}ms{:>12.3f}ms{:>9.1f}x{:>14.2e}'.format(n_steps, legacy * 1e3, vectorized * 1e3,
+                                                                   legacy / vectorized, difference))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+# Benchmark of the HMParser workbook loading
+# Compares the indexed single-pass parser against the previous lookups, which
+# read every sheet with its own pd.read_excel call and scanned the whole sheet
+# for every label. Both paths read the same fields through the HMParser readers.
+
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from src.parsers import HMParser
+
+FILE_PATH = 'data/EC_V4.xlsx'
+EC_ID = 1
+
+
+class LegacyHMParser(HMParser):
+    """
+    HMParser with the previous sheet reading and label lookups (baseline get_timeseries, get_characteristic and
+    get_events): one read_excel per sheet, a full scan of the sheet per label and a row-wise numeric conversion.
+    The vehicle schedule is also built with the previous loops, since it works on the same object arrays.
+    """
+
+    def get_sheet(self, sheet_name: str) -> pd.DataFrame:
+        return pd.read_excel(self.file_path, sheet_name=sheet_name, header=None)
+
+    @staticmethod
+    def get_timeseries(values, component: str):
+
+        temp_data_idx = np.where(values == component)
+        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
+        for i in np.arange(temp_data.shape[0]):
+            temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
+        temp_data = temp_data[:, temp_data_idx[1][0] + 1:]
+
+        return temp_data
+
+    @staticmethod
+    def get_characteristic(values, component: str, keep_string: bool = False):
+
+        temp_data_idx = np.where(values == component)
+        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
+        if not keep_string:
+            for i in np.arange(temp_data.shape[0]):
+                temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
+            temp_data = temp_data[:, temp_data_idx[1][0] + 1]
+        else:
+            for i in np.arange(temp_data.shape[0]):
+                temp_data[i, :] = temp_data[i, :].astype(str)
+            temp_data = temp_data[:, temp_data_idx[1][0] + 1]
+
+        return temp_data
+
+    @staticmethod
+    def get_events(values, component: str, keep_string: bool = False, n_events: int = 2):
+
+        temp_data_idx = np.where(values == component)
+        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
+        if not keep_string:
+            for i in np.arange(temp_data.shape[0]):
+                temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
+            temp_data = temp_data[:, temp_data_idx[1][0] + 1:temp_data_idx[1][0] + 1 + n_events]
+        else:
+            for i in np.arange(temp_data.shape[0]):
+                temp_data[i, :] = temp_data[i, :].astype(str)
+            temp_data = temp_data[:, temp_data_idx[1][0] + 1:temp_data_idx[1][0] + 1 + n_events]
+
+        return temp_data
+
+    @staticmethod
+    def count_events(values, component: str = 'Arrive time period') -> int:
+        # The previous parser always read two events
+        return 2
+
+    def _update_vehicle_schedule(self, vehicle: dict):
+        # Previous schedule: Python loops over the vehicles and their two trips
+        schedule = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
+        schedule_charge = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
+        schedule_discharge = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
+        for v in range(vehicle['p_charge_max'].shape[0]):
+
+            # Check the trips
+            for t in range(2):
+                schedule[v, int(vehicle['arrive_time_period'][v, t])-1:
+                            int(vehicle['departure_time_period'][v, t])] = 1.0
+
+                current_place = int(vehicle['place'][v, t]) - 1
+
+                # get the maximum allowed charging and discharging
+                charge_max = min(vehicle['p_charge_max'][v],
+                                 self.charging_station['p_charge_max'][current_place])
+
+                discharge_max = min(vehicle['p_discharge_max'][v],
+                                    self.charging_station['p_discharge_max'][current_place])
+
+                # build the schedule
+                schedule_charge[v, int(vehicle['arrive_time_period'][v, t])-1:
+                                   int(vehicle['departure_time_period'][v, t])] = charge_max
+
+                schedule_discharge[v, int(vehicle['arrive_time_period'][v, t])-1:
+                                      int(vehicle['departure_time_period'][v, t])] = discharge_max
+
+        vehicle['schedule'] = schedule
+        vehicle['schedule_charge'] = schedule_charge
+        vehicle['schedule_discharge'] = schedule_discharge
+
+        return
+
+
+def legacy_parse(file_path: str, ec_id: int):
+    parser = LegacyHMParser(file_path=file_path, ec_id=ec_id)
+    parser.parse()
+
+    return parser
+
+
+def indexed_parse(file_path: str, ec_id: int):
+    parser = HMParser(file_path=file_path, ec_id=ec_id)
+    parser.parse()
+
+    return parser
+
+
+def max_difference(legacy: HMParser, indexed: HMParser) -> float:
+    """
+    Largest difference between the numeric fields parsed by both paths.
+    """
+
+    difference = 0.0
+    for section in HMParser.readers:
+        for field, values in getattr(indexed, section).items():
+            if values.dtype == object:
+                continue
+
+            legacy_values = np.asarray(getattr(legacy, section)[field], dtype=np.float64)
+            difference = max(difference, float(np.nanmax(np.abs(legacy_values - values), initial=0.0)))
+
+    return difference
+
+
+def main(repeats: int = 5):
+    legacy = min(timeit.repeat(lambda: legacy_parse(FILE_PATH, EC_ID), number=1, repeat=repeats))
+    indexed = min(timeit.repeat(lambda: indexed_parse(FILE_PATH, EC_ID), number=1, repeat=repeats))
+
+    print('Legacy parse:  {:.4f} s'.format(legacy))
+    print('Indexed parse: {:.4f} s'.format(indexed))
+    print('Speed-up:      {:.2f}x'.format(legacy / indexed))
+    print('Max. difference: {:.2e}'.format(max_difference(legacy_parse(FILE_PATH, EC_ID),
+                                                           indexed_parse(FILE_PATH, EC_ID))))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Benchmark of the float32 precision mode on EC_V4.xlsx
+# Repairs and evaluates the same random members in float64 and in float32 and reports the objective drift,
+# then runs HyDE-DF with the same seed in both precisions and compares the best objective and the memory used.
+
+import timeit
+
+import numpy as np
+
+from src.parsers import HMParser
+from src.scenes import HMProblemScene
+from src.utils import set_precision
+
+from benchmarks.components import build_components
+
+FILE_PATH = 'data/EC_V4.xlsx'
+EC_ID = 1
+
+
+def make_scene(data, precision: str, n_iter: int, pop_size: int) -> HMProblemScene:
+    # The policy is read when the components and the scene are created
+    previous = set_precision(precision)
+    scene = HMProblemScene(name='EC{}'.format(EC_ID), data=build_components(data), hm_parser=data,
+                           n_iter=n_iter, pop_size=pop_size)
+    scene.initialize()
+    set_precision(previous)
+
+    return scene
+
+
+def evaluate_members(scene: HMProblemScene, members: np.ndarray) -> np.ndarray:
+    # Members are optimizer vectors, expanded to the full layout before decoding
+    fitness = np.zeros(members.shape[0])
+    for idx in np.arange(members.shape[0]):
+        member = scene.repair(scene.decode(scene.expand(members[idx].astype(scene.dtype))))
+        fitness[idx] = scene.evaluate(member)
+
+    return fitness
+
+
+def run_scene(scene: HMProblemScene, seed: int) -> float:
+    np.random.seed(seed)
+    scene.run()
+
+    return float(scene.current_best_fitness)
+
+
+def main(n_members: int = 100, n_iter: int = 50, pop_size: int = 20, seed: int = 0):
+    data = HMParser(file_path=FILE_PATH, ec_id=EC_ID)
+    data.parse()
+
+    scenes = {precision: make_scene(data, precision, n_iter, pop_size) for precision in ['float64', 'float32']}
+
+    # Same random members for both precisions, drawn in float64
+    rng = np.random.default_rng(seed)
+    lower_bounds, upper_bounds = scenes['float64'].lower_bounds, scenes['float64'].upper_bounds
+    members = lower_bounds + rng.uniform(size=(n_members, lower_bounds.shape[0])) * (upper_bounds - lower_bounds)
+
+    fitness = {precision: evaluate_members(scene, members) for precision, scene in scenes.items()}
+    drift = np.abs(fitness['float32'] - fitness['float64']) / np.abs(fitness['float64'])
+
+    print('Objective drift over {} members (float32 vs float64)'.format(n_members))
+    print('  Mean relative drift: {:.3e}'.format(np.mean(drift)))
+    print('  Max relative drift:  {:.3e}'.format(np.max(drift)))
+
+    # Full optimization runs with the same seed
+    for precision, scene in scenes.items():
+        timer = timeit.default_timer()
+        best = run_scene(scene, seed)
+        elapsed = timeit.default_timer() - timer
+
+        print('{}: best {:.6f}, population {} bytes, {:.2f} s'.format(precision, best, scene.algo.population.nbytes,
+                                                                     elapsed))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
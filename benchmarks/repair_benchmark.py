@@ -0,0 +1,81 @@
+# Benchmark of the population repair (HMRepair.repair_population)
+# Compares repairing the stacked population in one call against repairing each member on its own, on synthetic
+# instances with a growing number of units (of each kind) and population sizes.
+
+import timeit
+
+import numpy as np
+
+from src.parsers import SyntheticParser
+from src.repairs import HMRepair
+
+from benchmarks.components import build_components
+
+# Units of each kind (generators, loads, storages and EVs), time steps and population sizes
+UNITS = [10, 50]
+N_STEPS = 96
+POP_SIZES = [10, 50, 200]
+
+# Binary variables of the repair
+BINARY_VARIABLES = ['genXo', 'loadXo', 'storDchXo', 'storChXo', 'v2gDchXo', 'v2gChXo']
+
+
+def make_population(n_units: int, pop_size: int, seed: int):
+    data = SyntheticParser(n_gen=n_units, n_load=n_units, n_stor=n_units, n_v2g=n_units, n_cs=5, n_steps=N_STEPS,
+                           seed=seed)
+    data.parse()
+    repair = HMRepair(build_components(data))
+
+    # Random values for every variable of the population (0 / 1 for the binary variables)
+    rng = np.random.default_rng(seed)
+    population = {name: rng.uniform(size=(pop_size,) + value.shape).astype(repair.dtype)
+                  for name, value in repair.__initial_variables__.items()}
+    for name in BINARY_VARIABLES:
+        population[name] = np.round(population[name])
+
+    return repair, population
+
+
+def repair_members(repair: HMRepair, population: dict) -> dict:
+    """
+    Repair the population one member at a time.
+    """
+
+    members = [repair.repair({name: value[idx].copy() for name, value in population.items()})
+               for idx in range(next(iter(population.values())).shape[0])]
+
+    return {name: np.stack([member[name] for member in members]) for name in population.keys()}
+
+
+def repair_population(repair: HMRepair, population: dict) -> dict:
+    """
+    Repair the population in one call.
+    """
+
+    return repair.repair_population({name: value.copy() for name, value in population.items()})
+
+
+def main(repeats: int = 3, seed: int = 0):
+    print('{:>8}{:>10}{:>14}{:>14}{:>10}{:>10}'.format('units', 'pop_size', 'per member', 'batched', 'speed-up',
+                                                       'equal'))
+
+    for n_units in UNITS:
+        for pop_size in POP_SIZES:
+            repair, population = make_population(n_units, pop_size, seed)
+
+            members = min(timeit.repeat(lambda: repair_members(repair, population), number=1, repeat=repeats))
+            batched = min(timeit.repeat(lambda: repair_population(repair, population), number=1, repeat=repeats))
+
+            reference = repair_members(repair, population)
+            result = repair_population(repair, population)
+            equal = all(np.array_equal(reference[name], result[name]) for name in population.keys())
+
+            print('{:>8}{:>10}{:>12.3f}ms{:>12.3f}ms{:>9.1f}x{:>10}'.format(n_units, pop_size, members * 1e3,
+                                                                            batched * 1e3, members / batched,
+                                                                            str(equal)))
+
+    return
+
+
+if __name__ == '__main__':
+    main()
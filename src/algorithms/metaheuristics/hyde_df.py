@@ -2,6 +2,7 @@
 import copy
 
 from .base_metaheuristic import BaseMetaheuristic
+from ...utils.precision import get_dtype
 
 import numpy as np
 
@@ -11,15 +12,29 @@ class HydeDF(BaseMetaheuristic):
     def __init__(self, n_iter: int, iter_tolerance: int, epsilon_tolerance: float,
                  pop_size: int, pop_dim: int,
                  lower_bound: np.ndarray, upper_bound: np.ndarray,
-                 f_weight: float, f_cr: float):
+                 f_weight: float, f_cr: float,
+                 dtype=None,
+                 binary_idx: np.ndarray = None):
         super().__init__(n_iter=n_iter,
                          iter_tolerance=iter_tolerance,
                          epsilon_tolerance=epsilon_tolerance,
                          pop_size=pop_size,
                          pop_dim=pop_dim)
 
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
+        # Floating point precision of the population (fitness values are kept in float64)
+        self.dtype = np.dtype(get_dtype() if dtype is None else dtype)
+
+        self.lower_bound = np.asarray(lower_bound, dtype=self.dtype)
+        self.upper_bound = np.asarray(upper_bound, dtype=self.dtype)
+
+        # Mixed encoding: the genes at binary_idx are 0/1, stored bit-packed and evolved with binary operators
+        # The continuous genes keep the DE operator
+        self.binary_idx = None
+        self.continuous_idx = None
+        if binary_idx is not None and len(binary_idx) > 0:
+            self.binary_idx = np.asarray(binary_idx)
+            self.continuous_idx = np.setdiff1d(np.arange(self.pop_dim), self.binary_idx)
+        self.n_bits = 0 if self.binary_idx is None else self.binary_idx.shape[0]
 
         # HyDE-DF adaptive parameters
         self.initial_f_weight = self.initial_f_weight_old = f_weight
@@ -33,14 +48,18 @@ class HydeDF(BaseMetaheuristic):
 
         # Placeholder values for population and population history
         self.population = []
-        self.population_fitness = [0.0 for _ in np.arange(self.pop_size)]
+        self.population_fitness = np.zeros(self.pop_size)
 
         self.population_old = []
-        self.population_old_fitness = [0.0 for _ in np.arange(self.pop_size)]
+        self.population_old_fitness = np.zeros(self.pop_size)
 
         self.population_history = []
         self.population_history_fitness = []
 
+        # Packed binary genes (pop_size x ceil(n_bits / 8) bytes)
+        self.population_bits = []
+        self.population_bits_old = []
+
         # Placeholder values for best population member and it's index
         self.current_best = None
         self.current_best_idx = None
@@ -61,12 +80,32 @@ class HydeDF(BaseMetaheuristic):
         :return: Generated initial population
         """
 
-        return np.random.uniform(low=np.array(self.lower_bound,
+        lower_bound, upper_bound = self._continuous_bounds()
+
+        return np.random.uniform(low=np.array(lower_bound,
                                               dtype=np.float64),
-                                 high=np.array(self.upper_bound,
+                                 high=np.array(upper_bound,
                                                dtype=np.float64),
                                  size=(self.pop_size,
-                                       self.pop_dim))
+                                       lower_bound.shape[0])).astype(self.dtype)
+
+    def _generate_bits(self):
+        """
+        Method to generate the initial binary genes
+        :return: Packed binary genes
+        """
+
+        return self._random_bits(0.5)
+
+    def _random_bits(self, probability):
+        # Packed random bits, each set with the given probability (scalar or one per member)
+        return np.packbits(np.random.uniform(size=(self.pop_size, self.n_bits)) < probability, axis=1)
+
+    def _continuous_bounds(self):
+        if self.binary_idx is None:
+            return self.lower_bound, self.upper_bound
+
+        return self.lower_bound[self.continuous_idx], self.upper_bound[self.continuous_idx]
 
     def _update(self):
         """
@@ -76,7 +115,48 @@ class HydeDF(BaseMetaheuristic):
         :param ub: Population upper bound
         :return: Clipped population
         """
-        return np.clip(self.population, self.lower_bound, self.upper_bound)
+        lower_bound, upper_bound = self._continuous_bounds()
+
+        return np.clip(self.population, lower_bound, upper_bound)
+
+    def member(self, idx: int, out: np.ndarray = None) -> np.ndarray:
+        """
+        Get a full member (continuous and binary genes).
+        Without binary genes this is a view of the population row.
+        :param idx: Member index
+        :param out: Array to write the member into (mixed encoding only). Defaults to a new array
+        :return: Member
+        """
+
+        if self.binary_idx is None:
+            return self.population[idx]
+
+        if out is None:
+            out = np.empty(self.pop_dim, dtype=self.dtype)
+
+        out[self.continuous_idx] = self.population[idx]
+        out[self.binary_idx] = np.unpackbits(self.population_bits[idx], count=self.n_bits)
+
+        return out
+
+    def set_member(self, idx: int, x: np.ndarray):
+        """
+        Store a full member. Binary genes are thresholded at 0.5 and packed.
+        :param idx: Member index
+        :param x: Member
+        :return: None
+        """
+
+        if self.binary_idx is None:
+            if not np.may_share_memory(x, self.population[idx]):
+                self.population[idx] = x
+
+            return
+
+        self.population[idx] = x[self.continuous_idx]
+        self.population_bits[idx] = np.packbits(x[self.binary_idx] > 0.5)
+
+        return
 
     def _initial_check(self):
 
@@ -120,29 +200,36 @@ class HydeDF(BaseMetaheuristic):
         pop_rot01 = self.population_old[fvr_idx, :]
         pop_rot02 = self.population_old[fvr_idx2, :]
 
+        # Number of continuous genes
+        pop_dim = self.population_old.shape[1]
+
         # Mutated population
-        pop_mutated_inverse = (np.random.uniform(size=(self.pop_size, self.pop_dim)) < self.f_cr).astype(int)
-        pop_mutated = np.logical_not(pop_mutated_inverse).astype(int)
+        pop_mutated_inverse = (np.random.uniform(size=(self.pop_size, pop_dim)) < self.f_cr).astype(self.dtype)
+        pop_mutated = np.logical_not(pop_mutated_inverse).astype(self.dtype)
 
         # Best member
-        population_best_member = np.tile(self.current_best, (self.pop_size, 1))
+        current_best = self.current_best if self.binary_idx is None else self.current_best[self.continuous_idx]
+        population_best_member = np.tile(np.asarray(current_best, dtype=self.dtype), (self.pop_size, 1))
 
         # Exponential decrease
         self.linear_decrease = self._calculate_linear_decrease()
-        exp_decrease = np.exp(1 - (1 / self.linear_decrease ** 2))
+        exp_decrease = self.dtype.type(np.exp(1 - (1 / self.linear_decrease ** 2)))
 
         # Differential variation
-        pop_00 = np.reshape(np.tile(self.f_weight[:, 2],
-                                    (1, self.pop_dim)),
-                            (self.f_weight.shape[0], self.pop_dim))
-        pop_01 = np.reshape(np.tile(self.f_weight[:, 0],
-                                    (1, self.pop_dim)),
-                            (self.f_weight.shape[0], self.pop_dim))
-        pop_02 = np.reshape(np.tile(self.f_weight[:, 1],
-                                    (1, self.pop_dim)),
-                            (self.f_weight.shape[0], self.pop_dim))
-
-        diff_var = pop_02 + np.random.uniform(size=(self.pop_size, self.pop_dim)) - self.population_old
+        # Kept in the population dtype so float32 runs do not promote to float64
+        f_weight = self.f_weight.astype(self.dtype, copy=False)
+        pop_00 = np.reshape(np.tile(f_weight[:, 2],
+                                    (1, pop_dim)),
+                            (self.f_weight.shape[0], pop_dim))
+        pop_01 = np.reshape(np.tile(f_weight[:, 0],
+                                    (1, pop_dim)),
+                            (self.f_weight.shape[0], pop_dim))
+        pop_02 = np.reshape(np.tile(f_weight[:, 1],
+                                    (1, pop_dim)),
+                            (self.f_weight.shape[0], pop_dim))
+
+        diff_var = pop_02 + np.random.uniform(size=(self.pop_size, pop_dim)).astype(self.dtype, copy=False) - \
+            self.population_old
         diff_var = diff_var * pop_01 * population_best_member * exp_decrease
 
         # Prevent overflow
@@ -152,9 +239,38 @@ class HydeDF(BaseMetaheuristic):
         new_population = self.population_old + pop_00 * (pop_rot01 - pop_rot02) + diff_var
         new_population = self.population_old * pop_mutated + new_population * pop_mutated_inverse
 
-        self.population = new_population
+        self.population = new_population.astype(self.dtype, copy=False)
         self.population_history.append(self.population)
 
+        # Binary genes
+        if self.binary_idx is not None:
+            self._binary_operator(fvr_idx, fvr_idx2, exp_decrease)
+
+        return
+
+    def _binary_operator(self, fvr_idx: np.ndarray, fvr_idx2: np.ndarray, exp_decrease: float):
+        """
+        Binary counterpart of the HyDE-DF operator, applied to the packed genes.
+        Bits where the two shuffled members differ are flipped with probability F, bits are pulled towards the best
+        member with the decreasing best-member weight, and the result is crossed over with the previous population.
+        :param fvr_idx: First shuffle of the population
+        :param fvr_idx2: Second shuffle of the population
+        :param exp_decrease: Exponential decrease of the best-member weight
+        :return: None
+        """
+
+        bits_old = self.population_bits_old
+        best_bits = np.packbits(self.current_best[self.binary_idx] > 0.5)
+
+        flip = self._random_bits(self.f_weight[:, 2:3])
+        guide = self._random_bits(self.f_weight[:, 0:1] * exp_decrease)
+        cross = self._random_bits(self.f_cr)
+
+        mutant = bits_old ^ ((bits_old[fvr_idx] ^ bits_old[fvr_idx2]) & flip)
+        mutant = (mutant & ~guide) | (best_bits & guide)
+
+        self.population_bits = (bits_old & ~cross) | (mutant & cross)
+
         return
 
     # Search loop
@@ -186,16 +302,18 @@ class HydeDF(BaseMetaheuristic):
 
         # Set the placeholder variables to empty lists
         self.population = []
-        self.population_fitness = [0.0 for _ in range(self.pop_size)]
+        self.population_fitness = np.zeros(self.pop_size)
 
         self.population_old = []
-        self.population_old_fitness = [0.0 for _ in range(self.pop_size)]
+        self.population_old_fitness = np.zeros(self.pop_size)
 
         self.population_history = []
         self.population_history_fitness = []
 
         # Generate the initial population
         self.population = self.population_old = self._generate_population()
+        if self.binary_idx is not None:
+            self.population_bits = self.population_bits_old = self._generate_bits()
 
         return
 
@@ -203,7 +321,7 @@ class HydeDF(BaseMetaheuristic):
     def get_best(self):
         # Set best member
         self.current_best_idx = np.argmin(self.population_fitness)
-        self.current_best = self.population[self.current_best_idx, :]
+        self.current_best = self.member(self.current_best_idx)
         self.current_best_fitness = self.population_fitness[self.current_best_idx]
 
         # Save to history
@@ -228,6 +346,10 @@ class HydeDF(BaseMetaheuristic):
 
     # Elitism selection
     def selection_mechanism(self):
+        """
+        Keep the members of the previous population that are better than their trial members
+        :return: Mask of the preserved members
+        """
 
         # Get the indexes of best members from the previous population to preserve them
         mask = self.population_old_fitness < self.population_fitness
@@ -235,14 +357,18 @@ class HydeDF(BaseMetaheuristic):
         # Preserve the old members
         self.population[mask, :] = self.population_old[mask, :]
         self.population_fitness[mask] = self.population_old_fitness[mask]
+        if self.binary_idx is not None:
+            self.population_bits[mask, :] = self.population_bits_old[mask, :]
 
-        return
+        return mask
 
     def post_update_cleanup(self):
 
         # Handle the history
         self.population_old = self.population
-        self.population_old_fitness = self.population_fitness
+        # Copy the fitness: the next generation is evaluated in place into population_fitness
+        self.population_old_fitness = self.population_fitness.copy()
+        self.population_bits_old = self.population_bits
         self.population_history.append(self.population)
 
         # Update best member
@@ -261,7 +387,7 @@ class HydeDF(BaseMetaheuristic):
 
         if abs(np.sum([-self.current_best_fitness,
                        self.population_fitness[self.current_best_idx]])) < self.epsilon_tolerance:
-            self.current_best = self.population[self.current_best_idx, :]
+            self.current_best = self.member(self.current_best_idx)
             self.current_best_fitness = self.population_fitness[self.current_best_idx]
             self.current_tolerance = 0
         else:
@@ -3,6 +3,7 @@
 import numpy as np
 
 from .metrics_base import BaseMetric
+from .utils import aux_total, aux_total_cost
 
 
 class CommunityMetrics(BaseMetric):
@@ -61,12 +62,12 @@ class CommunityMetrics(BaseMetric):
     def cmd_self_consumption(production: np.ndarray, consumption: np.ndarray) -> float:
         """
         Calculates the self-consumption metric. Values closer to 1.0 are better.
-        :param production: List of production resources
-        :param consumption: List of consumption resources
+        :param production: Production resources (ResourceFleet, BaseResource or a list of them)
+        :param consumption: Consumption resources (ResourceFleet, BaseResource or a list of them)
         :return: Self-consumption value
         """
-        total_production = np.sum([prod.value for prod in production])
-        total_consumption = np.sum([cons.value for cons in consumption])
+        total_production = aux_total(production)
+        total_consumption = aux_total(consumption)
 
         return total_production / total_consumption
 
@@ -80,8 +81,8 @@ class CommunityMetrics(BaseMetric):
         :param cost: Cost of each resource
         :return: Total cost of the community
         """
-        production_costs = np.sum([prod.value * prod.cost for prod in production])
-        consumption_costs = np.sum([cons.value * cons.cost for cons in consumption])
+        production_costs = aux_total_cost(production)
+        consumption_costs = aux_total_cost(consumption)
 
         return production_costs - consumption_costs
 
@@ -92,7 +93,7 @@ class CommunityMetrics(BaseMetric):
         :param production: Production resources
         :return: Sum production of the community
         """
-        return np.sum([prod.value for prod in production])
+        return aux_total(production)
 
     @staticmethod
     def cmd_total_consumed(consumption: np.ndarray) -> float:
@@ -102,7 +103,7 @@ class CommunityMetrics(BaseMetric):
         :return: Sum consumption of the community
         """
 
-        return np.sum([cons.value for cons in consumption])
+        return aux_total(consumption)
 
     @staticmethod
     def cmd_import_export_balance(imports: np.ndarray, exports: np.ndarray) -> float:
@@ -114,4 +115,4 @@ class CommunityMetrics(BaseMetric):
         :return: 
         """
 
-        return np.sum([imp.value for imp in imports]) - np.sum([exp.value for exp in exports])
+        return aux_total(imports) - aux_total(exports)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -116,3 +117,25 @@ def aux_error_checking(state_gt, state_pred):
         return True
     else:
         return False
+
+
+def aux_total(resources):
+    """
+    Sums the values of a resource, a ResourceFleet or a list/array of them
+    """
+
+    if hasattr(resources, 'value'):
+        return np.sum(resources.value)
+
+    return np.sum([aux_total(resource) for resource in resources])
+
+
+def aux_total_cost(resources):
+    """
+    Sums value * cost of a resource, a ResourceFleet or a list/array of them
+    """
+
+    if hasattr(resources, 'value'):
+        return np.sum(np.multiply(resources.value, resources.cost))
+
+    return np.sum([aux_total_cost(resource) for resource in resources])
@@ -4,4 +4,7 @@
 # Add the parsers package to __init__.py
 from .base_parser import BaseParser
 from .hm_parser import HMParser
+from .hm_cache import HMCache
+from .columnar_store import ColumnarStore
 from .procsim_parser import PROCSIMParser
+from .synthetic_parser import SyntheticParser
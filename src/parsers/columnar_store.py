@@ -0,0 +1,103 @@
+# Columnar, memory-mappable storage of time-indexed data (PROCSIM and community CSV files)
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnarStore:
+    """
+    Binary columnar bundle of a time-indexed table.
+    The bundle is a folder with the timestamps as int64 nanoseconds since the epoch (timestamps.npy),
+    one float64 .npy file per column and a manifest. Arrays are opened as read-only memory maps,
+    so windows are sliced without copying or parsing text.
+    Has as arguments:
+    - path: str -> Path to the bundle folder
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(os.path.join(path, 'manifest.json'), 'r') as file:
+            self.manifest = json.load(file)
+
+        self.timestamps = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')
+        self.columns = {column: np.load(os.path.join(path, '{}.npy'.format(column)), mmap_mode='r')
+                        for column in self.manifest['columns']}
+
+        return
+
+    @staticmethod
+    def is_store(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, 'manifest.json'))
+
+    @staticmethod
+    def convert(file_path: str, path: str, sep: str = ';', date_column: str = 'Date') -> 'ColumnarStore':
+        """
+        Convert a CSV file into a columnar bundle.
+        :param file_path: Path to the CSV file
+        :param path: Path to the bundle folder
+        :param sep: CSV separator
+        :param date_column: Name of the datetime column
+        :return: Opened bundle
+        """
+
+        data = pd.read_csv(file_path, sep=sep)
+        timestamps = pd.to_datetime(data.pop(date_column)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'timestamps.npy'), timestamps)
+        for column in data.columns:
+            np.save(os.path.join(path, '{}.npy'.format(column)), data[column].to_numpy(dtype=np.float64))
+
+        with open(os.path.join(path, 'manifest.json'), 'w') as file:
+            json.dump({'source': os.path.basename(file_path), 'columns': list(data.columns)}, file)
+
+        return ColumnarStore(path)
+
+    def __len__(self):
+        return self.timestamps.shape[0]
+
+    def index(self, start=None, end=None) -> slice:
+        """
+        Get the rows of a time window.
+        :param start: Window start (inclusive). Defaults to the first row
+        :param end: Window end (exclusive). Defaults to the last row
+        :return: Slice of the rows
+        """
+
+        start_idx = 0 if start is None else \
+            np.searchsorted(self.timestamps, pd.Timestamp(start).value, side='left')
+        end_idx = len(self) if end is None else \
+            np.searchsorted(self.timestamps, pd.Timestamp(end).value, side='left')
+
+        return slice(int(start_idx), int(end_idx))
+
+    def window(self, start=None, end=None, columns: list = None):
+        """
+        Zero-copy views of a time window.
+        :param start: Window start (inclusive)
+        :param end: Window end (exclusive)
+        :param columns: Columns to return. Defaults to all
+        :return: Tuple with the timestamps (int64 ns) and a dictionary of column views
+        """
+
+        rows = self.index(start, end)
+        columns = self.manifest['columns'] if columns is None else columns
+
+        return self.timestamps[rows], {column: self.columns[column][rows] for column in columns}
+
+    def to_frame(self, start=None, end=None, columns: list = None) -> pd.DataFrame:
+        """
+        DataFrame of a time window, indexed by datetime.
+        :param start: Window start (inclusive)
+        :param end: Window end (exclusive)
+        :param columns: Columns to return. Defaults to all
+        :return: DataFrame of the window
+        """
+
+        timestamps, values = self.window(start, end, columns)
+
+        return pd.DataFrame(values, index=pd.DatetimeIndex(timestamps.astype('datetime64[ns]'), name='Date'))
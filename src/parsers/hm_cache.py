@@ -0,0 +1,170 @@
+# On-disk cache for the data parsed by HMParser
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+class HMCache:
+    """
+    Persistent binary cache of parsed energy community scenarios.
+    Each scenario is stored as a bundle folder with one .npy file per field and a manifest.
+    Bundles are keyed by the workbook content hash, the energy community ID and the parser version,
+    so a changed workbook is never served from a stale bundle.
+    Numeric fields are stored as float64 and loaded as copy-on-write memory maps.
+    Has as arguments:
+    - cache_dir: str
+    """
+
+    # Parsed sections stored in the bundle
+    sections = ['generator', 'load', 'storage', 'charging_station', 'peers', 'vehicle']
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+        return
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """
+        Hash the contents of a file.
+        :param file_path: Path to the file
+        :return: SHA-256 hex digest
+        """
+
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def key(self, file_path: str, ec_id: int, version: str) -> str:
+        """
+        Build the bundle key of a scenario.
+        :param file_path: Path to the workbook
+        :param ec_id: Energy community ID
+        :param version: Parser version
+        :return: Bundle key
+        """
+
+        return '{}_ec{}_v{}'.format(self.file_hash(file_path)[:32], ec_id, version)
+
+    def load(self, file_path: str, ec_id: int, version: str):
+        """
+        Load a cached scenario.
+        :param file_path: Path to the workbook
+        :param ec_id: Energy community ID
+        :param version: Parser version
+        :return: Dictionary of parsed sections, or None if the scenario is not cached
+        """
+
+        bundle_path = os.path.join(self.cache_dir, self.key(file_path, ec_id, version))
+        if not os.path.isfile(os.path.join(bundle_path, 'manifest.json')):
+            return None
+
+        return self.read_bundle(bundle_path)
+
+    def save(self, file_path: str, ec_id: int, version: str, data: dict):
+        """
+        Store a parsed scenario, replacing older bundles of the same workbook and community.
+        :param file_path: Path to the workbook
+        :param ec_id: Energy community ID
+        :param version: Parser version
+        :param data: Dictionary of parsed sections
+        :return: Path to the bundle
+        """
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        key = self.key(file_path, ec_id, version)
+        bundle_path = os.path.join(self.cache_dir, key)
+
+        # Write to a temporary folder first so readers never see a partial bundle
+        temp_path = tempfile.mkdtemp(dir=self.cache_dir)
+        manifest = {'source': os.path.abspath(file_path), 'ec_id': str(ec_id), 'version': version}
+        try:
+            self.write_bundle(temp_path, data, manifest)
+
+            shutil.rmtree(bundle_path, ignore_errors=True)
+            os.replace(temp_path, bundle_path)
+        except BaseException:
+            # Do not leave partial bundles behind
+            shutil.rmtree(temp_path, ignore_errors=True)
+            raise
+
+        self._remove_stale(manifest['source'], ec_id, key)
+
+        return bundle_path
+
+    @staticmethod
+    def read_bundle(bundle_path: str) -> dict:
+        """
+        Read a bundle folder.
+        :param bundle_path: Path to the bundle
+        :return: Dictionary of parsed sections
+        """
+
+        with open(os.path.join(bundle_path, 'manifest.json'), 'r') as file:
+            manifest = json.load(file)
+
+        data = {}
+        for section, fields in manifest['sections'].items():
+            data[section] = {}
+            for field, kind in fields.items():
+                field_path = os.path.join(bundle_path, '{}.{}.npy'.format(section, field))
+                if kind == 'str':
+                    data[section][field] = np.load(field_path).astype(object)
+                else:
+                    data[section][field] = np.load(field_path, mmap_mode='c')
+
+        return data
+
+    @staticmethod
+    def write_bundle(bundle_path: str, data: dict, manifest: dict = None):
+        """
+        Write parsed sections to a bundle folder.
+        :param bundle_path: Path to the bundle
+        :param data: Dictionary of parsed sections
+        :param manifest: Additional manifest information
+        :return: None
+        """
+
+        os.makedirs(bundle_path, exist_ok=True)
+        manifest = dict(manifest) if manifest is not None else {}
+        manifest['sections'] = {}
+        for section in HMCache.sections:
+            manifest['sections'][section] = {}
+            for field, value in data[section].items():
+                value = np.asarray(value)
+                if value.dtype == object and any(isinstance(v, str) for v in value.ravel()):
+                    manifest['sections'][section][field] = 'str'
+                    value = value.astype(str)
+                else:
+                    manifest['sections'][section][field] = 'float'
+                    value = value.astype(np.float64)
+
+                np.save(os.path.join(bundle_path, '{}.{}.npy'.format(section, field)), value)
+
+        with open(os.path.join(bundle_path, 'manifest.json'), 'w') as file:
+            json.dump(manifest, file)
+
+        return
+
+    def _remove_stale(self, source: str, ec_id: int, key: str):
+        # Drop bundles built from previous contents (or parser versions) of the same workbook
+        for entry in os.listdir(self.cache_dir):
+            manifest_path = os.path.join(self.cache_dir, entry, 'manifest.json')
+            if entry == key or not os.path.isfile(manifest_path):
+                continue
+
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+
+            if manifest['source'] == source and manifest['ec_id'] == str(ec_id):
+                shutil.rmtree(os.path.join(self.cache_dir, entry), ignore_errors=True)
+
+        return
@@ -1,10 +1,53 @@
 # Excel Parser for Hugo Morais' Excel files
 
+import hashlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 from src.parsers.base_parser import BaseParser
+from src.parsers.hm_cache import HMCache
 import numpy as np
 
 
+class HMSheet:
+    """
+    Values of a single worksheet together with a label index.
+    The index maps every text cell of the sheet to the rows where it appears
+    and the column of its first occurrence, so field lookups do not need to
+    scan the whole sheet.
+    Has as arguments:
+    - data: pd.DataFrame -> Sheet read with header=None
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.values = data.to_numpy(dtype=object)
+        self.labels = {}
+
+        # Single pass over the text cells (row-major, same order as np.where)
+        is_text = np.frompyfunc(lambda cell: isinstance(cell, str), 1, 1)(self.values).astype(bool)
+        for row, col in zip(*np.nonzero(is_text)):
+            rows, first_col = self.labels.setdefault(self.values[row, col], ([], col))
+            rows.append(row)
+
+        self.labels = {label: (np.array(rows), first_col)
+                       for label, (rows, first_col) in self.labels.items()}
+
+        return
+
+    def locate(self, component: str):
+        """
+        Get the rows and column where a label is found.
+        :param component: Label to look for
+        :return: Tuple with the row indexes and the column of the label
+        """
+
+        if component not in self.labels:
+            raise KeyError('Label not found in sheet: {}'.format(component))
+
+        return self.labels[component]
+
+
 class HMParser(BaseParser):
     """
     Inherits from BaseParser.
@@ -13,6 +56,11 @@ class HMParser(BaseParser):
     - file_path: str
     - ec_id: int
     - vals: int -> Not used in current version
+    - cache_dir: str -> Optional folder for the binary cache of parsed scenarios (see HMCache)
+    - storage_capital_cost: list -> Optional battery capital cost of each storage unit, used instead of the
+      'Capital Cost (m.u.)' rows of the storage sheet
+    - vehicle_capital_cost: list -> Optional battery capital cost of each vehicle, used instead of the
+      'Capital Cost (m.u.)' rows of the vehicle sheet
 
     When initialized will have the following information:
     - Generators (.generator)
@@ -21,9 +69,41 @@ class HMParser(BaseParser):
     - Charging stations (.charging_station)
     - Peers (.peers)
     - Vehicles (.vehicle)
+
+    Sections are loaded on first access, reading only the sheets they need. Sections that depend on others
+    (.vehicle needs .generator and .charging_station) load their prerequisites automatically.
+    parse() loads every section at once.
     """
 
-    def __init__(self, file_path: str, ec_id: int, vals: int = None):
+    # Version of the parsed output, part of the cache key. Increase when the parsed dicts change.
+    version = '4'
+
+    # Characteristic holding the battery capital cost (m.u.) of each storage unit and vehicle
+    # See utils/battery/parameter_calculation.py
+    capital_cost_label = 'Capital Cost (m.u.)'
+
+    # Parsed sections and the method that reads each of them
+    readers = {'generator': 'read_generator_data',
+               'load': 'read_load_data',
+               'storage': 'read_storage_data',
+               'charging_station': 'read_charging_station_data',
+               'peers': 'read_peers_data',
+               'vehicle': 'read_vehicle_data'}
+
+    # Vehicle fields with one column per plug-in event, shape (n_vehicles, n_events)
+    event_fields = ['arrive_time_period', 'departure_time_period', 'place', 'used_soc_percentage_arriving',
+                    'soc_percentage_arriving', 'soc_required_exit', 'p_charge_max_contracted',
+                    'p_discharge_max_contracted', 'charge_price', 'discharge_price']
+
+    # Event fields needed to build the vehicle schedules
+    schedule_fields = ['arrive_time_period', 'departure_time_period', 'place']
+
+    # Sheets required to parse an energy community
+    community_sheets = ['Generator_EC{}', 'Load_EC{}', 'Storage_EC{}',
+                        'CStation_EC{}', 'Peers_Info_EC{}', 'Vehicle_EC{}']
+
+    def __init__(self, file_path: str, ec_id: int, vals: int = None, cache_dir: str = None,
+                 storage_capital_cost: list = None, vehicle_capital_cost: list = None):
         super().__init__(file_path)
         self.data = None
 
@@ -33,75 +113,448 @@ class HMParser(BaseParser):
         # File path
         self.file_path = file_path
 
-        # Prepare the variables
-        self.generator = None
-        self.load = None
-        self.storage = None
-        self.charging_station = None
-        self.peers = None
-        self.vehicle = None
+        # Battery capital costs given to the parser (None reads them from the workbook)
+        self.storage_capital_cost = storage_capital_cost
+        self.vehicle_capital_cost = vehicle_capital_cost
+
+        # Workbook handle and indexed sheets, opened once and shared by every reader
+        self._workbook = None
+        self._sheets = {}
+
+        # Binary cache of the parsed scenario
+        self.cache = HMCache(cache_dir) if cache_dir is not None else None
+        self._cache_checked = False
+        self._cached = False
+
+        # Prepare the variables (loaded on first access)
+        self._sections = {section: None for section in self.readers}
 
         return
 
     def parse(self):
         # self.read_general_info()
         # self.read_branch_data()
-        self.read_generator_data()
-        self.read_load_data()
-        self.read_storage_data()
-        self.read_charging_station_data()
-        self.read_peers_data()
-        self.read_vehicle_data()
+
+        # Load every section that was not accessed yet
+        for section in self.readers:
+            self._get_section(section)
+
+        self.close()
+
+        if self.cache is not None and not self._cached:
+            self.cache.save(self.file_path, self.ec_id, self.cache_version,
+                            {section: getattr(self, section) for section in self.cache.sections})
+            self._cached = True
 
         return
 
+    def _get_section(self, section: str) -> dict:
+        if self._sections[section] is None:
+            self._load_section(section)
+
+        return self._sections[section]
+
+    def _load_section(self, section: str):
+        # Warm start from the binary cache, checked once per instance
+        if self.cache is not None and not self._cache_checked:
+            self._cache_checked = True
+            cached = self.cache.load(self.file_path, self.ec_id, self.cache_version)
+            if cached is not None:
+                self._sections.update(cached)
+                self._cached = True
+                return
+
+        getattr(self, self.readers[section])()
+
+        # Release the workbook once every section is loaded
+        if all(values is not None for values in self._sections.values()):
+            self.close()
+
+        return
+
+    @property
+    def cache_version(self) -> str:
+        # Capital costs given to the parser change the parsed data, so they are part of the cache key
+        if self.storage_capital_cost is None and self.vehicle_capital_cost is None:
+            return self.version
+
+        capital_costs = [None if values is None else np.asarray(values, dtype=np.float64).tolist()
+                         for values in (self.storage_capital_cost, self.vehicle_capital_cost)]
+
+        return '{}_{}'.format(self.version, hashlib.sha256(repr(capital_costs).encode()).hexdigest()[:16])
+
+    @property
+    def generator(self) -> dict:
+        return self._get_section('generator')
+
+    @generator.setter
+    def generator(self, values: dict):
+        self._sections['generator'] = values
+
+    @property
+    def load(self) -> dict:
+        return self._get_section('load')
+
+    @load.setter
+    def load(self, values: dict):
+        self._sections['load'] = values
+
+    @property
+    def storage(self) -> dict:
+        return self._get_section('storage')
+
+    @storage.setter
+    def storage(self, values: dict):
+        self._sections['storage'] = values
+
+    @property
+    def charging_station(self) -> dict:
+        return self._get_section('charging_station')
+
+    @charging_station.setter
+    def charging_station(self, values: dict):
+        self._sections['charging_station'] = values
+
+    @property
+    def peers(self) -> dict:
+        return self._get_section('peers')
+
+    @peers.setter
+    def peers(self, values: dict):
+        self._sections['peers'] = values
+
+    @property
+    def vehicle(self) -> dict:
+        return self._get_section('vehicle')
+
+    @vehicle.setter
+    def vehicle(self, values: dict):
+        self._sections['vehicle'] = values
+
     @staticmethod
-    def get_timeseries(values, component: str):
+    def discover_ec_ids(file_path: str) -> list:
+        """
+        Find the energy communities available in a workbook.
+        A community is available when all of its required sheets are present.
+        :param file_path: Path to the workbook
+        :return: Sorted list of energy community IDs
+        """
 
-        temp_data_idx = np.where(values == component)
-        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
-        for i in np.arange(temp_data.shape[0]):
-            temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
-        temp_data = temp_data[:, temp_data_idx[1][0] + 1:]
+        with pd.ExcelFile(file_path) as workbook:
+            sheet_names = set(workbook.sheet_names)
 
-        return temp_data
+        candidates = {int(match.group(1)) for match in
+                      (re.search(r'_EC(\d+)$', sheet_name) for sheet_name in sheet_names)
+                      if match is not None}
+
+        return sorted(ec_id for ec_id in candidates
+                      if all(sheet.format(ec_id) in sheet_names for sheet in HMParser.community_sheets))
+
+    @staticmethod
+    def parse_communities(file_path: str, ec_ids: list = None,
+                          max_workers: int = None, cache_dir: str = None) -> dict:
+        """
+        Parse several energy communities of a workbook concurrently in a process pool.
+        :param file_path: Path to the workbook
+        :param ec_ids: Energy community IDs to parse. Defaults to every community in the workbook
+        :param max_workers: Number of worker processes. Defaults to the number of processors
+        :param cache_dir: Optional folder for the binary cache of parsed scenarios
+        :return: Dictionary of parsed HMParser instances, keyed by energy community ID
+        """
+
+        if ec_ids is None:
+            ec_ids = HMParser.discover_ec_ids(file_path)
+
+        # Avoid the pool start-up cost when there is nothing to parallelize
+        if len(ec_ids) <= 1 or max_workers == 1:
+            return {ec_id: _parse_community(file_path, ec_id, cache_dir) for ec_id in ec_ids}
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {ec_id: executor.submit(_parse_community, file_path, ec_id, cache_dir)
+                       for ec_id in ec_ids}
+
+            return {ec_id: future.result() for ec_id, future in futures.items()}
+
+    def close(self):
+        """
+        Close the workbook handle and drop the indexed sheets.
+        :return: None
+        """
+
+        if self._workbook is not None:
+            self._workbook.close()
+
+        self._workbook = None
+        self._sheets = {}
+
+        return
+
+    def get_sheet(self, sheet_name: str) -> HMSheet:
+        """
+        Get an indexed sheet, opening the workbook on first use.
+        :param sheet_name: Name of the sheet
+        :return: Indexed sheet
+        """
+
+        if sheet_name not in self._sheets:
+            if self._workbook is None:
+                self._workbook = pd.ExcelFile(self.file_path)
+
+            self._sheets[sheet_name] = HMSheet(self._workbook.parse(sheet_name=sheet_name, header=None))
+
+        return self._sheets[sheet_name]
+
+    @staticmethod
+    def _lookup(values, component: str, n_cols: int = None):
+        """
+        Get the block of values to the right of a label.
+        :param values: Indexed sheet (or DataFrame of the sheet)
+        :param component: Label to look for
+        :param n_cols: Number of columns to keep. Keeps all the remaining columns if None
+        :return: 2-D object array with one row per occurrence of the label
+        """
+
+        # Accept both indexed sheets and raw DataFrames
+        if not isinstance(values, HMSheet):
+            values = HMSheet(values)
+
+        temp_rows, temp_col = values.locate(component)
+        temp_end = None if n_cols is None else temp_col + 1 + n_cols
+
+        return values.values[temp_rows, temp_col + 1:temp_end]
+
+    @staticmethod
+    def _convert(temp_data: np.ndarray, keep_string: bool = False) -> np.ndarray:
+        """
+        Convert a block of sheet values in a single pass.
+        :param temp_data: 2-D object array
+        :param keep_string: Keep the values as strings instead of converting to float64
+        :return: Contiguous float64 array (or object array of strings)
+        """
+
+        if keep_string:
+            return temp_data.astype(str).astype(object)
+
+        temp_numeric = pd.to_numeric(pd.Series(temp_data.ravel()), errors='coerce')
+
+        return np.ascontiguousarray(temp_numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+                                    .reshape(temp_data.shape))
+
+    @staticmethod
+    def get_timeseries(values, component: str):
+
+        # 2-D: (n_units, n_steps)
+        return HMParser._convert(HMParser._lookup(values, component))
 
     @staticmethod
     def get_characteristic(values, component: str, keep_string: bool = False):
 
-        temp_data_idx = np.where(values == component)
-        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
-        if not keep_string:
-            for i in np.arange(temp_data.shape[0]):
-                temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
-            temp_data = temp_data[:, temp_data_idx[1][0] + 1]
-        else:
-            for i in np.arange(temp_data.shape[0]):
-                temp_data[i, :] = temp_data[i, :].astype(str)
-            temp_data = temp_data[:, temp_data_idx[1][0] + 1]
+        # 1-D: (n_units,)
+        return HMParser._convert(HMParser._lookup(values, component, n_cols=1), keep_string)[:, 0].copy()
 
-        return temp_data
+    @staticmethod
+    def get_events(values, component: str, keep_string: bool = False, n_events: int = 2):
+
+        # 2-D: (n_units, n_events)
+        return HMParser._convert(HMParser._lookup(values, component, n_cols=n_events), keep_string)
 
     @staticmethod
-    def get_events(values, component: str, keep_string: bool = False):
-
-        temp_data_idx = np.where(values == component)
-        temp_data = values.iloc[temp_data_idx[0]].copy(deep=True).to_numpy()
-        if not keep_string:
-            for i in np.arange(temp_data.shape[0]):
-                temp_data[i, :] = pd.to_numeric(temp_data[i, :], errors='coerce')
-            temp_data = temp_data[:, temp_data_idx[1][0] + 1:temp_data_idx[1][0] + 3]
+    def count_events(values, component: str = 'Arrive time period') -> int:
+        """
+        Count the event columns, i.e. up to the first column without a value for every unit.
+        Values further right (e.g. notes next to the event block) are not events.
+        :param values: Indexed sheet (or DataFrame of the sheet)
+        :param component: Event label used to detect the events
+        :return: Number of events
+        """
+
+        temp_data = HMParser._convert(HMParser._lookup(values, component))
+        temp_empty = np.flatnonzero(np.isnan(temp_data).all(axis=0))
+
+        return int(temp_empty[0]) if temp_empty.size > 0 else temp_data.shape[1]
+
+    @staticmethod
+    def get_capital_costs(values, n_units: int, capital_cost: list = None) -> np.ndarray:
+        """
+        Get the battery capital costs of the storage units or vehicles of a sheet.
+        Costs given to the parser take precedence over the 'Capital Cost (m.u.)' rows of the sheet.
+        Sheets without the rows give NaN costs, which the objective functions reject (see check_capital_costs).
+        :param values: Indexed sheet (or DataFrame of the sheet)
+        :param n_units: Number of storage units or vehicles in the sheet
+        :param capital_cost: Capital cost of each unit, or None to read them from the sheet
+        :return: Array of shape (n_units,)
+        """
+
+        if not isinstance(values, HMSheet):
+            values = HMSheet(values)
+
+        if capital_cost is not None:
+            temp_data = np.asarray(capital_cost, dtype=np.float64).ravel()
+        elif HMParser.capital_cost_label in values.labels:
+            temp_data = HMParser.get_characteristic(values, HMParser.capital_cost_label)
         else:
-            for i in np.arange(temp_data.shape[0]):
-                temp_data[i, :] = temp_data[i, :].astype(str)
-            temp_data = temp_data[:, temp_data_idx[1][0] + 1:temp_data_idx[1][0] + 3]
+            return np.full(n_units, np.nan)
+
+        if temp_data.shape[0] != n_units:
+            raise ValueError('Expected {} capital costs, got {}'.format(n_units, temp_data.shape[0]))
 
         return temp_data
 
+    @staticmethod
+    def check_capital_costs(capital_cost: np.ndarray, resource: str):
+        """
+        Check that every battery of a resource has a capital cost.
+        :param capital_cost: Capital costs of the resource
+        :param resource: Name of the resource, used in the error message
+        :return: None
+        """
+
+        if np.any(np.isnan(capital_cost)):
+            raise ValueError('Missing {} capital costs: add the {} rows to the workbook or pass them to '
+                             'HMParser'.format(resource, HMParser.capital_cost_label))
+
+        return
+
+    @staticmethod
+    def build_ev_schedule(arrive_time_period: np.ndarray, departure_time_period: np.ndarray, place: np.ndarray,
+                          p_charge_max: np.ndarray, p_discharge_max: np.ndarray,
+                          cs_p_charge_max: np.ndarray, cs_p_discharge_max: np.ndarray,
+                          n_steps: int):
+        """
+        Build the EV plug-in schedules from the events of every vehicle.
+        Vehicles can have any number of events; unused events are NaN.
+        Events cover the periods [arrive, departure] (1-based, inclusive). When events overlap, the later event sets
+        the charging limits, as in the sequential definition.
+        :param arrive_time_period: Arrival periods, shape (n_vehicles, n_events)
+        :param departure_time_period: Departure periods, shape (n_vehicles, n_events)
+        :param place: Charging station (1-based) of each event, shape (n_vehicles, n_events)
+        :param p_charge_max: Vehicle maximum charge power, shape (n_vehicles,)
+        :param p_discharge_max: Vehicle maximum discharge power, shape (n_vehicles,)
+        :param cs_p_charge_max: Charging station maximum charge power, shape (n_stations,)
+        :param cs_p_discharge_max: Charging station maximum discharge power, shape (n_stations,)
+        :param n_steps: Number of time steps
+        :return: Tuple with the schedule, schedule_charge and schedule_discharge, each of shape (n_vehicles, n_steps)
+        """
+
+        arrive_time_period = np.atleast_2d(np.asarray(arrive_time_period, dtype=np.float64))
+        departure_time_period = np.atleast_2d(np.asarray(departure_time_period, dtype=np.float64))
+        place = np.atleast_2d(np.asarray(place, dtype=np.float64))
+        n_vehicles, n_events = arrive_time_period.shape
+
+        # Events in use
+        valid = ~(np.isnan(arrive_time_period) | np.isnan(departure_time_period) | np.isnan(place))
+        start = np.where(valid, arrive_time_period, 1.0).astype(int) - 1
+        end = np.where(valid, departure_time_period, 0.0).astype(int)
+        station = np.where(valid, place, 1.0).astype(int) - 1
+
+        # Maximum allowed charging and discharging of each event
+        charge_max = np.minimum(np.reshape(p_charge_max, (n_vehicles, 1)), np.asarray(cs_p_charge_max)[station])
+        discharge_max = np.minimum(np.reshape(p_discharge_max, (n_vehicles, 1)),
+                                   np.asarray(cs_p_discharge_max)[station])
+
+        # Paint the intervals one event column at a time, vectorized over the fleet
+        steps = np.arange(n_steps)
+        schedule = np.zeros((n_vehicles, n_steps), dtype=bool)
+        schedule_charge = np.zeros((n_vehicles, n_steps))
+        schedule_discharge = np.zeros((n_vehicles, n_steps))
+        for e in range(n_events):
+            plugged = (steps >= start[:, e:e + 1]) & (steps < end[:, e:e + 1])
+
+            schedule |= plugged
+            np.copyto(schedule_charge, charge_max[:, e:e + 1], where=plugged)
+            np.copyto(schedule_discharge, discharge_max[:, e:e + 1], where=plugged)
+
+        return schedule.astype(np.float64), schedule_charge, schedule_discharge
+
+    @staticmethod
+    def events_from_table(events, n_vehicles: int = None) -> dict:
+        """
+        Convert a long-format table of vehicle events into event arrays.
+        The table has one row per plug-in event, a 'vehicle' column with the (1-based) vehicle number and one column
+        per event field, named as the keys of HMParser.vehicle (e.g. 'arrive_time_period', 'departure_time_period',
+        'place', 'soc_percentage_arriving'), in the same units.
+        Events keep the table order within each vehicle.
+        :param events: DataFrame or path to a CSV file
+        :param n_vehicles: Number of vehicles. Defaults to the largest vehicle number in the table
+        :return: Dictionary of arrays of shape (n_vehicles, n_events), padded with NaN
+        """
+
+        if isinstance(events, str):
+            events = pd.read_csv(events)
+
+        vehicle_idx = events['vehicle'].to_numpy(dtype=int) - 1
+        if n_vehicles is None:
+            n_vehicles = int(vehicle_idx.max()) + 1 if vehicle_idx.size > 0 else 0
+
+        # Position of each event within its vehicle
+        event_idx = events.groupby('vehicle').cumcount().to_numpy()
+        n_events = int(event_idx.max()) + 1 if event_idx.size > 0 else 0
+
+        temp_events = {}
+        for field in events.columns.drop('vehicle'):
+            temp_events[field] = np.full((n_vehicles, n_events), np.nan)
+            temp_events[field][vehicle_idx, event_idx] = pd.to_numeric(events[field], errors='coerce')
+
+        return temp_events
+
+    def set_vehicle_events(self, events, n_vehicles: int = None):
+        """
+        Replace the events read from the vehicle sheet with a long-format table (see events_from_table)
+        and rebuild the vehicle schedules.
+        Event fields missing from the table keep the values read from the sheet. Every event field is padded with NaN
+        to the larger number of events, so they all keep the same (n_vehicles, n_events) shape.
+        :param events: DataFrame or path to a CSV file
+        :param n_vehicles: Number of vehicles. Defaults to the parsed vehicles
+        :return: None
+        """
+
+        if n_vehicles is None:
+            n_vehicles = self.vehicle['p_charge_max'].shape[0]
+
+        temp_events = self.events_from_table(events, n_vehicles=n_vehicles)
+
+        missing = [field for field in self.schedule_fields if field not in temp_events]
+        if len(missing) > 0:
+            raise ValueError('Event table is missing the columns: {}'.format(', '.join(missing)))
+
+        for field in self.event_fields:
+            if field not in temp_events:
+                temp_events[field] = self.vehicle[field]
+
+            if temp_events[field].shape[0] != n_vehicles:
+                raise ValueError('Event field {} has {} vehicles, expected {}'.format(field,
+                                                                                     temp_events[field].shape[0],
+                                                                                     n_vehicles))
+
+        # Pad every event field to the same number of events
+        n_events = max(values.shape[1] for values in temp_events.values())
+        for field, values in temp_events.items():
+            temp_events[field] = np.full((n_vehicles, n_events), np.nan)
+            temp_events[field][:, :values.shape[1]] = values
+
+        self.vehicle.update(temp_events)
+        self._update_vehicle_schedule(self.vehicle)
+
+        return
+
+    def _update_vehicle_schedule(self, vehicle: dict):
+        # Calculates the schedule for arrivals and departures
+        vehicle['schedule'], vehicle['schedule_charge'], vehicle['schedule_discharge'] = \
+            self.build_ev_schedule(arrive_time_period=vehicle['arrive_time_period'],
+                                   departure_time_period=vehicle['departure_time_period'],
+                                   place=vehicle['place'],
+                                   p_charge_max=vehicle['p_charge_max'],
+                                   p_discharge_max=vehicle['p_discharge_max'],
+                                   cs_p_charge_max=self.charging_station['p_charge_max'],
+                                   cs_p_discharge_max=self.charging_station['p_discharge_max'],
+                                   n_steps=self.generator['p_forecast'].shape[1])
+
+        return
+
     def read_generator_data(self):
         # Read the Excel
         sheet_name_gen = 'Generator_EC{}'.format(self.ec_id)
-        data_gen = pd.read_excel(self.file_path, sheet_name=sheet_name_gen, header=None)
+        data_gen = self.get_sheet(sheet_name_gen)
 
         gen = {'p_forecast': self.get_timeseries(data_gen, 'P Forecast (kW)') * 0.5,
                'cost_parameter_a': self.get_timeseries(data_gen, 'Cost Parameter A (m.u.)'),
@@ -122,9 +575,8 @@ class HMParser(BaseParser):
                'q_min': self.get_characteristic(data_gen, 'Q Min. (kW)')}
 
         # Correct the values of the forecast according to generator type
-        for i in np.arange(gen['p_forecast'].shape[0]):
-            if gen['type_generator'][i] == 1.0:
-                gen['p_forecast'][i, :] = gen['p_max'][i]
+        mask = gen['type_generator'] == 1.0
+        gen['p_forecast'][mask, :] = gen['p_max'][mask, np.newaxis]
 
         self.generator = gen
         return
@@ -133,7 +585,7 @@ class HMParser(BaseParser):
 
         # Read the Excel
         sheet_name_load = 'Load_EC{}'.format(self.ec_id)
-        data_load = pd.read_excel(self.file_path, sheet_name=sheet_name_load, header=None)
+        data_load = self.get_sheet(sheet_name_load)
 
         # Dictionary to place the values
         load = {'p_forecast': self.get_timeseries(data_load, 'P Forecast (kW)'),
@@ -159,9 +611,7 @@ class HMParser(BaseParser):
     def read_storage_data(self):
         # Read the Excel
         sheet_name_stor = 'Storage_EC{}'.format(self.ec_id)
-        data_storage = pd.read_excel(self.file_path,
-                                     sheet_name=sheet_name_stor,
-                                     header=None)
+        data_storage = self.get_sheet(sheet_name_stor)
 
         storage = {'p_charge_limit': self.get_timeseries(data_storage,
                                                          'P Charge Limit (kW)'),
@@ -197,15 +647,16 @@ class HMParser(BaseParser):
                    'p_discharge_max': self.get_characteristic(data_storage,
                                                               'P Discharge Max (kW)')}
 
+        storage['capital_cost'] = self.get_capital_costs(data_storage, storage['energy_capacity'].shape[0],
+                                                         self.storage_capital_cost)
+
         self.storage = storage
         return
 
     def read_charging_station_data(self):
         # Read the Excel
         sheet_name_charging_station = 'CStation_EC{}'.format(self.ec_id)
-        data_charging_station = pd.read_excel(self.file_path,
-                                              sheet_name=sheet_name_charging_station,
-                                              header=None)
+        data_charging_station = self.get_sheet(sheet_name_charging_station)
 
         charging_station = {'p_charge_limit': self.get_timeseries(data_charging_station,
                                                                   'P Charge Limit (kW)'),
@@ -240,7 +691,7 @@ class HMParser(BaseParser):
     def read_peers_data(self):
         # Read the Excel sheet
         sheet_name_peers = 'Peers_Info_EC{}'.format(self.ec_id)
-        data_peers = pd.read_excel(self.file_path, sheet_name=sheet_name_peers, header=None)
+        data_peers = self.get_sheet(sheet_name_peers)
 
         peers = {'p_forecast': self.get_timeseries(data_peers,
                                                    'P Forecast (kW)'),
@@ -265,28 +716,31 @@ class HMParser(BaseParser):
     def read_vehicle_data(self):
         # Read the Excel sheet
         sheet_name_v2g = 'Vehicle_EC{}'.format(self.ec_id)
-        data_v2g = pd.read_excel(self.file_path, sheet_name=sheet_name_v2g, header=None)
+        data_v2g = self.get_sheet(sheet_name_v2g)
+
+        # Number of trips in the sheet
+        n_events = self.count_events(data_v2g)
 
         vehicle = {'arrive_time_period': self.get_events(data_v2g,
-                                                         'Arrive time period'),
+                                                         'Arrive time period', n_events=n_events),
                    'departure_time_period': self.get_events(data_v2g,
-                                                            'Departure time period'),
+                                                            'Departure time period', n_events=n_events),
                    'place': self.get_events(data_v2g,
-                                            'Place'),
+                                            'Place', n_events=n_events),
                    'used_soc_percentage_arriving': self.get_events(data_v2g,
-                                                                   'Used SOC (%) Arriving'),
+                                                                   'Used SOC (%) Arriving', n_events=n_events),
                    'soc_percentage_arriving': self.get_events(data_v2g,
-                                                              'SOC (%) Arriving')/100.0,
+                                                              'SOC (%) Arriving', n_events=n_events)/100.0,
                    'soc_required_exit': self.get_events(data_v2g,
-                                                        'SOC Required (%) Exit')/100.0,
+                                                        'SOC Required (%) Exit', n_events=n_events)/100.0,
                    'p_charge_max_contracted': self.get_events(data_v2g,
-                                                              'Pcharge Max contracted [kW]'),
+                                                              'Pcharge Max contracted [kW]', n_events=n_events),
                    'p_discharge_max_contracted': self.get_events(data_v2g,
-                                                                 'PDcharge Max contracted [kW]'),
+                                                                 'PDcharge Max contracted [kW]', n_events=n_events),
                    'charge_price': self.get_events(data_v2g,
-                                                   'Charge Price'),
+                                                   'Charge Price', n_events=n_events),
                    'discharge_price': self.get_events(data_v2g,
-                                                      'Disharge Price'),
+                                                      'Disharge Price', n_events=n_events),
                    'type_vehicle': self.get_characteristic(data_v2g,
                                                            'Type of Vehicle', keep_string=True),
                    'owner': self.get_characteristic(data_v2g,
@@ -310,36 +764,18 @@ class HMParser(BaseParser):
                    'min_technical_soc': self.get_characteristic(data_v2g,
                                                                 'Minimun Technical SOC (%)')/100.0}
 
-        # Calculates the schedule for arrivals and departures
-        schedule = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
-        schedule_charge = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
-        schedule_discharge = np.zeros((vehicle['p_charge_max'].shape[0], self.generator['p_forecast'].shape[1]))
-        for v in range(vehicle['p_charge_max'].shape[0]):
-
-            # Check the trips
-            for t in range(2):
-                schedule[v, int(vehicle['arrive_time_period'][v, t])-1:
-                            int(vehicle['departure_time_period'][v, t])] = 1.0
+        vehicle['capital_cost'] = self.get_capital_costs(data_v2g, vehicle['e_capacity_max'].shape[0],
+                                                         self.vehicle_capital_cost)
 
-                current_place = int(vehicle['place'][v, t]) - 1
+        self._update_vehicle_schedule(vehicle)
 
-                # get the maximum allowed charging and discharging
-                charge_max = min(vehicle['p_charge_max'][v],
-                                 self.charging_station['p_charge_max'][current_place])
-
-                discharge_max = min(vehicle['p_discharge_max'][v],
-                                    self.charging_station['p_discharge_max'][current_place])
-
-                # build the schedule
-                schedule_charge[v, int(vehicle['arrive_time_period'][v, t])-1:
-                                   int(vehicle['departure_time_period'][v, t])] = charge_max
+        self.vehicle = vehicle
+        return
 
-                schedule_discharge[v, int(vehicle['arrive_time_period'][v, t])-1:
-                                      int(vehicle['departure_time_period'][v, t])] = discharge_max
 
-        vehicle['schedule'] = schedule
-        vehicle['schedule_charge'] = schedule_charge
-        vehicle['schedule_discharge'] = schedule_discharge
+def _parse_community(file_path: str, ec_id: int, cache_dir: str = None) -> HMParser:
+    # Worker for HMParser.parse_communities (module level so it can be pickled)
+    parser = HMParser(file_path=file_path, ec_id=ec_id, cache_dir=cache_dir)
+    parser.parse()
 
-        self.vehicle = vehicle
-        return
+    return parser
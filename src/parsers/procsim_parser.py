@@ -1,11 +1,18 @@
 # PROCSIM parser
 
 from .base_parser import BaseParser
+from .columnar_store import ColumnarStore
 
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
 
 
 class PROCSIMParser(BaseParser):
+    """
+    Parser for PROCSIM exports.
+    Has as arguments:
+    - file_path: str -> Path to a ';' separated CSV file or to a ColumnarStore bundle
+    """
 
     def __init__(self,
                  file_path: str):
@@ -14,17 +21,117 @@ class PROCSIMParser(BaseParser):
         self.generator = None
         self.load = None
 
+        # Columnar bundle, when the file path points to one
+        self.store = ColumnarStore(file_path) if ColumnarStore.is_store(file_path) else None
+
         return
 
     def parse(self):
 
+        # Binary columnar bundle: no text parsing
+        if self.store is not None:
+            self.data = self.store.to_frame()
+            self.generator = self.data['Production']
+            self.load = self.data['Demand']
+
+            return
+
         # Open the file
         data = pd.read_csv(self.file_path, sep=';')
         data.index = pd.to_datetime(data['Date'])
         data.drop('Date', axis=1, inplace=True)
 
+        self.data = data
+
         self.generator = data['Production']
 
         self.load = data['Demand']
 
         return
+
+    def window(self, start=None, end=None, columns: list = None):
+        """
+        Get a scenario window. Slices are zero-copy views when reading from a ColumnarStore bundle.
+        :param start: Window start (inclusive)
+        :param end: Window end (exclusive)
+        :param columns: Columns to return. Defaults to all
+        :return: Tuple with the timestamps (int64 ns) and a dictionary of column arrays
+        """
+
+        if self.store is not None:
+            return self.store.window(start, end, columns)
+
+        if self.data is None:
+            self.parse()
+
+        # CSV input: slice the parsed frame (copies)
+        data = self.data if columns is None else self.data[columns]
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+
+        timestamps = data.index.to_numpy(dtype='datetime64[ns]').astype('int64')
+
+        return timestamps, {column: data[column].to_numpy() for column in data.columns}
+
+    def stream(self,
+               step: str = '15min',
+               horizon: str = '1D',
+               columns: list = None,
+               chunksize: int = 100000,
+               how: str = 'mean'):
+        """
+        Read the file in chunks, resample on the fly and yield one horizon at a time.
+        Memory is bounded by the chunk size and the horizon length instead of the file length.
+        :param step: Target time step of the resampled data (fixed frequency, e.g. '15min' or '1h')
+        :param horizon: Length of each yielded window (fixed frequency, e.g. '1D')
+        :param columns: Columns to read (e.g. ['PV_Production', 'Wind_Production', 'Netload']). Defaults to all
+        :param chunksize: Number of rows read per chunk
+        :param how: Resampling aggregation (e.g. 'mean', 'sum', 'max')
+        :return: Generator of DataFrames, one per horizon window, indexed by time
+        """
+
+        horizon = to_offset(horizon)
+        usecols = None if columns is None else ['Date'] + list(columns)
+
+        carry = None
+        pending = None
+        for chunk in pd.read_csv(self.file_path, sep=';', usecols=usecols, chunksize=chunksize):
+            chunk.index = pd.to_datetime(chunk.pop('Date'))
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+
+            # The last bin may continue in the next chunk, so keep its rows for later
+            complete = chunk.index < chunk.index[-1].floor(step)
+            carry = chunk[~complete]
+
+            pending = self._append(pending, chunk[complete].resample(step).agg(how))
+
+            # Yield every horizon that is already complete
+            while pending is not None and not pending.empty:
+                window_end = pending.index[0].floor(horizon) + horizon
+                if pending.index[-1] < window_end:
+                    break
+
+                yield pending[pending.index < window_end]
+                pending = pending[pending.index >= window_end]
+
+        # Flush the remaining bins
+        if carry is not None and not carry.empty:
+            pending = self._append(pending, carry.resample(step).agg(how))
+
+        while pending is not None and not pending.empty:
+            window_end = pending.index[0].floor(horizon) + horizon
+
+            yield pending[pending.index < window_end]
+            pending = pending[pending.index >= window_end]
+
+        return
+
+    @staticmethod
+    def _append(pending, resampled):
+        if pending is None or pending.empty:
+            return resampled
+
+        return pd.concat([pending, resampled])
@@ -0,0 +1,457 @@
+# Synthetic energy community instances for scaling tests
+
+import numpy as np
+import pandas as pd
+
+from src.parsers.base_parser import BaseParser
+from src.parsers.hm_cache import HMCache
+from src.parsers.hm_parser import HMParser
+
+
+class SyntheticParser(BaseParser):
+    """
+    Inherits from BaseParser.
+    Seeded generator of energy community instances with the same structures HMParser emits, so it can be used
+    anywhere an HMParser is expected (HMProblemPymoo, HMRepairPymoo, ...).
+    Has as arguments:
+    - n_gen: int -> Number of generators
+    - n_load: int -> Number of loads
+    - n_stor: int -> Number of storage units
+    - n_v2g: int -> Number of electric vehicles
+    - n_cs: int -> Number of charging stations
+    - n_steps: int -> Number of time steps
+    - n_events: int -> Maximum number of plug-in events per vehicle (each vehicle gets 1 to n_events)
+    - n_peers: int -> Number of peers
+    - renewable_share: float -> Share of renewable (type 2) generators
+    - seed: int -> Random seed
+
+    When parsed will have the following information:
+    - Generators (.generator)
+    - Loads (.load)
+    - Storage (.storage)
+    - Charging stations (.charging_station)
+    - Peers (.peers)
+    - Vehicles (.vehicle)
+    """
+
+    # Excel layout used by to_excel: section -> (sheet, [(field, label, kind, scale applied by HMParser)])
+    # Kinds: 'char' (characteristic), 'ts' (timeseries), 'event'
+    layout = {'generator': ('Generator_EC{}',
+                            [('internal_bus_location', 'Internal Bus Location', 'char', 1.0),
+                             ('type_generator', 'Generator Type', 'char', 1.0),
+                             ('owner', 'Owner', 'char', 1.0),
+                             ('manager', 'Manager', 'char', 1.0),
+                             ('type_contract', 'Type of Contract', 'char', 1.0),
+                             ('p_max', 'P Max. (kW)', 'char', 1.0),
+                             ('p_min', 'P Min. (kW)', 'char', 1.0),
+                             ('q_max', 'Q Max. (kW)', 'char', 1.0),
+                             ('q_min', 'Q Min. (kW)', 'char', 1.0),
+                             ('p_forecast', 'P Forecast (kW)', 'ts', 0.5),
+                             ('cost_parameter_a', 'Cost Parameter A (m.u.)', 'ts', 1.0),
+                             ('cost_parameter_b', 'Cost Parameter B (m.u.)', 'ts', 1.0),
+                             ('cost_parameter_c', 'Cost Parameter C (m.u.)', 'ts', 1.0),
+                             ('cost_nde', 'Cost NDE (m.u.)', 'ts', 1.0),
+                             ('ghg_cof_a', 'GHG Cof A (m.u.)', 'ts', 1.0),
+                             ('ghg_cof_b', 'GHG Cof B (m.u.)', 'ts', 1.0),
+                             ('ghg_cof_c', 'GHG Cof C (m.u.)', 'ts', 1.0)]),
+              'load': ('Load_EC{}',
+                       [('internal_bus_location', 'Internal Bus Location', 'char', 1.0),
+                        ('charge_type', 'Charge Type', 'char', 1.0),
+                        ('owner_id', 'Owner (ID)', 'char', 1.0),
+                        ('manager_id', 'Manager (ID)', 'char', 1.0),
+                        ('type_contract', 'Type of Contract', 'char', 1.0),
+                        ('p_contracted', 'P Contracted (kW)', 'char', 1.0),
+                        ('tg_phi', 'Tg phi', 'char', 1.0),
+                        ('p_forecast', 'P Forecast (kW)', 'ts', 1.0),
+                        ('q_forecast', 'Q Forecast (kVAr)', 'ts', 1.0),
+                        ('p_reduce', 'P Reduce (kW)', 'ts', 1.0),
+                        ('p_move', 'P Move (kW)', 'ts', 1.0),
+                        ('p_in_move', 'P In Move (kW)', 'ts', 1.0),
+                        ('cost_reduce', 'Cost Reduce (m.u.)', 'ts', 1.0),
+                        ('cost_cut', 'Cost Cut (m.u.)', 'ts', 1.0),
+                        ('cost_mov', 'Cost Mov (m.u.)', 'ts', 1.0),
+                        ('cost_ens', 'Cost ENS (m.u.)', 'ts', 1.0)]),
+              'storage': ('Storage_EC{}',
+                          [('internal_bus_location', 'Internal Bus Location', 'char', 1.0),
+                           ('battery_type', 'Battery Type', 'char', 1.0),
+                           ('owner', 'Owner', 'char', 1.0),
+                           ('manager', 'Manager', 'char', 1.0),
+                           ('type_contract', 'Type of Contract', 'char', 1.0),
+                           ('energy_capacity', 'Energy Capacity (kVAh)', 'char', 1.0),
+                           ('energy_min_percentage', 'Energy Min (%)', 'char', 0.01),
+                           ('charge_efficiency', 'Charge Efficiency (%)', 'char', 0.01),
+                           ('discharge_efficiency', 'Discharge Efficiency (%)', 'char', 0.01),
+                           ('initial_state', 'Initial State (%)', 'char', 0.01),
+                           ('p_charge_max', 'P Charge Max (kW)', 'char', 1.0),
+                           ('p_discharge_max', 'P Discharge Max (kW)', 'char', 1.0),
+                           ('capital_cost', 'Capital Cost (m.u.)', 'char', 1.0),
+                           ('p_charge_limit', 'P Charge Limit (kW)', 'ts', 1.0),
+                           ('p_discharge_limit', 'P Discharge Limit (kW)', 'ts', 1.0),
+                           ('charge_price', 'Charge price (m.u)', 'ts', 1.0),
+                           ('discharge_price', 'Discharge price (m.u.)', 'ts', 1.0)]),
+              'charging_station': ('CStation_EC{}',
+                                   [('internal_bus_location', 'Internal Bus Location', 'char', 1.0),
+                                    ('owner', 'Owner', 'char', 1.0),
+                                    ('manager', 'Manager', 'char', 1.0),
+                                    ('type_contract', 'Type of Contract', 'char', 1.0),
+                                    ('p_charge_max', 'P Charge Max (kW)', 'char', 1.0),
+                                    ('p_discharge_max', 'P Discharge Max (kW)', 'char', 1.0),
+                                    ('charge_efficiency', 'Charge Efficiency (%)', 'char', 1.0),
+                                    ('discharge_efficiency', 'Discharge Efficiency (%)', 'char', 1.0),
+                                    ('e_capacity_max', 'E Capacity Max (kWh)', 'char', 1.0),
+                                    ('place_start', 'Place Start', 'char', 1.0),
+                                    ('place_end', 'Place End', 'char', 1.0),
+                                    ('p_charge_limit', 'P Charge Limit (kW)', 'ts', 1.0),
+                                    ('p_discharge_limit', 'P Discharge Limit (kW)', 'ts', 1.0)]),
+              'peers': ('Peers_Info_EC{}',
+                        [('type_peer', 'Type of Peer', 'char', 1.0),
+                         ('type_contract', 'Type of Contract', 'char', 1.0),
+                         ('owner_id', 'Owner ID', 'char', 1.0),
+                         ('p_forecast', 'P Forecast (kW)', 'ts', 1.0),
+                         ('buy_price', 'Buy Price (m.u.)', 'ts', 1.0),
+                         ('sell_price', 'Sell Price (m.u.)', 'ts', 1.0),
+                         ('import_contracted_p_max', 'Import Contracted P Max (p.u)', 'ts', 1.0),
+                         ('export_contracted_p_max', 'Export Contracted P Max', 'ts', 1.0)]),
+              'vehicle': ('Vehicle_EC{}',
+                          [('type_vehicle', 'Type of Vehicle', 'char', 1.0),
+                           ('owner', 'Owner', 'char', 1.0),
+                           ('manager', 'Manager', 'char', 1.0),
+                           ('type_contract', 'Type of Contract', 'char', 1.0),
+                           ('e_capacity_max', 'E Capacity Max (kWh)', 'char', 1.0),
+                           ('p_charge_max', 'P Charge Max (kW)', 'char', 1.0),
+                           ('p_discharge_max', 'P Discharge Max (kW)', 'char', 1.0),
+                           ('charge_efficiency', 'Charge Efficiency (%)', 'char', 1.0),
+                           ('discharge_efficiency', 'Discharge Efficiency (%)', 'char', 1.0),
+                           ('initial_soc_percentage', 'Initial State SOC (%)', 'char', 1.0),
+                           ('min_technical_soc', 'Minimun Technical SOC (%)', 'char', 0.01),
+                           ('capital_cost', 'Capital Cost (m.u.)', 'char', 1.0),
+                           ('arrive_time_period', 'Arrive time period', 'event', 1.0),
+                           ('departure_time_period', 'Departure time period', 'event', 1.0),
+                           ('place', 'Place', 'event', 1.0),
+                           ('used_soc_percentage_arriving', 'Used SOC (%) Arriving', 'event', 1.0),
+                           ('soc_percentage_arriving', 'SOC (%) Arriving', 'event', 0.01),
+                           ('soc_required_exit', 'SOC Required (%) Exit', 'event', 0.01),
+                           ('p_charge_max_contracted', 'Pcharge Max contracted [kW]', 'event', 1.0),
+                           ('p_discharge_max_contracted', 'PDcharge Max contracted [kW]', 'event', 1.0),
+                           ('charge_price', 'Charge Price', 'event', 1.0),
+                           ('discharge_price', 'Disharge Price', 'event', 1.0)])}
+
+    # Battery capital cost (m.u.) per kWh of capacity, see utils/battery/parameter_calculation.py
+    capital_cost_per_kwh = 0.00105
+
+    def __init__(self,
+                 n_gen: int = 10,
+                 n_load: int = 10,
+                 n_stor: int = 3,
+                 n_v2g: int = 5,
+                 n_cs: int = 3,
+                 n_steps: int = 24,
+                 n_events: int = 2,
+                 n_peers: int = 2,
+                 renewable_share: float = 0.5,
+                 seed: int = None):
+        super().__init__(None)
+
+        self.n_gen = n_gen
+        self.n_load = n_load
+        self.n_stor = n_stor
+        self.n_v2g = n_v2g
+        self.n_cs = n_cs
+        self.n_steps = n_steps
+        self.n_events = n_events
+        self.n_peers = n_peers
+        self.renewable_share = renewable_share
+        self.seed = seed
+
+        # Prepare the variables
+        self.generator = None
+        self.load = None
+        self.storage = None
+        self.charging_station = None
+        self.peers = None
+        self.vehicle = None
+
+        return
+
+    def parse(self):
+        rng = np.random.default_rng(self.seed)
+
+        # Hour of the day of each step (the horizon spans one day)
+        hours = np.arange(self.n_steps) * 24.0 / self.n_steps
+
+        self.generator = self._make_generators(rng, hours)
+        self.load = self._make_loads(rng, hours)
+        self.storage = self._make_storage(rng)
+        self.charging_station = self._make_charging_stations(rng)
+        self.peers = self._make_peers(rng, hours)
+        self.vehicle = self._make_vehicles(rng)
+
+        return
+
+    def _make_generators(self, rng, hours):
+        n, t = self.n_gen, self.n_steps
+
+        type_generator = np.where(rng.uniform(size=n) < self.renewable_share, 2.0, 1.0)
+        p_max = np.round(rng.uniform(5.0, 50.0, n), 2)
+
+        # Solar-like profile for renewables, constant availability for the rest
+        solar = np.clip(np.sin(np.pi * (hours - 6.0) / 12.0), 0.0, None)
+        p_forecast = p_max[:, np.newaxis] * solar * rng.uniform(0.7, 1.0, (n, t))
+        p_forecast[type_generator == 1.0, :] = p_max[type_generator == 1.0, np.newaxis]
+
+        renewable = type_generator == 2.0
+        return {'p_forecast': p_forecast,
+                'cost_parameter_a': np.zeros((n, t)),
+                'cost_parameter_b': np.repeat(np.where(renewable, rng.uniform(0.0, 0.05, n),
+                                                       rng.uniform(0.05, 0.15, n))[:, np.newaxis], t, axis=1),
+                'cost_parameter_c': np.zeros((n, t)),
+                'cost_nde': np.repeat(rng.uniform(4.0, 5.0, n)[:, np.newaxis], t, axis=1),
+                'ghg_cof_a': np.zeros((n, t)),
+                'ghg_cof_b': np.repeat(np.where(renewable, 0.0, rng.uniform(0.4, 0.9, n))[:, np.newaxis], t, axis=1),
+                'ghg_cof_c': np.zeros((n, t)),
+                'internal_bus_location': rng.integers(1, 5, n).astype(np.float64),
+                'type_generator': type_generator,
+                'owner': rng.integers(1, 3, n).astype(np.float64),
+                'manager': np.ones(n),
+                'type_contract': rng.integers(1, 3, n).astype(np.float64),
+                'p_max': p_max,
+                'p_min': np.zeros(n),
+                'q_max': np.round(p_max * 0.5, 2),
+                'q_min': np.zeros(n)}
+
+    def _make_loads(self, rng, hours):
+        n, t = self.n_load, self.n_steps
+
+        # Morning and evening peaks
+        profile = 0.4 + 0.4 * np.exp(-(hours - 8.0) ** 2 / 4.0) + 0.6 * np.exp(-(hours - 20.0) ** 2 / 6.0)
+        p_contracted = np.round(rng.uniform(6.9, 45.0, n), 1)
+        p_forecast = p_contracted[:, np.newaxis] * 0.3 * profile * rng.uniform(0.8, 1.2, (n, t))
+        tg_phi = np.full(n, 0.3)
+
+        return {'p_forecast': p_forecast,
+                'q_forecast': p_forecast * tg_phi[:, np.newaxis],
+                'p_reduce': p_forecast * 0.1,
+                'p_move': np.zeros((n, t)),
+                'p_in_move': np.zeros((n, t)),
+                'cost_reduce': np.full((n, t), 0.5),
+                'cost_cut': np.full((n, t), 0.6),
+                'cost_mov': np.zeros((n, t)),
+                'cost_ens': np.full((n, t), 4.5),
+                'internal_bus_location': rng.integers(1, 5, n).astype(np.float64),
+                'charge_type': np.where(rng.uniform(size=n) < 0.2, 'Commercial', 'Domestic 1').astype(object),
+                'owner_id': rng.integers(1, 3, n).astype(np.float64),
+                'manager_id': np.ones(n),
+                'type_contract': np.ones(n),
+                'p_contracted': p_contracted,
+                'tg_phi': tg_phi}
+
+    def _make_storage(self, rng):
+        n, t = self.n_stor, self.n_steps
+
+        energy_capacity = np.round(rng.uniform(10.0, 100.0, n), 0)
+        p_max = np.round(energy_capacity * 0.2, 1)
+        efficiency = np.round(rng.uniform(0.9, 0.97, n), 2)
+
+        return {'p_charge_limit': np.repeat(p_max[:, np.newaxis], t, axis=1),
+                'p_discharge_limit': np.repeat(p_max[:, np.newaxis], t, axis=1),
+                'charge_price': np.zeros((n, t)),
+                'discharge_price': np.full((n, t), 0.4),
+                'internal_bus_location': rng.integers(1, 5, n).astype(np.float64),
+                'battery_type': np.full(n, 'Li-ion', dtype=object),
+                'owner': rng.integers(1, 3, n).astype(np.float64),
+                'manager': np.ones(n),
+                'type_contract': np.ones(n),
+                'energy_capacity': energy_capacity,
+                'energy_min_percentage': np.full(n, 0.2),
+                'charge_efficiency': efficiency,
+                'discharge_efficiency': efficiency.copy(),
+                'initial_state': np.round(rng.uniform(0.5, 0.9, n), 2),
+                'p_charge_max': p_max.copy(),
+                'p_discharge_max': p_max.copy(),
+                'capital_cost': energy_capacity * self.capital_cost_per_kwh}
+
+    def _make_charging_stations(self, rng):
+        n, t = self.n_cs, self.n_steps
+
+        p_max = rng.choice([3.7, 7.2, 11.0, 22.0], n)
+
+        return {'p_charge_limit': np.repeat(p_max[:, np.newaxis], t, axis=1),
+                'p_discharge_limit': np.repeat(p_max[:, np.newaxis], t, axis=1),
+                'internal_bus_location': rng.integers(1, 5, n).astype(np.float64),
+                'owner': np.ones(n),
+                'manager': np.ones(n),
+                'type_contract': np.ones(n),
+                'p_charge_max': p_max,
+                'p_discharge_max': p_max.copy(),
+                'charge_efficiency': np.full(n, 95.0),
+                'discharge_efficiency': np.full(n, 95.0),
+                'e_capacity_max': p_max.copy(),
+                'place_start': np.arange(1.0, n + 1),
+                'place_end': np.arange(1.0, n + 1)}
+
+    def _make_peers(self, rng, hours):
+        n, t = self.n_peers, self.n_steps
+
+        # Time-of-use prices and contracted limits sized to the community
+        buy_price = np.where((hours >= 8.0) & (hours < 22.0), 0.15, 0.06)
+        p_peak = self.load['p_forecast'].sum(axis=0).max() + \
+            self.storage['p_charge_max'].sum() + self.charging_station['p_charge_max'].sum()
+        p_contracted = np.ceil(max(p_peak, 1.0) * 1.2)
+
+        return {'p_forecast': np.zeros((n, t)),
+                'buy_price': np.repeat(buy_price[np.newaxis, :], n, axis=0),
+                'sell_price': np.full((n, t), 0.04),
+                'import_contracted_p_max': np.full((n, t), p_contracted),
+                'export_contracted_p_max': np.full((n, t), p_contracted),
+                'type_peer': np.full(n, 'Community Member', dtype=object),
+                'type_contract': np.ones(n),
+                'owner_id': np.arange(1.0, n + 1)}
+
+    def _make_vehicles(self, rng):
+        n, e = self.n_v2g, self.n_events
+
+        # Non-overlapping events: sorted breakpoints give arrival/departure pairs (1-based periods)
+        breakpoints = np.sort(rng.integers(1, self.n_steps + 1, (n, 2 * e)), axis=1).astype(np.float64)
+        arrive_time_period = breakpoints[:, 0::2]
+        departure_time_period = np.maximum(breakpoints[:, 1::2], arrive_time_period)
+
+        # Each vehicle uses between 1 and n_events events
+        n_used = rng.integers(1, e + 1, n)
+        unused = np.arange(e) >= n_used[:, np.newaxis]
+        arrive_time_period[unused] = np.nan
+        departure_time_period[unused] = np.nan
+
+        place = rng.integers(1, self.n_cs + 1, (n, e)).astype(np.float64)
+        place[unused] = np.nan
+
+        soc_arriving = np.round(rng.uniform(0.2, 0.6, (n, e)), 2)
+        soc_arriving[unused] = np.nan
+        soc_exit = np.round(np.minimum(soc_arriving + rng.uniform(0.1, 0.4, (n, e)), 1.0), 2)
+
+        discharge_price = np.repeat(np.round(rng.uniform(0.04, 0.07, (n, 1)), 2), e, axis=1)
+        discharge_price[unused] = np.nan
+        charge_price = np.where(unused, np.nan, 0.0)
+
+        p_max = rng.choice([7.4, 11.0, 22.0], n)
+
+        vehicle = {'arrive_time_period': arrive_time_period,
+                   'departure_time_period': departure_time_period,
+                   'place': place,
+                   'used_soc_percentage_arriving': np.full((n, e), np.nan),
+                   'soc_percentage_arriving': soc_arriving,
+                   'soc_required_exit': soc_exit,
+                   'p_charge_max_contracted': np.full((n, e), np.nan),
+                   'p_discharge_max_contracted': np.full((n, e), np.nan),
+                   'charge_price': charge_price,
+                   'discharge_price': discharge_price,
+                   'type_vehicle': np.full(n, 'BEV', dtype=object),
+                   'owner': rng.integers(1, 3, n).astype(np.float64),
+                   'manager': np.ones(n),
+                   'type_contract': np.ones(n),
+                   'e_capacity_max': rng.choice([40.0, 60.0, 80.0], n),
+                   'p_charge_max': p_max,
+                   'p_discharge_max': p_max.copy(),
+                   'charge_efficiency': np.full(n, 0.99),
+                   'discharge_efficiency': np.full(n, 0.99),
+                   'initial_soc_percentage': np.full(n, np.nan),
+                   'min_technical_soc': np.full(n, 0.2)}
+
+        vehicle['capital_cost'] = vehicle['e_capacity_max'] * self.capital_cost_per_kwh
+
+        vehicle['schedule'], vehicle['schedule_charge'], vehicle['schedule_discharge'] = \
+            HMParser.build_ev_schedule(arrive_time_period=vehicle['arrive_time_period'],
+                                       departure_time_period=vehicle['departure_time_period'],
+                                       place=vehicle['place'],
+                                       p_charge_max=vehicle['p_charge_max'],
+                                       p_discharge_max=vehicle['p_discharge_max'],
+                                       cs_p_charge_max=self.charging_station['p_charge_max'],
+                                       cs_p_discharge_max=self.charging_station['p_discharge_max'],
+                                       n_steps=self.n_steps)
+
+        return vehicle
+
+    def to_bundle(self, bundle_path: str):
+        """
+        Export the instance in the binary cache format (see HMCache).
+        :param bundle_path: Path to the bundle folder
+        :return: None
+        """
+
+        HMCache.write_bundle(bundle_path,
+                             {section: getattr(self, section) for section in HMCache.sections},
+                             {'source': 'synthetic', 'seed': self.seed})
+
+        return
+
+    @staticmethod
+    def from_bundle(bundle_path: str) -> 'SyntheticParser':
+        """
+        Load an instance exported with to_bundle. Timeseries are memory-mapped.
+        :param bundle_path: Path to the bundle folder
+        :return: Parsed instance
+        """
+
+        data = HMCache.read_bundle(bundle_path)
+
+        parser = SyntheticParser(n_gen=data['generator']['p_max'].shape[0],
+                                 n_load=data['load']['p_contracted'].shape[0],
+                                 n_stor=data['storage']['energy_capacity'].shape[0],
+                                 n_v2g=data['vehicle']['p_charge_max'].shape[0],
+                                 n_cs=data['charging_station']['p_charge_max'].shape[0],
+                                 n_steps=data['generator']['p_forecast'].shape[1],
+                                 n_events=data['vehicle']['arrive_time_period'].shape[1],
+                                 n_peers=data['peers']['owner_id'].shape[0])
+        for section, values in data.items():
+            setattr(parser, section, values)
+
+        return parser
+
+    def to_excel(self, file_path: str, ec_id: int = 1):
+        """
+        Export the instance as a workbook that HMParser can read back.
+        Writing large instances to Excel is slow; prefer to_bundle for scaling tests.
+        :param file_path: Path to the workbook
+        :param ec_id: Energy community ID used in the sheet names
+        :return: None
+        """
+
+        with pd.ExcelWriter(file_path) as writer:
+            for section, (sheet_name, fields) in self.layout.items():
+                self._sheet_values(section, fields).to_excel(writer, sheet_name=sheet_name.format(ec_id),
+                                                            header=False, index=False)
+
+        return
+
+    def _sheet_values(self, section: str, fields: list) -> pd.DataFrame:
+        # One block of rows per unit: characteristics in columns 2-3, time features/events from column 5
+        data = getattr(self, section)
+        chars = [field for field in fields if field[2] == 'char']
+        series = [field for field in fields if field[2] != 'char']
+
+        n_units = data[chars[0][0]].shape[0]
+        n_cols = max(data[field[0]].shape[1] for field in series)
+        block = max(len(chars), len(series)) + 1
+
+        values = np.full((n_units * block, 6 + n_cols), None, dtype=object)
+        values[::block, 0] = np.arange(1, n_units + 1)
+
+        for i, (field, label, kind, scale) in enumerate(chars):
+            values[i::block, 2] = label
+            values[i::block, 3] = self._unscale(data[field], scale)
+
+        for i, (field, label, kind, scale) in enumerate(series):
+            temp_values = self._unscale(data[field], scale)
+            values[i::block, 5] = label
+            values[i::block, 6:6 + temp_values.shape[1]] = temp_values
+
+        return pd.DataFrame(values)
+
+    @staticmethod
+    def _unscale(values: np.ndarray, scale: float) -> np.ndarray:
+        # Undo the scaling HMParser applies when reading (e.g. percentages), keeping text as is
+        if values.dtype == object:
+            return values
+
+        values = values / scale
+
+        return np.where(np.isnan(values), None, values).astype(object)
@@ -1,5 +1,6 @@
 from .base_repair import BaseRepair
 from ..parsers.hm_parser import HMParser
+from ..utils.precision import get_dtype
 import numpy as np
 
 
@@ -8,6 +9,9 @@ class HMRepair(BaseRepair):
     def __init__(self, data):
         self.components = data
 
+        # Floating point precision of the repair buffers
+        self.dtype = get_dtype()
+
         # Set the initial variables to work with
         self.__initial_variables__ = {}
         self.__var_idx__ = []
@@ -21,8 +25,13 @@ class HMRepair(BaseRepair):
 
         self._initialize_values()
 
-        self.storCapCost = [0.05250, 0.10500, 0.01575]
-        self.v2gCapCost = [0.042, 0.063, 0.042, 0.042, 0.063]
+        # Dimensions left out of the search (variable name -> (n_units, n_steps) mask)
+        # The SOC corrections keep them at their fixed value, so the repaired member survives the reduction
+        self.fixed_masks = {}
+
+        # Battery capital costs, one per storage unit and EV
+        self.storCapCost = self.components['stor'].capital_cost
+        self.v2gCapCost = self.components['evs'].capital_cost
 
         super().__init__()
 
@@ -33,27 +42,27 @@ class HMRepair(BaseRepair):
         :return:
         """
 
-        temp_vars = {'genActPower': np.zeros((self.n_gen, self.n_steps)),
-                     'genExcActPower': np.zeros((self.n_gen, self.n_steps)),
-                     'pImp': np.zeros(self.n_steps),
-                     'pExp': np.zeros(self.n_steps),
-                     'loadRedActPower': np.zeros((self.n_load, self.n_steps)),
-                     'loadCutActPower': np.zeros((self.n_load, self.n_steps)),
-                     'loadENS': np.zeros((self.n_load, self.n_steps)),
-                     'storDchActPower': np.zeros((self.n_stor, self.n_steps)),
-                     'storChActPower': np.zeros((self.n_stor, self.n_steps)),
-                     'EminRelaxStor': np.zeros((self.n_stor, self.n_steps)),
-                     'storEnerState': np.zeros((self.n_stor, self.n_steps)),
-                     'v2gDchActPower': np.zeros((self.n_v2g, self.n_steps)),
-                     'v2gChActPower': np.zeros((self.n_v2g, self.n_steps)),
-                     'EminRelaxEV': np.zeros((self.n_v2g, self.n_steps)),
-                     'v2gEnerState': np.zeros((self.n_v2g, self.n_steps)),
-                     'genXo': np.zeros((self.n_gen, self.n_steps)),
-                     'loadXo': np.zeros((self.n_load, self.n_steps)),
-                     'storDchXo': np.zeros((self.n_stor, self.n_steps)),
-                     'storChXo': np.zeros((self.n_stor, self.n_steps)),
-                     'v2gDchXo': np.zeros((self.n_v2g, self.n_steps)),
-                     'v2gChXo': np.zeros((self.n_v2g, self.n_steps))}
+        temp_vars = {'genActPower': np.zeros((self.n_gen, self.n_steps), dtype=self.dtype),
+                     'genExcActPower': np.zeros((self.n_gen, self.n_steps), dtype=self.dtype),
+                     'pImp': np.zeros(self.n_steps, dtype=self.dtype),
+                     'pExp': np.zeros(self.n_steps, dtype=self.dtype),
+                     'loadRedActPower': np.zeros((self.n_load, self.n_steps), dtype=self.dtype),
+                     'loadCutActPower': np.zeros((self.n_load, self.n_steps), dtype=self.dtype),
+                     'loadENS': np.zeros((self.n_load, self.n_steps), dtype=self.dtype),
+                     'storDchActPower': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'storChActPower': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'EminRelaxStor': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'storEnerState': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'v2gDchActPower': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype),
+                     'v2gChActPower': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype),
+                     'EminRelaxEV': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype),
+                     'v2gEnerState': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype),
+                     'genXo': np.zeros((self.n_gen, self.n_steps), dtype=self.dtype),
+                     'loadXo': np.zeros((self.n_load, self.n_steps), dtype=self.dtype),
+                     'storDchXo': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'storChXo': np.zeros((self.n_stor, self.n_steps), dtype=self.dtype),
+                     'v2gDchXo': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype),
+                     'v2gChXo': np.zeros((self.n_v2g, self.n_steps), dtype=self.dtype)}
 
         self.__var_idx__ = [temp_vars[v].ravel().shape[0] for v in temp_vars.keys()]
         self.__var_names__ = list(temp_vars.keys())
@@ -61,70 +70,82 @@ class HMRepair(BaseRepair):
         self.__initial_variables__ = temp_vars
         return
 
+    def _searched(self, name: str, mask: np.ndarray, t: int) -> np.ndarray:
+        """
+        Drop the dimensions left out of the search from a correction mask.
+        :param name: Variable corrected
+        :param mask: Units to correct at time step t
+        :param t: Time step
+        :return: Units to correct that are searched
+        """
+
+        if name not in self.fixed_masks:
+            return mask
+
+        return mask & ~self.fixed_masks[name][:, t]
+
     def check_imports_exports(self, x):
         # Clip the values
-        x['pImp'] = np.clip(x['pImp'], 0, self.components['pimp'].upper_bound)
-        x['pExp'] = np.clip(x['pExp'], 0, self.components['pexp'].upper_bound)
+        np.clip(x['pImp'], 0, self.components['pimp'].upper_bound, out=x['pImp'])
+        np.clip(x['pExp'], 0, self.components['pexp'].upper_bound, out=x['pExp'])
         return
 
     def check_generators(self, x):
         # Clip the values
-        x['genActPower'] = np.clip(x['genActPower'], np.zeros(x['genActPower'].shape),
-                                   self.components['gen'].upper_bound)
+        np.clip(x['genActPower'], 0, self.components['gen'].upper_bound, out=x['genActPower'])
 
         # Set the excess power to 0 and fix from there
-        x['genExcActPower'] = np.zeros(x['genExcActPower'].shape)
+        x['genExcActPower'][...] = 0
 
         # Safeguard for 1 generator
         if self.n_gen == 1:
             # Check type 1 generators
             if self.components['gen'].is_renewable == 1:
-                x['genActPower'] = self.components['gen'].upper_bound * x['genXo']
+                np.multiply(self.components['gen'].upper_bound, x['genXo'], out=x['genActPower'])
             else:
-                x['genExcActPower'] = (self.components['gen'].upper_bound - x['genActPower'])
+                np.subtract(self.components['gen'].upper_bound, x['genActPower'], out=x['genExcActPower'])
 
             return
 
         # Generator types
         # Type 1 (non-renewable)
         mask = self.components['gen'].is_renewable == np.ones(self.components['gen'].is_renewable.shape)
-        x['genActPower'][mask] = (self.components['gen'].upper_bound * x['genXo'])[mask]
+        x['genActPower'][..., mask, :] = (self.components['gen'].upper_bound * x['genXo'])[..., mask, :]
 
         # Type 2 (renewable)
         mask = self.components['gen'].is_renewable == 2 * np.ones(self.components['gen'].is_renewable.shape)
-        x['genExcActPower'][mask] = (self.components['gen'].upper_bound - x['genActPower'])[mask]
+        x['genExcActPower'][..., mask, :] = (self.components['gen'].upper_bound - x['genActPower'])[..., mask, :]
         return
 
     def check_loads(self, x):
         # Assign the binary variable
-        x['loadXo'] = (x['loadXo'] > 0.5).astype(int)
+        np.greater(x['loadXo'], 0.5, out=x['loadXo'])
 
         # Load reduction
-        x['loadRedActPower'] = np.clip(x['loadRedActPower'], 0, self.components['loads'].upper_bound)
+        np.clip(x['loadRedActPower'], 0, self.components['loads'].upper_bound, out=x['loadRedActPower'])
 
         # Load curtailing
-        x['loadCutActPower'] = self.components['loads'].upper_bound * x['loadXo']
+        np.multiply(self.components['loads'].upper_bound, x['loadXo'], out=x['loadCutActPower'])
 
         # Load ENS
-        temp_vals = self.components['loads'].upper_bound - x['loadRedActPower'] - x['loadCutActPower']
-        x['loadENS'] = np.clip(temp_vals, 0, self.components['loads'].upper_bound)
+        np.subtract(self.components['loads'].upper_bound, x['loadRedActPower'], out=x['loadENS'])
+        np.subtract(x['loadENS'], x['loadCutActPower'], out=x['loadENS'])
+        np.clip(x['loadENS'], 0, self.components['loads'].upper_bound, out=x['loadENS'])
         return
 
     def check_storage(self, x):
         # Assign the binary variables
-        x['storDchXo'] = (x['storDchXo'] > 0.5).astype(int)
-        x['storChXo'] = (x['storChXo'] > 0.5).astype(int)
+        np.greater(x['storDchXo'], 0.5, out=x['storDchXo'])
+        np.greater(x['storChXo'], 0.5, out=x['storChXo'])
 
         # Value clipping
-        x['storDchActPower'] = np.clip(x['storDchActPower'], np.zeros(x['storDchActPower'].shape),
-                                       self.components['stor'].discharge_max)
-        x['storChActPower'] = np.clip(x['storChActPower'], np.zeros(x['storChActPower'].shape),
-                                      self.components['stor'].charge_max)
+        np.clip(x['storDchActPower'], 0, self.components['stor'].discharge_max, out=x['storDchActPower'])
+        np.clip(x['storChActPower'], 0, self.components['stor'].charge_max, out=x['storChActPower'])
 
         # Initial state of charge
-        x['storEnerState'][:, 0] = self.components['stor'].capacity_max * self.components['stor'].initial_charge + \
-                                   x['storChActPower'][:, 0] * self.components['stor'].charge_efficiency - \
-                                   x['storDchActPower'][:, 0] / self.components['stor'].discharge_efficiency
+        x['storEnerState'][..., 0] = self.components['stor'].capacity_max * self.components['stor'].initial_charge + \
+                                     x['storChActPower'][..., 0] * self.components['stor'].charge_efficiency - \
+                                     x['storDchActPower'][..., 0] / self.components['stor'].discharge_efficiency
 
         # Initialize the iterator and range (we already did the initial timestep!)
         t: int = 1
@@ -133,125 +154,111 @@ class HMRepair(BaseRepair):
         # Fix the timestep dependencies
         for t in t_range:
             # Check if charging
-            mask = x['storChXo'][:, t] > np.zeros(x['storChXo'][:, t].shape)
-            charged = x['storChActPower'][:, t] * (1 - self.components['stor'].charge_efficiency)
+            mask = x['storChXo'][..., t] > np.zeros(x['storChXo'][..., t].shape, dtype=self.dtype)
+            charged = x['storChActPower'][..., t] * (1 - self.components['stor'].charge_efficiency)
 
             # Prevent over charging
-            secondary_mask = (x['storEnerState'][:, t - 1] + charged) > self.components['stor'].capacity_max
-            x['storChActPower'][:, t][secondary_mask] = \
-                ((self.components['stor'].capacity_max - x['storEnerState'][:, t - 1]) /
+            secondary_mask = (x['storEnerState'][..., t - 1] + charged) > self.components['stor'].capacity_max
+            secondary_mask = self._searched('storChActPower', secondary_mask, t)
+            x['storChActPower'][..., t][secondary_mask] = \
+                ((self.components['stor'].capacity_max - x['storEnerState'][..., t - 1]) /
                  self.components['stor'].charge_efficiency)[secondary_mask]
 
             # Check if discharging
-            mask = x['storDchXo'][:, t] > np.zeros(x['storDchXo'][:, t].shape)
-            discharged = x['storDchActPower'][:, t] / self.components['stor'].discharge_efficiency
-            secondary_mask = (x['storEnerState'][:, t - 1] - discharged) < 0
-            x['storDchActPower'][:, t][secondary_mask] = (x['storEnerState'][:, t - 1] *
-                                                          self.components['stor'].discharge_efficiency)[secondary_mask]
+            mask = x['storDchXo'][..., t] > np.zeros(x['storDchXo'][..., t].shape, dtype=self.dtype)
+            discharged = x['storDchActPower'][..., t] / self.components['stor'].discharge_efficiency
+            secondary_mask = (x['storEnerState'][..., t - 1] - discharged) < 0
+            secondary_mask = self._searched('storDchActPower', secondary_mask, t)
+            x['storDchActPower'][..., t][secondary_mask] = (x['storEnerState'][..., t - 1] *
+                                                            self.components['stor'].discharge_efficiency)[secondary_mask]
 
             # Update the energy state
-            x['storChActPower'][:, t] *= x['storChXo'][:, t]
-            x['storDchActPower'][:, t] *= x['storDchXo'][:, t]
+            x['storChActPower'][..., t] *= x['storChXo'][..., t]
+            x['storDchActPower'][..., t] *= x['storDchXo'][..., t]
 
-            x['storEnerState'][:, t] = x['storEnerState'][:, t - 1] + x['storChActPower'][:, t] * \
-                                       self.components['stor'].charge_efficiency - \
-                                       x['storDchActPower'][:, t] / self.components['stor'].discharge_efficiency
+            x['storEnerState'][..., t] = x['storEnerState'][..., t - 1] + x['storChActPower'][..., t] * \
+                                         self.components['stor'].charge_efficiency - \
+                                         x['storDchActPower'][..., t] / self.components['stor'].discharge_efficiency
 
             # Check minimum energy state
-            mask = x['storEnerState'][:, t] < self.components['stor'].capacity_max * \
-                   self.components['stor'].capacity_min - x['EminRelaxStor'][:, t]
-            x['storEnerState'][:, t][mask] = self.components['stor'].capacity_max[mask] * \
-                                             self.components['stor'].capacity_min[mask] - \
-                                             x['EminRelaxStor'][:, t][mask]
+            mask = x['storEnerState'][..., t] < self.components['stor'].capacity_max * \
+                   self.components['stor'].capacity_min - x['EminRelaxStor'][..., t]
+            x['storEnerState'][..., t][mask] = (self.components['stor'].capacity_max *
+                                                self.components['stor'].capacity_min -
+                                                x['EminRelaxStor'][..., t])[mask]
 
         return
 
     def check_v2g(self, x):
 
         # Placeholders for the energy state and relaxation variable
-        x['v2gEnerState'] = np.zeros(x['v2gEnerState'].shape)
-        x['EminRelaxEV'] = np.zeros(x['EminRelaxEV'].shape)
+        x['v2gEnerState'][...] = 0
+        x['EminRelaxEV'][...] = 0
 
         # Bound binaries
-        x['v2gDchXo'] = (x['v2gDchXo'] > 0.5).astype(int)
-        x['v2gChXo'] = (x['v2gChXo'] > 0.5).astype(int)
+        np.greater(x['v2gDchXo'], 0.5, out=x['v2gDchXo'])
+        np.greater(x['v2gChXo'], 0.5, out=x['v2gChXo'])
 
         # Preallocate range
         t_range = range(1, self.n_steps)
 
         # Clip the values of discharging and charging to the maximum allowed
-        x['v2gDchActPower'] = np.clip(x['v2gDchActPower'], 0, self.components['evs'].schedule_discharge)
-        x['v2gChActPower'] = np.clip(x['v2gChActPower'], 0, self.components['evs'].schedule_charge)
+        np.clip(x['v2gDchActPower'], 0, self.components['evs'].schedule_discharge, out=x['v2gDchActPower'])
+        np.clip(x['v2gChActPower'], 0, self.components['evs'].schedule_charge, out=x['v2gChActPower'])
 
         # Set initial EV state
-        x['v2gEnerState'][:, 0] = self.components['evs'].capacity_max * 0.8
+        x['v2gEnerState'][..., 0] = self.components['evs'].capacity_max * 0.8
 
         # Fix the timestep dependencies
         for t in t_range:
             # Check if charging
-            mask = x['v2gChXo'][:, t] > np.zeros(x['v2gChXo'][:, t].shape)
-            charged = x['v2gChActPower'][:, t] * (1 - self.components['evs'].charge_efficiency)
+            mask = x['v2gChXo'][..., t] > np.zeros(x['v2gChXo'][..., t].shape, dtype=self.dtype)
+            charged = x['v2gChActPower'][..., t] * (1 - self.components['evs'].charge_efficiency)
 
             # Prevent over charging
-            secondary_mask = (x['v2gEnerState'][:, t - 1] + charged) > self.components['evs'].capacity_max
-            x['v2gChActPower'][:, t][secondary_mask] = ((self.components['evs'].capacity_max - \
-                                                         x['v2gEnerState'][:, t - 1]) / \
-                                                        (self.components['evs'].charge_efficiency))[secondary_mask]
+            secondary_mask = (x['v2gEnerState'][..., t - 1] + charged) > self.components['evs'].capacity_max
+            secondary_mask = self._searched('v2gChActPower', secondary_mask, t)
+            x['v2gChActPower'][..., t][secondary_mask] = ((self.components['evs'].capacity_max - \
+                                                           x['v2gEnerState'][..., t - 1]) / \
+                                                          (self.components['evs'].charge_efficiency))[secondary_mask]
 
             # Check if discharging
-            mask = x['v2gDchXo'][:, t] > np.zeros(x['v2gDchXo'][:, t].shape)
-            discharged = x['v2gDchActPower'][:, t] / self.components['evs'].discharge_efficiency
-            secondary_mask = (x['v2gEnerState'][:, t - 1] - discharged) < 0
-            x['v2gDchActPower'][:, t][secondary_mask] = (x['v2gEnerState'][:, t - 1] *
-                                                         self.components['evs'].discharge_efficiency)[
+            mask = x['v2gDchXo'][..., t] > np.zeros(x['v2gDchXo'][..., t].shape, dtype=self.dtype)
+            discharged = x['v2gDchActPower'][..., t] / self.components['evs'].discharge_efficiency
+            secondary_mask = (x['v2gEnerState'][..., t - 1] - discharged) < 0
+            secondary_mask = self._searched('v2gDchActPower', secondary_mask, t)
+            x['v2gDchActPower'][..., t][secondary_mask] = (x['v2gEnerState'][..., t - 1] *
+                                                           self.components['evs'].discharge_efficiency)[
                 secondary_mask]
 
             # Update the energy state
-            x['v2gChActPower'][:, t] *= x['v2gChXo'][:, t]
-            x['v2gDchActPower'][:, t] *= x['v2gDchXo'][:, t]
+            x['v2gChActPower'][..., t] *= x['v2gChXo'][..., t]
+            x['v2gDchActPower'][..., t] *= x['v2gDchXo'][..., t]
 
-            x['v2gEnerState'][:, t] = x['v2gEnerState'][:, t - 1] + x['v2gChActPower'][:, t] * \
-                                      self.components['evs'].charge_efficiency - \
-                                      x['v2gDchActPower'][:, t] / self.components['evs'].discharge_efficiency
+            x['v2gEnerState'][..., t] = x['v2gEnerState'][..., t - 1] + x['v2gChActPower'][..., t] * \
+                                        self.components['evs'].charge_efficiency - \
+                                        x['v2gDchActPower'][..., t] / self.components['evs'].discharge_efficiency
 
             # Check minimum energy state
-            mask = x['v2gEnerState'][:, t] < self.components['evs'].capacity_max * \
+            mask = x['v2gEnerState'][..., t] < self.components['evs'].capacity_max * \
                    self.components['evs'].min_charge - \
-                   x['EminRelaxEV'][:, t]
-            x['v2gEnerState'][:, t][mask] = self.components['evs'].capacity_max[mask] * \
-                                            self.components['evs'].min_charge[mask] - \
-                                            x['EminRelaxEV'][:, t][mask]
+                   x['EminRelaxEV'][..., t]
+            x['v2gEnerState'][..., t][mask] = (self.components['evs'].capacity_max *
+                                               self.components['evs'].min_charge -
+                                               x['EminRelaxEV'][..., t])[mask]
 
     def check_balance(self, x):
 
-        # Create the iterators and ranges
-        t_range = range(self.n_steps)
+        # Net injection of each resource kind per step, reduced over the units
+        balance_gens = np.sum(x['genActPower'] - x['genExcActPower'], axis=-2)
 
-        g_range = range(self.n_gen)
-        balance_gens = np.zeros(self.n_steps)
+        balance_loads = np.sum(x['loadRedActPower'] + x['loadCutActPower'] + x['loadENS'] +
+                               -self.components['loads'].upper_bound, axis=-2)
 
-        l_range = range(self.n_load)
-        balance_loads = np.zeros(self.n_steps)
+        balance_stor = np.sum(x['storDchActPower'] - x['storChActPower'], axis=-2)
 
-        s_range = range(self.n_stor)
-        balance_stor = np.zeros(self.n_steps)
-
-        v_range = range(self.n_v2g)
-        balance_cs = np.zeros(self.n_steps)  # note: balance of the EVs is made through the charging station
-
-        # Calculate the values over time
-        for t in t_range:
-            balance_gens[t] = np.sum([x['genActPower'][g, t] - x['genExcActPower'][g, t] for g in g_range])
-
-            balance_loads[t] = np.sum([x['loadRedActPower'][l, t] + \
-                                       x['loadCutActPower'][l, t] + \
-                                       x['loadENS'][l, t] + \
-                                       -self.components['loads'].upper_bound[l, t]
-                                       for l in l_range])
-
-            balance_stor[t] = np.sum([x['storDchActPower'][s, t] - x['storChActPower'][s, t] for s in s_range])
-
-            balance_cs[t] = np.sum([x['v2gDchActPower'][v, t] - x['v2gChActPower'][v, t] for v in v_range])
+        # note: balance of the EVs is made through the charging station
+        balance_cs = np.sum(x['v2gDchActPower'] - x['v2gChActPower'], axis=-2)
 
         balance_rest = balance_gens + balance_loads + balance_stor + balance_cs
 
@@ -269,6 +276,9 @@ class HMRepair(BaseRepair):
     def repair(self, x: dict) -> dict:
         """
         Repair a single element
+        The checks index the unit and time axes from the end, so a stacked population is repaired the same way
+        (see repair_population)
+        The checks write in place on the arrays of x (e.g. views of an encoded member), so nothing is copied back
         :param x: Member to repair
         :return: Repaired solution
         """
@@ -291,3 +301,14 @@ class HMRepair(BaseRepair):
         self.check_balance(x)
 
         return x
+
+    def repair_population(self, x: dict) -> dict:
+        """
+        Repair a whole population in one call.
+        Clipping, thresholds and the balance broadcast over the population, and the storage and V2G recursions only
+        loop over the time steps. The result matches repairing each member bit for bit.
+        :param x: Population to repair, (pop_size, n_units, n_steps) per variable ((pop_size, n_steps) for pImp and pExp)
+        :return: Repaired population
+        """
+
+        return self.repair(x)
@@ -23,8 +23,13 @@ class HMRepairPymoo(Repair):
 
         self._initialize_values()
 
-        self.storCapCost = [0.05250, 0.10500, 0.01575]
-        self.v2gCapCost = [0.042, 0.063, 0.042, 0.042, 0.063]
+        # Dimensions left out of the search (variable name -> (n_units, n_steps) mask)
+        # The SOC corrections keep them at their fixed value, so the repaired member survives the reduction
+        self.fixed_masks = {}
+
+        # Battery capital costs, one per storage unit and EV
+        self.storCapCost = data.storage['capital_cost']
+        self.v2gCapCost = data.vehicle['capital_cost']
 
         super().__init__()
 
@@ -58,6 +63,20 @@ class HMRepairPymoo(Repair):
         self.__initial_variables__ = temp_vars
         return
 
+    def _searched(self, name: str, mask: np.ndarray, t: int) -> np.ndarray:
+        """
+        Drop the dimensions left out of the search from a correction mask.
+        :param name: Variable corrected
+        :param mask: Units to correct at time step t
+        :param t: Time step
+        :return: Units to correct that are searched
+        """
+
+        if name not in self.fixed_masks:
+            return mask
+
+        return mask & ~self.fixed_masks[name][:, t]
+
     def check_imports_exports(self, x):
         # Clip the values
         x['pImp'] = np.clip(x['pImp'], 0, self.components.peers['import_contracted_p_max'][0, :])
@@ -67,8 +86,7 @@ class HMRepairPymoo(Repair):
     def check_generators(self, x):
         # Clip the values
         x['genActPower'] = np.clip(x['genActPower'], np.zeros(x['genActPower'].shape),
-                                   (np.ones(x['genActPower'].shape).transpose() * self.components.generator[
-                                       'p_max']).transpose())
+                                   np.ones(x['genActPower'].shape) * self.components.generator['p_max'][:, None])
 
         # Set the excess power to 0 and fix from there
         x['genExcActPower'] = np.zeros(x['genExcActPower'].shape)
@@ -76,11 +94,11 @@ class HMRepairPymoo(Repair):
         # Generator types
         # Type 1 (non-renewable)
         mask = self.components.generator['type_generator'] == np.ones(self.components.generator['type_generator'].shape)
-        x['genActPower'][mask] = (self.components.generator['p_forecast'] * x['genXo'])[mask]
+        x['genActPower'][..., mask, :] = (self.components.generator['p_forecast'] * x['genXo'])[..., mask, :]
 
         # Type 2 (renewable)
         mask = self.components.generator['type_generator'] == 2 * np.ones(self.components.generator['type_generator'].shape)
-        x['genExcActPower'][mask] = (self.components.generator['p_forecast'] - x['genActPower'])[mask]
+        x['genExcActPower'][..., mask, :] = (self.components.generator['p_forecast'] - x['genActPower'])[..., mask, :]
         return
 
     def check_loads(self, x):
@@ -105,16 +123,17 @@ class HMRepairPymoo(Repair):
 
         # Value clipping
         x['storDchActPower'] = np.clip(x['storDchActPower'], np.zeros(x['storDchActPower'].shape),
-                                       (np.ones(x['storDchActPower'].shape).transpose() * \
-                                        self.components.storage['p_discharge_max']).transpose())
+                                       np.ones(x['storDchActPower'].shape) *
+                                       self.components.storage['p_discharge_max'][:, None])
         x['storChActPower'] = np.clip(x['storChActPower'], np.zeros(x['storChActPower'].shape),
-                                      (np.ones(x['storChActPower'].shape).transpose() * self.components.storage[
-                                          'p_charge_max']).transpose())
+                                      np.ones(x['storChActPower'].shape) *
+                                      self.components.storage['p_charge_max'][:, None])
 
         # Initial state of charge
-        x['storEnerState'][:, 0] = self.components.storage['energy_capacity'] * (self.components.storage['initial_state']) + \
-                                   x['storChActPower'][:, 0] * self.components.storage['charge_efficiency'] - \
-                                   x['storDchActPower'][:, 0] / self.components.storage['discharge_efficiency']
+        x['storEnerState'][..., 0] = self.components.storage['energy_capacity'] * \
+                                     (self.components.storage['initial_state']) + \
+                                     x['storChActPower'][..., 0] * self.components.storage['charge_efficiency'] - \
+                                     x['storDchActPower'][..., 0] / self.components.storage['discharge_efficiency']
 
         # Initialize the iterator and range (we already did the initial timestep!)
         t: int = 1
@@ -123,37 +142,39 @@ class HMRepairPymoo(Repair):
         # Fix the timestep dependencies
         for t in t_range:
             # Check if charging
-            mask = x['storChXo'][:, t] > np.zeros(x['storChXo'][:, t].shape)
-            charged = x['storChActPower'][:, t] * (1 - self.components.storage['charge_efficiency'])
+            mask = x['storChXo'][..., t] > np.zeros(x['storChXo'][..., t].shape)
+            charged = x['storChActPower'][..., t] * (1 - self.components.storage['charge_efficiency'])
 
             # Prevent over charging
-            secondary_mask = (x['storEnerState'][:, t - 1] + charged) > self.components.storage['energy_capacity']
-            x['storChActPower'][:, t][secondary_mask] = \
-            ((self.components.storage['energy_capacity'] - x['storEnerState'][:, t - 1]) / \
+            secondary_mask = (x['storEnerState'][..., t - 1] + charged) > self.components.storage['energy_capacity']
+            secondary_mask = self._searched('storChActPower', secondary_mask, t)
+            x['storChActPower'][..., t][secondary_mask] = \
+            ((self.components.storage['energy_capacity'] - x['storEnerState'][..., t - 1]) / \
              (self.components.storage['charge_efficiency']))[secondary_mask]
 
             # Check if discharging
-            mask = x['storDchXo'][:, t] > np.zeros(x['storDchXo'][:, t].shape)
-            discharged = x['storDchActPower'][:, t] / self.components.storage['discharge_efficiency']
-            secondary_mask = (x['storEnerState'][:, t - 1] - discharged) < 0
-            x['storDchActPower'][:, t][secondary_mask] = (x['storEnerState'][:, t - 1] * \
-                                                          self.components.storage['discharge_efficiency'])[secondary_mask]
+            mask = x['storDchXo'][..., t] > np.zeros(x['storDchXo'][..., t].shape)
+            discharged = x['storDchActPower'][..., t] / self.components.storage['discharge_efficiency']
+            secondary_mask = (x['storEnerState'][..., t - 1] - discharged) < 0
+            secondary_mask = self._searched('storDchActPower', secondary_mask, t)
+            x['storDchActPower'][..., t][secondary_mask] = (x['storEnerState'][..., t - 1] * \
+                                                            self.components.storage['discharge_efficiency'])[secondary_mask]
 
             # Update the energy state
-            x['storChActPower'][:, t] *= x['storChXo'][:, t]
-            x['storDchActPower'][:, t] *= x['storDchXo'][:, t]
+            x['storChActPower'][..., t] *= x['storChXo'][..., t]
+            x['storDchActPower'][..., t] *= x['storDchXo'][..., t]
 
-            x['storEnerState'][:, t] = x['storEnerState'][:, t - 1] + x['storChActPower'][:, t] * self.components.storage[
-                'charge_efficiency'] - \
-                                       x['storDchActPower'][:, t] / self.components.storage['discharge_efficiency']
+            x['storEnerState'][..., t] = x['storEnerState'][..., t - 1] + x['storChActPower'][..., t] * \
+                                         self.components.storage['charge_efficiency'] - \
+                                         x['storDchActPower'][..., t] / self.components.storage['discharge_efficiency']
 
             # Check minimum energy state
-            mask = x['storEnerState'][:, t] < self.components.storage['energy_capacity'] * self.components.storage[
+            mask = x['storEnerState'][..., t] < self.components.storage['energy_capacity'] * self.components.storage[
                 'energy_min_percentage'] - \
-                   x['EminRelaxStor'][:, t]
-            x['storEnerState'][:, t][mask] = self.components.storage['energy_capacity'][mask] * \
-                                             self.components.storage['energy_min_percentage'][mask] - \
-                                             x['EminRelaxStor'][:, t][mask]
+                   x['EminRelaxStor'][..., t]
+            x['storEnerState'][..., t][mask] = (self.components.storage['energy_capacity'] *
+                                                self.components.storage['energy_min_percentage'] -
+                                                x['EminRelaxStor'][..., t])[mask]
 
         return
 
@@ -175,73 +196,57 @@ class HMRepairPymoo(Repair):
         x['v2gChActPower'] = np.clip(x['v2gChActPower'], 0, self.components.vehicle['schedule_charge'])
 
         # Set initial EV state
-        x['v2gEnerState'][:, 0] = self.components.vehicle['e_capacity_max'] * 0.8
+        x['v2gEnerState'][..., 0] = self.components.vehicle['e_capacity_max'] * 0.8
 
         # Fix the timestep dependencies
         for t in t_range:
             # Check if charging
-            mask = x['v2gChXo'][:, t] > np.zeros(x['v2gChXo'][:, t].shape)
-            charged = x['v2gChActPower'][:, t] * (1 - self.components.vehicle['charge_efficiency'])
+            mask = x['v2gChXo'][..., t] > np.zeros(x['v2gChXo'][..., t].shape)
+            charged = x['v2gChActPower'][..., t] * (1 - self.components.vehicle['charge_efficiency'])
 
             # Prevent over charging
-            secondary_mask = (x['v2gEnerState'][:, t - 1] + charged) > self.components.vehicle['e_capacity_max']
-            x['v2gChActPower'][:, t][secondary_mask] = ((self.components.vehicle['e_capacity_max'] - \
-                                                         x['v2gEnerState'][:, t - 1]) / \
-                                                        (self.components.vehicle['charge_efficiency']))[secondary_mask]
+            secondary_mask = (x['v2gEnerState'][..., t - 1] + charged) > self.components.vehicle['e_capacity_max']
+            secondary_mask = self._searched('v2gChActPower', secondary_mask, t)
+            x['v2gChActPower'][..., t][secondary_mask] = ((self.components.vehicle['e_capacity_max'] - \
+                                                           x['v2gEnerState'][..., t - 1]) / \
+                                                          (self.components.vehicle['charge_efficiency']))[secondary_mask]
 
             # Check if discharging
-            mask = x['v2gDchXo'][:, t] > np.zeros(x['v2gDchXo'][:, t].shape)
-            discharged = x['v2gDchActPower'][:, t] / self.components.vehicle['discharge_efficiency']
-            secondary_mask = (x['v2gEnerState'][:, t - 1] - discharged) < 0
-            x['v2gDchActPower'][:, t][secondary_mask] = (x['v2gEnerState'][:, t - 1] * \
-                                                         self.components.vehicle['discharge_efficiency'])[secondary_mask]
+            mask = x['v2gDchXo'][..., t] > np.zeros(x['v2gDchXo'][..., t].shape)
+            discharged = x['v2gDchActPower'][..., t] / self.components.vehicle['discharge_efficiency']
+            secondary_mask = (x['v2gEnerState'][..., t - 1] - discharged) < 0
+            secondary_mask = self._searched('v2gDchActPower', secondary_mask, t)
+            x['v2gDchActPower'][..., t][secondary_mask] = (x['v2gEnerState'][..., t - 1] * \
+                                                           self.components.vehicle['discharge_efficiency'])[secondary_mask]
 
             # Update the energy state
-            x['v2gChActPower'][:, t] *= x['v2gChXo'][:, t]
-            x['v2gDchActPower'][:, t] *= x['v2gDchXo'][:, t]
+            x['v2gChActPower'][..., t] *= x['v2gChXo'][..., t]
+            x['v2gDchActPower'][..., t] *= x['v2gDchXo'][..., t]
 
-            x['v2gEnerState'][:, t] = x['v2gEnerState'][:, t - 1] + x['v2gChActPower'][:, t] * \
-                                      self.components.vehicle['charge_efficiency'] - \
-                                      x['v2gDchActPower'][:, t] / self.components.vehicle['discharge_efficiency']
+            x['v2gEnerState'][..., t] = x['v2gEnerState'][..., t - 1] + x['v2gChActPower'][..., t] * \
+                                        self.components.vehicle['charge_efficiency'] - \
+                                        x['v2gDchActPower'][..., t] / self.components.vehicle['discharge_efficiency']
 
             # Check minimum energy state
-            mask = x['v2gEnerState'][:, t] < self.components.vehicle['e_capacity_max'] * \
+            mask = x['v2gEnerState'][..., t] < self.components.vehicle['e_capacity_max'] * \
                    self.components.vehicle['min_technical_soc'] - \
-                   x['EminRelaxEV'][:, t]
-            x['v2gEnerState'][:, t][mask] = self.components.vehicle['e_capacity_max'][mask] * \
-                                            self.components.vehicle['min_technical_soc'][mask] - \
-                                            x['EminRelaxEV'][:, t][mask]
+                   x['EminRelaxEV'][..., t]
+            x['v2gEnerState'][..., t][mask] = (self.components.vehicle['e_capacity_max'] *
+                                               self.components.vehicle['min_technical_soc'] -
+                                               x['EminRelaxEV'][..., t])[mask]
 
     def check_balance(self, x):
 
-        # Create the iterators and ranges
-        t_range = range(self.n_steps)
-
-        g_range = range(self.n_gen)
-        balance_gens = np.zeros(self.n_steps)
-
-        l_range = range(self.n_load)
-        balance_loads = np.zeros(self.n_steps)
-
-        s_range = range(self.n_stor)
-        balance_stor = np.zeros(self.n_steps)
+        # Net injection of each resource kind per step, reduced over the units
+        balance_gens = np.sum(x['genActPower'] - x['genExcActPower'], axis=-2)
 
-        v_range = range(self.n_v2g)
-        balance_cs = np.zeros(self.n_steps)  # note: balance of the EVs is made through the charging station
+        balance_loads = np.sum(x['loadRedActPower'] + x['loadCutActPower'] + x['loadENS'] +
+                               -self.components.load['p_forecast'], axis=-2)
 
-        # Calculate the values over time
-        for t in t_range:
-            balance_gens[t] = np.sum([x['genActPower'][g, t] - x['genExcActPower'][g, t] for g in g_range])
-
-            balance_loads[t] = np.sum([x['loadRedActPower'][l, t] + \
-                                       x['loadCutActPower'][l, t] + \
-                                       x['loadENS'][l, t] + \
-                                       -self.components.load['p_forecast'][l, t]
-                                       for l in l_range])
+        balance_stor = np.sum(x['storDchActPower'] - x['storChActPower'], axis=-2)
 
-            balance_stor[t] = np.sum([x['storDchActPower'][s, t] - x['storChActPower'][s, t] for s in s_range])
-
-            balance_cs[t] = np.sum([x['v2gDchActPower'][v, t] - x['v2gChActPower'][v, t] for v in v_range])
+        # note: balance of the EVs is made through the charging station
+        balance_cs = np.sum(x['v2gDchActPower'] - x['v2gChActPower'], axis=-2)
 
         balance_rest = balance_gens + balance_loads + balance_stor + balance_cs
 
@@ -257,18 +262,28 @@ class HMRepairPymoo(Repair):
         return
 
     def _do(self, problem, Z, **kwargs):
-        for z in np.arange(len(Z)):
-            temp_z = self.decode(Z[z])
-            self.check_imports_exports(temp_z)
-            self.check_generators(temp_z)
-            self.check_loads(temp_z)
-            self.check_storage(temp_z)
-            self.check_v2g(temp_z)
+        # Work on full solutions when the problem eliminated fixed dimensions
+        reduced = getattr(problem, 'free_idx', None) is not None
+        if reduced:
+            Z = problem.expand(Z)
+
+        # Keep the fixed dimensions at their value, since the reduction drops them
+        self.fixed_masks = problem.fixed_masks if reduced else {}
 
-            self.check_balance(temp_z)
+        # Repair the whole population at once (the checks broadcast over the leading population axis)
+        temp_z = self.decode_population(Z)
+        self.check_imports_exports(temp_z)
+        self.check_generators(temp_z)
+        self.check_loads(temp_z)
+        self.check_storage(temp_z)
+        self.check_v2g(temp_z)
 
-            temp_z = self.encode(temp_z)
-            Z[z] = temp_z
+        self.check_balance(temp_z)
+
+        Z = self.encode_population(temp_z)
+
+        if reduced:
+            Z = problem.reduce(Z)
 
         return Z
 
@@ -290,3 +305,22 @@ class HMRepairPymoo(Repair):
             current_index = result_index
 
         return result_decoded
+
+    @staticmethod
+    def encode_population(x):
+        result_encoded = np.concatenate([x[idx].reshape(x[idx].shape[0], -1) for idx in x.keys()], axis=1)
+        return result_encoded
+
+    def decode_population(self, x):
+        result_decoded = {}
+        current_index = 0
+
+        for idx in range(len(self.__var_names__)):
+            result_index = current_index + self.__var_idx__[idx]
+            result_decoded[self.__var_names__[idx]] = np.reshape(x[:, current_index:result_index],
+                                                                 (x.shape[0],) + self.__initial_variables__[
+                                                                     self.__var_names__[idx]].shape)
+
+            current_index = result_index
+
+        return result_decoded
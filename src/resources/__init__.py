@@ -3,6 +3,7 @@
 # Path: src\resources\__init__.py
 # Add the resources package to __init__.py
 from .base_resource import BaseResource
+from .resource_fleet import ResourceFleet
 from .generator import Generator, GeneratorProbabilistic
 from .storage import Storage
 from .load import Load, LoadProbabilistic
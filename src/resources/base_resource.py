@@ -6,9 +6,12 @@
 #   - lb: np.array
 #   - ub: np.array
 #   - cost: np.array
+# Arrays can be bound as views onto an encoded solution (bind) and updated in place (+=, write)
 
 import numpy as np
 
+from src.utils.precision import as_dtype
+
 
 class BaseResource:
     """
@@ -28,10 +31,10 @@ class BaseResource:
                  upper_bound: np.array,
                  cost: np.array):
         self.name = name
-        self.value = value
-        self.lower_bound = lower_bound
-        self.upper_bound = upper_bound
-        self.cost = cost
+        self.value = as_dtype(value)
+        self.lower_bound = as_dtype(lower_bound)
+        self.upper_bound = as_dtype(upper_bound)
+        self.cost = as_dtype(cost)
 
     def __repr__(self):
         return f'{self.name}'
@@ -75,6 +78,67 @@ class BaseResource:
     def __pow__(self, other):
         return self.value ** other.value
 
+    # In-place variants: write into the current value (e.g. a view of a genome) without allocating
+    def __iadd__(self, other):
+        np.add(self.value, self._operand(other), out=self.value)
+        return self
+
+    def __isub__(self, other):
+        np.subtract(self.value, self._operand(other), out=self.value)
+        return self
+
+    def __imul__(self, other):
+        np.multiply(self.value, self._operand(other), out=self.value)
+        return self
+
+    def __itruediv__(self, other):
+        np.divide(self.value, self._operand(other), out=self.value)
+        return self
+
+    def __ipow__(self, other):
+        np.power(self.value, self._operand(other), out=self.value)
+        return self
+
+    @staticmethod
+    def _operand(other):
+        return other.value if isinstance(other, BaseResource) else other
+
+    def bind(self, genome: np.ndarray, offset: int = 0, field: str = 'value') -> int:
+        """
+        Bind an array of the resource to a slice of an encoded solution, without copying.
+        The field keeps its shape; afterwards reading or writing the field reads or writes the genome.
+        :param genome: 1-D encoded solution
+        :param offset: Position of the first element of the field in the genome
+        :param field: Name of the array attribute to bind (e.g. 'value', 'charge', 'discharge')
+        :return: Position right after the bound slice, to bind the next field
+        """
+
+        shape = np.shape(getattr(self, field))
+        end = offset + int(np.prod(shape))
+        if end > genome.shape[0]:
+            raise ValueError('Genome too short to bind {}.{}: needs {} elements from offset {}'.format(
+                self.name, field, end - offset, offset))
+
+        view = genome[offset:end].reshape(shape)
+        if not np.shares_memory(view, genome):
+            raise ValueError('Cannot bind {}.{} as a view of the genome'.format(self.name, field))
+
+        setattr(self, field, view)
+
+        return end
+
+    def write(self, values, field: str = 'value'):
+        """
+        Copy values into an array of the resource in place (and so into the genome it is bound to).
+        :param values: Values to write, broadcastable to the field shape
+        :param field: Name of the array attribute to write
+        :return: None
+        """
+
+        np.copyto(getattr(self, field), self._operand(values))
+
+        return
+
     def ravel(self):
         return self.value.ravel()
 
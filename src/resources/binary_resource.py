@@ -3,6 +3,7 @@
 import numpy as np
 
 from src.resources.base_resource import BaseResource
+from src.utils.precision import as_dtype
 
 
 class BinaryResource(BaseResource):
@@ -16,4 +17,4 @@ class BinaryResource(BaseResource):
                  is_active: np.array):
         super().__init__(name, value, lower_bound, upper_bound, cost)
 
-        self.is_active = is_active
+        self.is_active = as_dtype(is_active)
@@ -3,6 +3,7 @@
 import numpy as np
 
 from src.resources.base_resource import BaseResource
+from src.utils.precision import as_dtype, get_dtype
 
 
 class Generator(BaseResource):
@@ -16,11 +17,11 @@ class Generator(BaseResource):
                  is_renewable: np.array):
         super().__init__(name, value, lower_bound, upper_bound, cost)
 
-        self.is_renewable = is_renewable
-        self.is_active = np.zeros(self.value.shape)
+        self.is_renewable = as_dtype(is_renewable)
+        self.is_active = np.zeros(self.value.shape, dtype=get_dtype())
 
-        self.gen_nde = np.zeros(self.value.shape)
-        self.cost_nde = cost_nde
+        self.gen_nde = np.zeros(self.value.shape, dtype=get_dtype())
+        self.cost_nde = as_dtype(cost_nde)
 
 
 class GeneratorProbabilistic(Generator):
@@ -3,6 +3,7 @@
 import numpy as np
 
 from src.resources.base_resource import BaseResource
+from src.utils.precision import as_dtype, get_dtype
 
 
 class Load(BaseResource):
@@ -18,15 +19,15 @@ class Load(BaseResource):
                  cost_ens: np.array):
         super().__init__(name, value, lower_bound, upper_bound, cost)
 
-        self.cost_reduce = cost_reduce
-        self.cost_cut = cost_cut
-        self.cost_ens = cost_ens
+        self.cost_reduce = as_dtype(cost_reduce)
+        self.cost_cut = as_dtype(cost_cut)
+        self.cost_ens = as_dtype(cost_ens)
 
-        self.is_active = np.zeros(self.value.shape)
+        self.is_active = np.zeros(self.value.shape, dtype=get_dtype())
 
-        self.load_cut = np.zeros(self.value.shape)
-        self.load_reduce = np.zeros(self.value.shape)
-        self.load_ens = np.zeros(self.value.shape)
+        self.load_cut = np.zeros(self.value.shape, dtype=get_dtype())
+        self.load_reduce = np.zeros(self.value.shape, dtype=get_dtype())
+        self.load_ens = np.zeros(self.value.shape, dtype=get_dtype())
 
 
 class LoadProbabilistic(Load):
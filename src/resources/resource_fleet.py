@@ -0,0 +1,135 @@
+# Struct-of-arrays container for all units of a resource kind
+# Has the following properties:
+#   - name: str
+#   - names: list of str
+#   - value: np.array (units x steps)
+#   - lower_bound: np.array (units x steps)
+#   - upper_bound: np.array (units x steps)
+#   - cost: np.array (broadcastable to units x steps)
+
+import numpy as np
+
+from src.resources.base_resource import BaseResource
+
+
+class ResourceFleet:
+    """
+    All units of a resource kind stored as one 2-D array (units x steps).
+    Units can be accessed by position or by name; both return a BaseResource whose arrays are views of the fleet,
+    so existing per-unit code keeps working. Aggregations are vectorized over the whole fleet.
+    Name: str
+    Value: NumPy array (units x steps)
+    Lower bound: NumPy array (units x steps)
+    Upper bound: NumPy array (units x steps)
+    Cost: NumPy array broadcastable to the value (e.g. units x steps or units x 1)
+    Names: List of unit names. Defaults to '{name}_{idx:02d}'
+    """
+
+    __slots__ = ('name', 'value', 'lower_bound', 'upper_bound', 'cost', 'names', '_index')
+
+    def __init__(self,
+                 name: str,
+                 value: np.array,
+                 lower_bound: np.array,
+                 upper_bound: np.array,
+                 cost: np.array,
+                 names: list = None):
+        self.name = name
+        self.value = value
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.cost = np.broadcast_to(cost, value.shape)
+        self.names = names if names is not None else ['{}_{:02d}'.format(name, idx)
+                                                      for idx in range(value.shape[0])]
+        self._index = {unit_name: idx for idx, unit_name in enumerate(self.names)}
+
+        return
+
+    def __repr__(self):
+        return f'{self.name}[{len(self)}]'
+
+    def __str__(self):
+        return f'{self.name}[{len(self)}]'
+
+    def __len__(self):
+        return self.value.shape[0]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self.unit(idx)
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            item = self._index[item]
+
+        return self.unit(item)
+
+    def __contains__(self, item):
+        if isinstance(item, str):
+            return item in self._index
+
+        return item in self.value
+
+    def index(self, name: str) -> int:
+        """
+        Position of a unit in the fleet.
+        :param name: Unit name
+        :return: Row index of the unit
+        """
+
+        return self._index[name]
+
+    def unit(self, idx: int) -> BaseResource:
+        """
+        Single unit of the fleet. The arrays of the returned resource are views of the fleet arrays.
+        :param idx: Row index of the unit
+        :return: BaseResource of the unit
+        """
+
+        return BaseResource(name=self.names[idx],
+                            value=self.value[idx],
+                            lower_bound=self.lower_bound[idx],
+                            upper_bound=self.upper_bound[idx],
+                            cost=self.cost[idx])
+
+    def bind(self, genome: np.ndarray, offset: int = 0) -> int:
+        """
+        Bind the fleet values to a slice of an encoded solution, without copying.
+        :param genome: 1-D encoded solution
+        :param offset: Position of the first value of the fleet in the genome
+        :return: Position right after the bound slice, to bind the next fleet
+        """
+
+        end = offset + self.value.size
+        if end > genome.shape[0]:
+            raise ValueError('Genome too short to bind {}: needs {} elements from offset {}'.format(
+                self.name, self.value.size, offset))
+
+        view = genome[offset:end].reshape(self.value.shape)
+        if not np.shares_memory(view, genome):
+            raise ValueError('Cannot bind {} as a view of the genome'.format(self.name))
+
+        self.value = view
+
+        return end
+
+    def sum(self, axis=None):
+        """
+        Sum of the fleet values.
+        :param axis: None for the fleet total, 0 for the total per step, 1 for the total per unit
+        :return: Sum of the values
+        """
+
+        return self.value.sum(axis=axis)
+
+    def total_cost(self, axis=None):
+        """
+        Cost of the fleet values (value * cost).
+        :param axis: None for the fleet total, 0 for the total per step, 1 for the total per unit
+        :return: Sum of the costs
+        """
+
+        return np.multiply(self.value, self.cost).sum(axis=axis)
+
+    def shape(self):
+        return self.value.shape
@@ -2,6 +2,7 @@
 
 import numpy as np
 from src.resources.base_resource import BaseResource
+from src.utils.precision import as_dtype, get_dtype
 
 
 class Storage(BaseResource):
@@ -24,19 +25,19 @@ class Storage(BaseResource):
                  ):
         super().__init__(name, value, lower_bound, upper_bound, cost)
 
-        self.capacity_max = capacity_max
-        self.capacity_min = capacity_min
-        self.initial_charge = initial_charge
-        self.charge_efficiency = charge_efficiency
-        self.discharge_efficiency = discharge_efficiency
-        self.capital_cost = capital_cost
+        self.capacity_max = as_dtype(capacity_max)
+        self.capacity_min = as_dtype(capacity_min)
+        self.initial_charge = as_dtype(initial_charge)
+        self.charge_efficiency = as_dtype(charge_efficiency)
+        self.discharge_efficiency = as_dtype(discharge_efficiency)
+        self.capital_cost = as_dtype(capital_cost)
 
-        self.discharge = np.zeros(self.value.shape)
-        self.discharge_max = discharge_max
-        self.cost_discharge = cost_discharge
+        self.discharge = np.zeros(self.value.shape, dtype=get_dtype())
+        self.discharge_max = as_dtype(discharge_max)
+        self.cost_discharge = as_dtype(cost_discharge)
 
-        self.charge = np.zeros(self.value.shape)
-        self.charge_max = charge_max
-        self.cost_charge = cost_charge
+        self.charge = np.zeros(self.value.shape, dtype=get_dtype())
+        self.charge_max = as_dtype(charge_max)
+        self.cost_charge = as_dtype(cost_charge)
 
-        self.emin_relax = np.zeros(self.value.shape)
+        self.emin_relax = np.zeros(self.value.shape, dtype=get_dtype())
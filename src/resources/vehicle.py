@@ -2,6 +2,7 @@
 
 import numpy as np
 from src.resources.base_resource import BaseResource
+from src.utils.precision import as_dtype, get_dtype
 
 
 class Vehicle(BaseResource):
@@ -25,19 +26,19 @@ class Vehicle(BaseResource):
                  ):
         super().__init__(name, value, lower_bound, upper_bound, cost)
 
-        self.capacity_max = capacity_max
-        self.initial_charge = initial_charge
-        self.capital_cost = capital_cost
-        self.min_charge = min_charge
+        self.capacity_max = as_dtype(capacity_max)
+        self.initial_charge = as_dtype(initial_charge)
+        self.capital_cost = as_dtype(capital_cost)
+        self.min_charge = as_dtype(min_charge)
 
-        self.discharge_efficiency = discharge_efficiency
-        self.discharge = np.zeros(self.value.shape)
-        self.cost_discharge = cost_discharge
-        self.is_discharging = np.zeros(self.value.shape)
-        self.schedule_discharge = schedule_discharge
+        self.discharge_efficiency = as_dtype(discharge_efficiency)
+        self.discharge = np.zeros(self.value.shape, dtype=get_dtype())
+        self.cost_discharge = as_dtype(cost_discharge)
+        self.is_discharging = np.zeros(self.value.shape, dtype=get_dtype())
+        self.schedule_discharge = as_dtype(schedule_discharge)
 
-        self.charge_efficiency = charge_efficiency
-        self.charge = np.zeros(self.value.shape)
-        self.cost_charge = cost_charge
-        self.is_charging = np.zeros(self.value.shape)
-        self.schedule_charge = schedule_charge
+        self.charge_efficiency = as_dtype(charge_efficiency)
+        self.charge = np.zeros(self.value.shape, dtype=get_dtype())
+        self.cost_charge = as_dtype(cost_charge)
+        self.is_charging = np.zeros(self.value.shape, dtype=get_dtype())
+        self.schedule_charge = as_dtype(schedule_charge)
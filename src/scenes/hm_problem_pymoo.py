@@ -3,12 +3,13 @@
 import numpy as np
 from pymoo.core.problem import Problem
 from ..parsers import HMParser
-from ..resources import BaseResource
+from ..resources import BaseResource, ResourceFleet
+from ..utils.emissions import generator_emissions
 
 
 class HMProblemPymoo(Problem):
 
-    def __init__(self, data):
+    def __init__(self, data, eliminate_fixed=False, constraints=False, balance_tolerance=1e-6, multi_objective=False):
 
         # Set the components
         self.components = data
@@ -32,18 +33,49 @@ class HMProblemPymoo(Problem):
         self.xl = self.encode(self.xl_dict)
         self.xu = self.encode(self.xu_dict)
 
-        # Storage and V2G battery parameters
-        # To calculate these parameters, we use the following formula
-        # Provided in utils/battery/parameter_calculation.py
-        # Each element of the list is for a different battery
-        self.storCapCost = [0.05250, 0.10500, 0.01575]
-        self.v2gCapCost = [0.042, 0.063, 0.042, 0.042, 0.063]
+        # Remove the dimensions with xl == xu (e.g. EV power while unplugged) from the optimizer vector
+        # The repair keeps the fixed dimensions of each variable (fixed_masks) at their value
+        self.free_idx = None
+        self.fixed_values = None
+        self.fixed_masks = {}
+        if eliminate_fixed and np.any(self.xl >= self.xu):
+            self.free_idx = np.flatnonzero(self.xl < self.xu)
+            self.fixed_values = np.minimum(self.xl, self.xu)
+            self.fixed_masks = {name: mask for name, mask in self._decode(self.xl >= self.xu).items() if np.any(mask)}
+
+            self.xl = self.xl[self.free_idx]
+            self.xu = self.xu[self.free_idx]
+
+        # Storage and V2G battery capital costs, one per battery (carried by the parsed data)
+        # See utils/battery/parameter_calculation.py
+        self.storCapCost = data.storage['capital_cost']
+        self.v2gCapCost = data.vehicle['capital_cost']
+        HMParser.check_capital_costs(self.storCapCost, 'storage')
+        HMParser.check_capital_costs(self.v2gCapCost, 'vehicle')
 
         # Placeholder for the objective function
         self.objFn = 0.0
 
+        # Constraint mode: import/export limits, SOC bounds and the balance residual are exported as inequality
+        # constraints (out['G'] <= 0) instead of the import/export penalty
+        # Columns of each group in the violation matrix
+        self.constraints = constraints
+        self.balance_tolerance = balance_tolerance
+        self.constraint_groups = {}
+        if constraints:
+            sizes = {'import': self.n_steps, 'export': self.n_steps,
+                     'stor_soc_max': self.n_stor * self.n_steps, 'stor_soc_min': self.n_stor * self.n_steps,
+                     'v2g_soc_max': self.n_v2g * self.n_steps, 'v2g_soc_min': self.n_v2g * self.n_steps,
+                     'balance': self.n_steps}
+            ends = np.cumsum(list(sizes.values()))
+            self.constraint_groups = {name: slice(end - size, end) for (name, size), end in zip(sizes.items(), ends)}
+        n_constr = sum(group.stop - group.start for group in self.constraint_groups.values())
+
+        # Multi-objective mode: operating cost and greenhouse gas emissions (see evaluate_objectives)
+        self.multi_objective = multi_objective
+
         # Call the super class
-        super().__init__(n_var=len(self.xl), n_obj=1, n_constr=0,
+        super().__init__(n_var=len(self.xl), n_obj=2 if multi_objective else 1, n_ieq_constr=n_constr,
                          xl=self.xl, xu=self.xu, vtype=float)
 
     def _initialize_values(self):
@@ -134,63 +166,132 @@ class HMProblemPymoo(Problem):
 
         return temp_vars
 
-    def objective_function(self, x):
-        # Set the iterators and ranges
-
-        i: int = 0
-        t: int = 0
-        g: int = 0
-        l: int = 0
-        s: int = 0
-        v: int = 0
-
-        # Set the ranges
-        t_range = range(self.n_steps)
-        gen_range = range(self.n_gen)
-        load_range = range(self.n_load)
-        stor_range = range(self.n_stor)
-        v2g_range = range(self.n_v2g)
+    def cost_breakdown(self, x) -> dict:
+        """
+        Cost terms of the objective function.
+        Works on a single decoded solution or on a decoded population (leading pop_size axis, see decode_population).
+        :param x: Decoded solution or population
+        :return: Dictionary with the gens, loads, stor, v2g, rest and balance_penalty terms (one value per member)
+        """
 
         # Assign penalties for import/export
-        balance_penalty = 0.0
-        for t in t_range:
-            if x['pImp'][t] > self.components.peers['import_contracted_p_max'][0, t]:
-                balance_penalty += 100000
-
-            if x['pExp'][t] > self.components.peers['export_contracted_p_max'][0, t]:
-                balance_penalty += 100000
+        # In constraint mode the limits are constraints instead (see constraint_violation)
+        if self.constraints:
+            balance_penalty = np.zeros(x['pImp'].shape[:-1])
+        else:
+            balance_penalty = 100000 * (
+                    np.count_nonzero(x['pImp'] > self.components.peers['import_contracted_p_max'][0, :], axis=-1) +
+                    np.count_nonzero(x['pExp'] > self.components.peers['export_contracted_p_max'][0, :], axis=-1))
 
         # Calculate the individual component costs
         temp_gens = np.sum(x['genActPower'] * self.components.generator['cost_parameter_b'] +
-                           x['genExcActPower'] * self.components.generator['cost_nde'])
+                           x['genExcActPower'] * self.components.generator['cost_nde'], axis=(-2, -1))
 
         temp_loads = np.sum(x['loadRedActPower'] * self.components.load['cost_reduce'] +
                             x['loadCutActPower'] * self.components.load['cost_cut'] +
-                            x['loadENS'] * self.components.load['cost_ens'])
+                            x['loadENS'] * self.components.load['cost_ens'], axis=(-2, -1))
+
+        # Per-battery parameters are broadcast along the time steps
+        stor_capacity = self.components.storage['energy_capacity'][:, None]
+        temp_stor = np.sum(np.asarray(self.storCapCost)[:, None] * (x['storEnerState'] / stor_capacity - 0.63) ** 2 +
+                           x['storDchActPower'] * self.components.storage['discharge_price'] +
+                           x['storChActPower'] * self.components.storage['charge_price'] +
+                           6.5e-3 / stor_capacity * x['storChActPower'] ** 2, axis=(-2, -1))
 
-        temp_stor: float = sum([self.storCapCost[s] * (x['storEnerState'][s, t] /
-                                                       self.components.storage['energy_capacity'][s] - 0.63) ** 2 + \
-                                x['storDchActPower'][s, t] * self.components.storage['discharge_price'][s, t] + \
-                                x['storChActPower'][s, t] * self.components.storage['charge_price'][s, t] + \
-                                (6.5e-3) / self.components.storage['energy_capacity'][s] * x['storChActPower'][
-                                    s, t] ** 2
-                                for t in t_range for s in stor_range])
+        # V2G prices of the first event
+        v2g_capacity = self.components.vehicle['e_capacity_max'][:, None]
+        temp_v2g = np.sum(np.asarray(self.v2gCapCost)[:, None] * (x['v2gEnerState'] / v2g_capacity - 0.63) ** 2 +
+                          x['v2gDchActPower'] * self.components.vehicle['discharge_price'][:, 0:1] +
+                          x['v2gChActPower'] * self.components.vehicle['charge_price'][:, 0:1] +
+                          6.5e-3 / v2g_capacity * x['v2gChActPower'] ** 2, axis=(-2, -1))
 
-        temp_v2g: float = sum([self.v2gCapCost[v] * (x['v2gEnerState'][v, t] /
-                                                     self.components.vehicle['e_capacity_max'][v] - 0.63) ** 2 + \
-                               x['v2gDchActPower'][v, t] * self.components.vehicle['discharge_price'][v, 0] + \
-                               x['v2gChActPower'][v, t] * self.components.vehicle['charge_price'][v, 0] + \
-                               (6.5e-3) / self.components.vehicle['e_capacity_max'][v] * x['v2gChActPower'][v, t] ** 2
-                               for t in t_range for v in v2g_range])
+        temp_rest = np.sum(x['pImp'] * self.components.peers['buy_price'][0, :] +
+                           x['pExp'] * self.components.peers['sell_price'][0, :], axis=-1)
 
-        temp_rest: float = sum([x['pImp'][t] * self.components.peers['buy_price'][0, t] + \
-                                x['pExp'][t] * self.components.peers['sell_price'][0, t]
-                                for t in t_range])
+        return {'gens': temp_gens, 'loads': temp_loads, 'stor': temp_stor, 'v2g': temp_v2g, 'rest': temp_rest,
+                'balance_penalty': balance_penalty}
 
-        self.objFn = temp_gens + temp_loads + temp_stor + temp_v2g + temp_rest + balance_penalty
+    def constraint_violation(self, x) -> np.ndarray:
+        """
+        Inequality constraints of the problem, satisfied when <= 0.
+        Works on a single decoded solution or on a decoded population (leading pop_size axis, see decode_population).
+        :param x: Decoded solution or population
+        :return: Violation matrix (..., n_constr), with the columns of each group given by constraint_groups
+        """
+
+        lead = x['pImp'].shape[:-1]
+
+        # Contracted import/export
+        g_import = x['pImp'] - self.components.peers['import_contracted_p_max'][0, :]
+        g_export = x['pExp'] - self.components.peers['export_contracted_p_max'][0, :]
+
+        # Storage and V2G state of charge bounds (minimum relaxed by EminRelax)
+        stor_capacity = self.components.storage['energy_capacity'][:, None]
+        g_stor_max = x['storEnerState'] - stor_capacity
+        g_stor_min = stor_capacity * self.components.storage['energy_min_percentage'][:, None] - \
+            x['EminRelaxStor'] - x['storEnerState']
+
+        v2g_capacity = self.components.vehicle['e_capacity_max'][:, None]
+        g_v2g_max = x['v2gEnerState'] - v2g_capacity
+        g_v2g_min = v2g_capacity * self.components.vehicle['min_technical_soc'][:, None] - \
+            x['EminRelaxEV'] - x['v2gEnerState']
+
+        # Balance residual of each step, as in HMRepairPymoo.check_balance
+        residual = np.sum(x['genActPower'] - x['genExcActPower'], axis=-2) + \
+            np.sum(x['loadRedActPower'] + x['loadCutActPower'] + x['loadENS'] - self.components.load['p_forecast'],
+                   axis=-2) + \
+            np.sum(x['storDchActPower'] - x['storChActPower'], axis=-2) + \
+            np.sum(x['v2gDchActPower'] - x['v2gChActPower'], axis=-2) + \
+            x['pImp'] - x['pExp']
+        g_balance = np.abs(residual) - self.balance_tolerance
+
+        return np.concatenate([g.reshape(lead + (-1,)) for g in [g_import, g_export, g_stor_max, g_stor_min,
+                                                                  g_v2g_max, g_v2g_min, g_balance]], axis=-1)
+
+    def objective_function(self, x):
+
+        costs = self.cost_breakdown(x)
+        self.objFn = costs['gens'] + costs['loads'] + costs['stor'] + costs['v2g'] + costs['rest'] + \
+            costs['balance_penalty']
 
         return
 
+    def evaluate_population(self, x, return_breakdown=False):
+        """
+        Evaluate a whole population in one call.
+        :param x: Decoded population (see decode_population)
+        :param return_breakdown: Also return the cost terms of each member
+        :return: Fitness of each member (pop_size,), and the cost breakdown if requested
+        """
+
+        costs = self.cost_breakdown(x)
+        fitness = costs['gens'] + costs['loads'] + costs['stor'] + costs['v2g'] + costs['rest'] + \
+            costs['balance_penalty']
+
+        if return_breakdown:
+            return fitness, costs
+
+        return fitness
+
+    def emissions(self, x):
+        """
+        Greenhouse gas emissions of the generators (see generator_emissions for the convention).
+        Works on a single decoded member or on a decoded population (leading pop_size axis, see decode_population).
+        :param x: Decoded solution or population
+        :return: Emissions of each member
+        """
+
+        return generator_emissions(self.components.generator, x['genActPower'])
+
+    def evaluate_objectives(self, x) -> np.ndarray:
+        """
+        Operating cost and greenhouse gas emissions of a whole population in one call (e.g. for NSGA-II).
+        :param x: Decoded population (see decode_population)
+        :return: Objective matrix (pop_size, 2) with the cost and the emissions of each member
+        """
+
+        return np.stack([self.evaluate_population(x), self.emissions(x)], axis=-1)
+
     def _decode(self, x):
         result_decoded = {}
         current_index = 0
@@ -205,46 +306,94 @@ class HMProblemPymoo(Problem):
 
         return result_decoded
 
+    def decode_population(self, x: np.ndarray) -> dict:
+        """
+        Decode a whole population at once.
+        :param x: Encoded population (pop_size x n_var)
+        :return: Dictionary with a (pop_size, n_units, n_steps) view of each variable ((pop_size, n_steps) for pImp
+        and pExp)
+        """
+
+        result_decoded = {}
+        current_index = 0
+
+        for idx in range(len(self.__var_names__)):
+            result_index = current_index + self.__var_idx__[idx]
+            result_decoded[self.__var_names__[idx]] = np.reshape(x[:, current_index:result_index],
+                                                                 (x.shape[0],) + self.__initial_variables__[
+                                                                     self.__var_names__[idx]].shape)
+
+            current_index = result_index
+
+        return result_decoded
+
     @staticmethod
     def encode(x):
         result_encoded = np.concatenate([x[idx].ravel() for idx in x.keys()])
         return result_encoded
 
-    def _evaluate(self, x, out, *args, **kwargs):
-        objective_function = []
-        for temp in range(x.shape[0]):
-            temp_solution = self._decode(x[temp])
-            self.objective_function(temp_solution)
-            objective_function.append(self.objFn)
+    def expand(self, x: np.ndarray) -> np.ndarray:
+        """
+        Rebuild full solutions from optimizer vectors, re-inserting the fixed dimensions.
+        When nothing was eliminated the input is returned as is.
+        :param x: Optimizer vector or population (pop_size x n_var)
+        :return: Full solution or population
+        """
+
+        if self.free_idx is None:
+            return x
+
+        result = np.tile(self.fixed_values, x.shape[:-1] + (1,))
+        result[..., self.free_idx] = x
+
+        return result
+
+    def reduce(self, x: np.ndarray) -> np.ndarray:
+        """
+        Extract the optimizer vectors from full solutions.
+        When nothing was eliminated the input is returned as is.
+        :param x: Full solution or population
+        :return: Optimizer vector or population
+        """
 
-        print(len(objective_function))
+        if self.free_idx is None:
+            return x
+
+        return x[..., self.free_idx]
+
+    def _evaluate(self, x, out, *args, **kwargs):
+        population = self.decode_population(self.expand(x))
+        if self.multi_objective:
+            out['F'] = self.evaluate_objectives(population)
+        else:
+            out['F'] = self.evaluate_population(population)
 
-        out['F'] = objective_function
+        if self.constraints:
+            out['G'] = self.constraint_violation(population)
 
     def decode(self, x: np.ndarray) -> dict:
         """
-        Decodes the solution to the resources
+        Decodes the solution (optimizer vector, e.g. res.X) to the resources.
+        Each resource kind is a ResourceFleet of views of the decoded solution (pImp and pExp are BaseResource)
         :param x: Encoded solution
         :return: Dictionary of resources
         """
 
         # Decode the solution
-        decoded = self._decode(x)
+        decoded = self._decode(self.expand(x))
 
         # Decode the generators
-        genActPower = [BaseResource(name='genActPower_{:02d}'.format(g),
-                                    value=decoded['genActPower'][g, :],
-                                    lower_bound=self.xl_dict['genActPower'][g, :],
-                                    upper_bound=self.xu_dict['genActPower'][g, :],
-                                    cost=self.components.generator['cost_parameter_b'][g])
-                       for g in range(self.n_gen)]
-
-        genExcActPower = [BaseResource(name='genExcActPower_{:02d}'.format(g),
-                                       value=decoded['genExcActPower'][g, :],
-                                       lower_bound=self.xl_dict['genExcActPower'][g, :],
-                                       upper_bound=self.xu_dict['genExcActPower'][g, :],
-                                       cost=self.components.generator['cost_nde'][g])
-                          for g in range(self.n_gen)]
+        genActPower = ResourceFleet(name='genActPower',
+                                    value=decoded['genActPower'],
+                                    lower_bound=self.xl_dict['genActPower'],
+                                    upper_bound=self.xu_dict['genActPower'],
+                                    cost=self.components.generator['cost_parameter_b'])
+
+        genExcActPower = ResourceFleet(name='genExcActPower',
+                                       value=decoded['genExcActPower'],
+                                       lower_bound=self.xl_dict['genExcActPower'],
+                                       upper_bound=self.xu_dict['genExcActPower'],
+                                       cost=self.components.generator['cost_nde'])
 
         # Decode the import/export
         pImp = BaseResource(name='pImp',
@@ -260,76 +409,68 @@ class HMProblemPymoo(Problem):
                             cost=self.components.peers['sell_price'][0])
 
         # Decode the loads
-        loadRedActPower = [BaseResource(name='loadRedActPower_{:02d}'.format(l),
-                                        value=decoded['loadRedActPower'][l, :],
-                                        lower_bound=self.xl_dict['loadRedActPower'][l, :],
-                                        upper_bound=self.xu_dict['loadRedActPower'][l, :],
-                                        cost=self.components.load['cost_reduce'][l])
-                           for l in range(self.n_load)]
-
-        loadCutActPower = [BaseResource(name='loadCutActPower_{:02d}'.format(l),
-                                        value=decoded['loadCutActPower'][l, :],
-                                        lower_bound=self.xl_dict['loadCutActPower'][l, :],
-                                        upper_bound=self.xu_dict['loadCutActPower'][l, :],
-                                        cost=self.components.load['cost_cut'][l])
-                           for l in range(self.n_load)]
-
-        loadENS = [BaseResource(name='loadENS_{:02d}'.format(l),
-                                value=decoded['loadENS'][l, :],
-                                lower_bound=self.xl_dict['loadENS'][l, :],
-                                upper_bound=self.xu_dict['loadENS'][l, :],
-                                cost=self.components.load['cost_ens'][l])
-                   for l in range(self.n_load)]
-
-        loadActPower = [BaseResource(name='loadActPower_{:02d}'.format(l),
-                                     value=self.components.load['p_forecast'][l, :],
-                                     lower_bound=self.xl_dict['loadCutActPower'][l, :],
-                                     upper_bound=self.xu_dict['loadCutActPower'][l, :],
-                                     cost=self.components.load['cost_cut'][l])
-                        for l in range(self.n_load)]
+        loadRedActPower = ResourceFleet(name='loadRedActPower',
+                                        value=decoded['loadRedActPower'],
+                                        lower_bound=self.xl_dict['loadRedActPower'],
+                                        upper_bound=self.xu_dict['loadRedActPower'],
+                                        cost=self.components.load['cost_reduce'])
+
+        loadCutActPower = ResourceFleet(name='loadCutActPower',
+                                        value=decoded['loadCutActPower'],
+                                        lower_bound=self.xl_dict['loadCutActPower'],
+                                        upper_bound=self.xu_dict['loadCutActPower'],
+                                        cost=self.components.load['cost_cut'])
+
+        loadENS = ResourceFleet(name='loadENS',
+                                value=decoded['loadENS'],
+                                lower_bound=self.xl_dict['loadENS'],
+                                upper_bound=self.xu_dict['loadENS'],
+                                cost=self.components.load['cost_ens'])
+
+        loadActPower = ResourceFleet(name='loadActPower',
+                                     value=self.components.load['p_forecast'],
+                                     lower_bound=self.xl_dict['loadCutActPower'],
+                                     upper_bound=self.xu_dict['loadCutActPower'],
+                                     cost=self.components.load['cost_cut'])
 
         # Decode the storage
-        storDchActPower = [BaseResource(name='storDchActPower_{:02d}'.format(s),
-                                        value=decoded['storDchActPower'][s, :],
-                                        lower_bound=self.xl_dict['storDchActPower'][s, :],
-                                        upper_bound=self.xu_dict['storDchActPower'][s, :],
-                                        cost=self.components.storage['discharge_price'][s])
-                           for s in range(self.n_stor)]
-
-        storChActPower = [BaseResource(name='storChActPower_{:02d}'.format(s),
-                                       value=decoded['storChActPower'][s, :],
-                                       lower_bound=self.xl_dict['storChActPower'][s, :],
-                                       upper_bound=self.xu_dict['storChActPower'][s, :],
-                                       cost=self.components.storage['charge_price'][s])
-                          for s in range(self.n_stor)]
-
-        storEnerState = [BaseResource(name='storEnerState_{:02d}'.format(s),
-                                      value=decoded['storEnerState'][s, :],
-                                      lower_bound=self.xl_dict['storEnerState'][s, :],
-                                      upper_bound=self.xu_dict['storEnerState'][s, :],
-                                      cost=np.array([0.0 for _ in range(self.n_steps)]))
-                         for s in range(self.n_stor)]
-
-        v2gDchActPower = [BaseResource(name='v2gDchActPower_{:02d}'.format(v),
-                                       value=decoded['v2gDchActPower'][v, :],
-                                       lower_bound=self.xl_dict['v2gDchActPower'][v, :],
-                                       upper_bound=self.xu_dict['v2gDchActPower'][v, :],
-                                       cost=self.components.vehicle['discharge_price'][v, 0])
-                          for v in range(self.n_v2g)]
-
-        v2gChActPower = [BaseResource(name='v2gChActPower_{:02d}'.format(v),
-                                      value=decoded['v2gChActPower'][v, :],
-                                      lower_bound=self.xl_dict['v2gChActPower'][v, :],
-                                      upper_bound=self.xu_dict['v2gChActPower'][v, :],
-                                      cost=self.components.vehicle['charge_price'][v, 0])
-                         for v in range(self.n_v2g)]
-
-        v2gEnerState = [BaseResource(name='v2gEnerState_{:02d}'.format(v),
-                                     value=decoded['v2gEnerState'][v, :],
-                                     lower_bound=self.xl_dict['v2gEnerState'][v, :],
-                                     upper_bound=self.xu_dict['v2gEnerState'][v, :],
-                                     cost=np.array([0.0 for _ in range(self.n_steps)]))
-                        for v in range(self.n_v2g)]
+        storDchActPower = ResourceFleet(name='storDchActPower',
+                                        value=decoded['storDchActPower'],
+                                        lower_bound=self.xl_dict['storDchActPower'],
+                                        upper_bound=self.xu_dict['storDchActPower'],
+                                        cost=self.components.storage['discharge_price'])
+
+        storChActPower = ResourceFleet(name='storChActPower',
+                                       value=decoded['storChActPower'],
+                                       lower_bound=self.xl_dict['storChActPower'],
+                                       upper_bound=self.xu_dict['storChActPower'],
+                                       cost=self.components.storage['charge_price'])
+
+        # Energy states have no cost: a broadcast zero instead of one array per unit
+        storEnerState = ResourceFleet(name='storEnerState',
+                                      value=decoded['storEnerState'],
+                                      lower_bound=self.xl_dict['storEnerState'],
+                                      upper_bound=self.xu_dict['storEnerState'],
+                                      cost=np.float64(0.0))
+
+        # Decode the V2G (prices of the first event)
+        v2gDchActPower = ResourceFleet(name='v2gDchActPower',
+                                       value=decoded['v2gDchActPower'],
+                                       lower_bound=self.xl_dict['v2gDchActPower'],
+                                       upper_bound=self.xu_dict['v2gDchActPower'],
+                                       cost=self.components.vehicle['discharge_price'][:, 0:1])
+
+        v2gChActPower = ResourceFleet(name='v2gChActPower',
+                                      value=decoded['v2gChActPower'],
+                                      lower_bound=self.xl_dict['v2gChActPower'],
+                                      upper_bound=self.xu_dict['v2gChActPower'],
+                                      cost=self.components.vehicle['charge_price'][:, 0:1])
+
+        v2gEnerState = ResourceFleet(name='v2gEnerState',
+                                     value=decoded['v2gEnerState'],
+                                     lower_bound=self.xl_dict['v2gEnerState'],
+                                     upper_bound=self.xu_dict['v2gEnerState'],
+                                     cost=np.float64(0.0))
 
         # Add everything to the dictionary
         result = {'genActPower': genActPower,
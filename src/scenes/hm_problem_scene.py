@@ -7,15 +7,42 @@ from src.algorithms import HydeDF
 from ..repairs import HMRepair
 from ..parsers import HMParser
 from ..resources import BaseResource
+from ..utils.precision import get_dtype
+from ..utils.fitness_cache import FitnessCache
+from ..utils.emissions import generator_emissions
 
 
 class HMProblemScene(BaseScene):
 
+    # Variables fully recomputed by HMRepair from the other variables
+    derived_variables = ['genExcActPower', 'pImp', 'pExp', 'loadCutActPower', 'loadENS',
+                         'storEnerState', 'EminRelaxEV', 'v2gEnerState']
+
+    # On/off variables, thresholded at 0.5 by HMRepair
+    # genXo is left out: HMRepair scales the output of type 1 generators by it
+    binary_variables = ['loadXo', 'storDchXo', 'storChXo', 'v2gDchXo', 'v2gChXo']
+
+    # Cost blocks of the objective function and the repaired variables each one depends on
+    cost_blocks = {'gens': ['genActPower', 'genExcActPower'],
+                   'loads': ['loadRedActPower', 'loadCutActPower', 'loadENS'],
+                   'stor': ['storEnerState', 'storDchActPower', 'storChActPower'],
+                   'v2g': ['v2gEnerState', 'v2gDchActPower', 'v2gChActPower'],
+                   'rest': ['pImp', 'pExp'],
+                   'balance_penalty': ['pImp', 'pExp']}
+
+    # Blocks without a unit axis (a single value per member)
+    member_blocks = ['rest', 'balance_penalty']
+
     def __init__(self, name: str, data, hm_parser: HMParser,
                  n_iter=200,
                  iter_tolerance=10,
                  epsilon_tolerance=1e-6,
-                 pop_size=10):
+                 pop_size=10,
+                 encoding='full',
+                 eliminate_fixed=False,
+                 binary_genes=False,
+                 delta_evaluation=False,
+                 memo_size=0):
 
         # Parsed data
         self.parsed_data = hm_parser
@@ -23,6 +50,9 @@ class HMProblemScene(BaseScene):
         # Initialize the components
         super().__init__(name, data)
 
+        # Floating point precision of the population and repair buffers
+        self.dtype = get_dtype()
+
         # Problem specific parameters
         self.n_steps = self.components['gen'].value.shape[1]
         self.n_gen = self.components['gen'].value.shape[0]
@@ -30,6 +60,10 @@ class HMProblemScene(BaseScene):
         self.n_stor = self.components['stor'].value.shape[0]
         self.n_v2g = self.components['evs'].value.shape[0]
 
+        # The objective needs the battery capital cost of every storage unit and EV
+        HMParser.check_capital_costs(self.components['stor'].capital_cost, 'storage')
+        HMParser.check_capital_costs(self.components['evs'].capital_cost, 'vehicle')
+
         # Create the variables for the optimization process
         self.decoded_lower_bounds, self.decoded_upper_bounds = self._create_variables()
 
@@ -49,10 +83,51 @@ class HMProblemScene(BaseScene):
         self.component_size_split = [self.decoded_lower_bounds[component].ravel().shape[0]
                                      for component in self.decoded_lower_bounds.keys()]
 
+        # Compiled variable layout: name -> (start, end, shape) in the encoded member
+        self.layout = self._compile_layout()
+
         # Lower and upper bounds
         self.lower_bounds = None
         self.upper_bounds = None
 
+        # Encoding exposed to the optimizer
+        # 'full': every variable is searched
+        # 'reduced': variables derived by the repair are left out of the optimizer vector
+        if encoding not in ['full', 'reduced']:
+            raise ValueError('Encoding must be full or reduced, got {}'.format(encoding))
+        self.encoding = encoding
+
+        # Remove the dimensions whose bounds leave a single value (e.g. EV power while unplugged)
+        self.eliminate_fixed = eliminate_fixed
+
+        # Evolve the on/off variables as bit-packed binary genes in HydeDF
+        self.binary_genes = binary_genes
+
+        # Positions of the searched variables in the full member and values of the rest
+        self.free_idx = None
+        self.fixed_values = None
+
+        # Repaired full members of the population, evaluated in one call
+        self.population_buffer = None
+
+        # Positions of the on/off variables in the optimizer vector and a scratch optimizer vector
+        self.binary_idx = None
+        self.vector_buffer = None
+
+        # Delta evaluation: only the units whose repaired variables differ from the parent are recomputed
+        # Repaired parents, their unit costs and the number of unit costs reused out of those checked
+        self.delta_evaluation = delta_evaluation
+        self.delta_members = None
+        self.delta_costs = None
+        self.delta_hits = 0
+        self.delta_checks = 0
+
+        # Repaired genomes and fitness of the last memo_size genomes fed to the repair (0 disables the cache)
+        # Keys of the current population members
+        self.memo_size = memo_size
+        self.fitness_cache = None
+        self.memo_keys = None
+
         # Repair instance
         self.hm_repair = HMRepair(self.components)
 
@@ -66,23 +141,81 @@ class HMProblemScene(BaseScene):
         # Solution placeholder
         self.solution = None
 
+    def _compile_layout(self) -> dict:
+        """
+        Compute the position of every variable in the encoded member once.
+        :return: Dictionary with the (start, end, shape) of each variable
+        """
+
+        layout = {}
+        offset = 0
+        for name, size in zip(self.decoded_lower_bounds.keys(), self.component_size_split):
+            layout[name] = (offset, offset + size, self.decoded_lower_bounds[name].shape)
+            offset += size
+
+        return layout
+
     # Encoding process
-    @staticmethod
-    def encode(x: dict):
-        return np.concatenate([x[component].ravel()
-                               for component in x.keys()])
+    def encode(self, x: dict, out: np.ndarray = None):
+        """
+        Encode a member.
+        :param x: Decoded member
+        :param out: Encoded member to write into (e.g. a population row). Variables that are still views of it
+        are not copied. Defaults to a new array
+        :return: Encoded member
+        """
+
+        if out is None:
+            return np.concatenate([x[component].ravel()
+                                   for component in x.keys()])
+
+        for name, (start, end, shape) in self.layout.items():
+            target = out[start:end]
+            if not np.may_share_memory(x[name], target):
+                np.copyto(target.reshape(shape), x[name])
+
+        return out
+
+    def encode_population(self, x: dict, out: np.ndarray = None) -> np.ndarray:
+        """
+        Encode a whole population.
+        :param x: Decoded population, with a leading pop_size axis on every variable
+        :param out: Encoded population to write into (pop_size x pop_dim). Variables that are still views of it are
+        not copied. Defaults to a new array
+        :return: Encoded population
+        """
+
+        if out is None:
+            return np.concatenate([x[component].reshape(x[component].shape[0], -1)
+                                   for component in x.keys()], axis=1)
+
+        for name, (start, end, shape) in self.layout.items():
+            target = out[:, start:end]
+            if not np.may_share_memory(x[name], target):
+                np.copyto(target.reshape((out.shape[0],) + shape), x[name])
+
+        return out
 
     # Decoding process
     def decode(self, x: np.ndarray):
-        splits = np.cumsum(self.component_size_split)
-        decoded_splits = np.split(x, splits[:-1])
+        """
+        Decode a member into views of the encoded array (no copies).
+        :param x: Encoded member
+        :return: Dictionary with a view of each variable
+        """
 
-        temp_dict = {}
+        return {name: x[start:end].reshape(shape) for name, (start, end, shape) in self.layout.items()}
 
-        for name, component in zip(self.decoded_lower_bounds.keys(), decoded_splits):
-            temp_dict[name] = component.reshape(self.decoded_lower_bounds[name].shape)
+    def decode_population(self, population: np.ndarray) -> dict:
+        """
+        Decode a whole population into views of the population array (no copies).
+        :param population: Encoded population (pop_size x pop_dim)
+        :return: Dictionary with a (pop_size, n_units, n_steps) view of each variable ((pop_size, n_steps) for pImp
+        and pExp)
+        """
 
-        return temp_dict
+        return {name: population[:, start:end].reshape((population.shape[0],) + shape)
+                for name, (start, end, shape) in self.layout.items()}
 
     def _create_variables(self):
 
@@ -123,12 +256,12 @@ class HMProblemScene(BaseScene):
                    'v2gChActPower': self.components['evs'].schedule_charge,
                    'EminRelaxEV': self.components['evs'].upper_bound,
                    'v2gEnerState': self.components['evs'].upper_bound,
-                   'genXo': np.ones(self.components['gen'].value.shape),
-                   'loadXo': np.ones(self.components['loads'].value.shape),
-                   'storDchXo': np.ones(self.components['stor'].value.shape),
-                   'storChXo': np.ones(self.components['stor'].value.shape),
-                   'v2gDchXo': np.ones(self.components['evs'].value.shape),
-                   'v2gChXo': np.ones(self.components['evs'].value.shape)}
+                   'genXo': np.ones(self.components['gen'].value.shape, dtype=self.dtype),
+                   'loadXo': np.ones(self.components['loads'].value.shape, dtype=self.dtype),
+                   'storDchXo': np.ones(self.components['stor'].value.shape, dtype=self.dtype),
+                   'storChXo': np.ones(self.components['stor'].value.shape, dtype=self.dtype),
+                   'v2gDchXo': np.ones(self.components['evs'].value.shape, dtype=self.dtype),
+                   'v2gChXo': np.ones(self.components['evs'].value.shape, dtype=self.dtype)}
 
         return temp_xl, temp_xu
 
@@ -146,6 +279,7 @@ class HMProblemScene(BaseScene):
         # Set the component size split to the number of components
         self.component_size_split = [self.decoded_lower_bounds[component].ravel().shape[0]
                                      for component in self.decoded_lower_bounds.keys()]
+        self.layout = self._compile_layout()
 
         # Set the current best to None
         self.current_best = None
@@ -158,12 +292,102 @@ class HMProblemScene(BaseScene):
 
         # Set the lower and upper bounds
         self.lower_bounds = np.concatenate([self.decoded_lower_bounds[component].ravel()
-                                            for component in self.decoded_lower_bounds.keys()])
+                                            for component in self.decoded_lower_bounds.keys()]).astype(self.dtype)
         self.upper_bounds = np.concatenate([self.decoded_upper_bounds[component].ravel()
-                                            for component in self.decoded_upper_bounds.keys()])
+                                            for component in self.decoded_upper_bounds.keys()]).astype(self.dtype)
+
+        # Keep only the searched variables in the optimizer vector
+        self.free_idx = None
+        self.fixed_values = None
+        self.population_buffer = np.empty((self.algo_pop_size, self.lower_bounds.shape[0]), dtype=self.dtype)
+
+        free_mask = np.ones(self.lower_bounds.shape[0], dtype=bool)
+        self.hm_repair.fixed_masks = {}
+        if self.eliminate_fixed:
+            free_mask &= self.lower_bounds < self.upper_bounds
+
+            # The repair keeps the fixed dimensions at their value, since the reduction drops them
+            self.hm_repair.fixed_masks = {name: mask for name, mask in self.decode(~free_mask).items()
+                                          if np.any(mask)}
+
+        if self.encoding == 'reduced':
+            for name in self.derived_variables:
+                start, end, _ = self.layout[name]
+                free_mask[start:end] = False
+
+        if not np.all(free_mask):
+            self.free_idx = np.flatnonzero(free_mask)
+            self.fixed_values = np.minimum(self.lower_bounds, self.upper_bounds)
+
+            self.lower_bounds = self.lower_bounds[self.free_idx]
+            self.upper_bounds = self.upper_bounds[self.free_idx]
+
+        # Searched on/off variables
+        self.binary_idx = None
+        self.vector_buffer = None
+
+        if self.binary_genes:
+            binary_mask = np.zeros(free_mask.shape[0], dtype=bool)
+            for name in self.binary_variables:
+                start, end, _ = self.layout[name]
+                binary_mask[start:end] = True
+
+            self.binary_idx = np.flatnonzero(binary_mask[free_mask])
+            self.vector_buffer = np.empty_like(self.lower_bounds)
+
+        # Delta evaluation cache and counters
+        self.delta_members = None
+        self.delta_costs = None
+        self.delta_hits = 0
+        self.delta_checks = 0
+
+        # Fitness cache
+        self.fitness_cache = FitnessCache(self.memo_size) if self.memo_size > 0 else None
+        self.memo_keys = [None] * self.algo_pop_size
 
         return
 
+    def expand(self, x: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Rebuild a full member from the optimizer vector.
+        Fixed dimensions get their single value (the upper bound when the bounds are inverted), and derived variables
+        of the reduced encoding get their lower bounds before the repair recomputes them.
+        When nothing was left out the optimizer vector is returned as is, or copied into out.
+        :param x: Optimizer vector
+        :param out: Full member to write into. Defaults to a new array
+        :return: Full member
+        """
+
+        if self.free_idx is None:
+            if out is None:
+                return x
+
+            np.copyto(out, x)
+            return out
+
+        if out is None:
+            out = self.fixed_values.copy()
+        else:
+            np.copyto(out, self.fixed_values)
+
+        out[self.free_idx] = x
+
+        return out
+
+    def reduce(self, x: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Extract the optimizer vector from a full member.
+        When nothing was left out the member is returned as is.
+        :param x: Full member
+        :param out: Optimizer vector to write into. Defaults to a new array
+        :return: Optimizer vector
+        """
+
+        if self.free_idx is None:
+            return x
+
+        return np.take(x, self.free_idx, out=out)
+
     def repair(self, x):
 
         # Repair the member
@@ -171,63 +395,247 @@ class HMProblemScene(BaseScene):
 
         return repaired_member
 
+    def repair_population(self, x: dict) -> dict:
+        """
+        Repair a whole population in one call (see HMRepair.repair_population).
+        :param x: Decoded population, with a leading pop_size axis on every variable
+        :return: Repaired population
+        """
+
+        repaired_population = self.hm_repair.repair_population(x)
+
+        return repaired_population
+
+    def _block_costs(self, block: str, x: dict, units=slice(None)) -> np.ndarray:
+        """
+        Cost of each unit of a cost block.
+        :param block: Cost block (see cost_blocks)
+        :param x: Variables of the block, either (..., n_units, n_steps) or gathered unit rows (n_rows, n_steps)
+        :param units: Unit of each gathered row. Defaults to all the units
+        :return: Cost of each unit (of each member for the member blocks)
+        """
+
+        # Per-unit parameters are broadcast along the time steps
+        if block == 'gens':
+            gen = self.components['gen']
+            return np.sum(x['genActPower'] * gen.cost[units] +
+                          x['genExcActPower'] * gen.cost_nde[units], axis=-1)
+
+        if block == 'loads':
+            loads = self.components['loads']
+            return np.sum(x['loadRedActPower'] * loads.cost_reduce[units] +
+                          x['loadCutActPower'] * loads.cost_cut[units] +
+                          x['loadENS'] * loads.cost_ens[units], axis=-1)
+
+        if block == 'stor':
+            stor = self.components['stor']
+            capacity = stor.capacity_max[units][..., None]
+            return np.sum(stor.capital_cost[units][..., None] * (x['storEnerState'] / capacity - 0.63) ** 2 +
+                          x['storDchActPower'] * stor.cost_discharge[units] +
+                          x['storChActPower'] * stor.cost_charge[units] +
+                          6.5e-3 / capacity * x['storChActPower'] ** 2, axis=-1)
+
+        if block == 'v2g':
+            evs = self.components['evs']
+            capacity = evs.capacity_max[units][..., None]
+            return np.sum(evs.capital_cost[units][..., None] * (x['v2gEnerState'] / capacity - 0.63) ** 2 +
+                          x['v2gDchActPower'] * evs.cost_discharge[units][..., None] +
+                          x['v2gChActPower'] * evs.cost_charge[units][..., None] +
+                          6.5e-3 / capacity * x['v2gChActPower'] ** 2, axis=-1)
+
+        if block == 'rest':
+            return np.sum(x['pImp'] * self.components['pimp'].cost +
+                          x['pExp'] * self.components['pexp'].cost, axis=-1)
+
+        if block == 'balance_penalty':
+            # Assign penalties for import/export
+            return 100000 * (np.count_nonzero(x['pImp'] > self.components['pimp'].upper_bound, axis=-1) +
+                             np.count_nonzero(x['pExp'] > self.components['pexp'].upper_bound, axis=-1))
+
+        raise ValueError('Unknown cost block {}'.format(block))
+
+    def unit_costs(self, x) -> dict:
+        """
+        Cost terms of the objective function per unit (generator, load, battery or EV).
+        :param x: Decoded member or population (leading pop_size axis, see decode_population)
+        :return: Dictionary with the cost of each unit of each block (a single value per member for rest and
+        balance_penalty)
+        """
+
+        return {block: self._block_costs(block, x) for block in self.cost_blocks.keys()}
+
+    def cost_breakdown(self, x, unit_costs: dict = None) -> dict:
+        """
+        Cost terms of the objective function.
+        Works on a single decoded member or on a decoded population (leading pop_size axis, see decode_population).
+        :param x: Decoded member or population
+        :param unit_costs: Unit costs of x when already known (see unit_costs)
+        :return: Dictionary with the gens, loads, stor, v2g, rest and balance_penalty terms (one value per member)
+        """
+
+        if unit_costs is None:
+            unit_costs = self.unit_costs(x)
+
+        return {block: costs if block in self.member_blocks else np.sum(costs, axis=-1)
+                for block, costs in unit_costs.items()}
+
+    @staticmethod
+    def _total_cost(costs: dict):
+        return costs['gens'] + costs['loads'] + costs['stor'] + costs['v2g'] + costs['rest'] + \
+            costs['balance_penalty']
+
     def evaluate(self, x):
-        # Set the iterators and ranges
-
-        i: int = 0
-        t: int = 0
-        g: int = 0
-        l: int = 0
-        s: int = 0
-        v: int = 0
-
-        # Set the ranges
-        t_range = range(self.n_steps)
-        gen_range = range(self.n_gen)
-        load_range = range(self.n_load)
-        stor_range = range(self.n_stor)
-        v2g_range = range(self.n_v2g)
-
-        # Assign penalties for import/export
-        balance_penalty = 0.0
-        for t in t_range:
-            if x['pImp'][t] > self.components['pimp'].upper_bound[t]:
-                balance_penalty += 100000
-
-            if x['pExp'][t] > self.components['pexp'].upper_bound[t]:
-                balance_penalty += 100000
-
-        # Calculate the individual component costs
-        temp_gens = np.sum([x['genActPower'] * self.components['gen'].cost +
-                            x['genExcActPower'] * self.components['gen'].cost_nde])
-
-        temp_loads = np.sum([x['loadRedActPower'] * self.components['loads'].cost_reduce +
-                             x['loadCutActPower'] * self.components['loads'].cost_cut +
-                             x['loadENS'] * self.components['loads'].cost_ens])
-
-        temp_stor: float = sum([self.components['stor'].capital_cost[s] *
-                                (x['storEnerState'][s, t] / self.components['stor'].capacity_max[s] - 0.63) ** 2 +
-                                x['storDchActPower'][s, t] * self.components['stor'].cost_discharge[s, t] +
-                                x['storChActPower'][s, t] * self.components['stor'].cost_charge[s, t] +
-                                6.5e-3 / self.components['stor'].capacity_max[s] * x['storChActPower'][
-                                    s, t] ** 2
-                                for t in t_range for s in stor_range])
-
-        temp_v2g: float = sum([self.components['evs'].capital_cost[v] *
-                               (x['v2gEnerState'][v, t] / self.components['evs'].capacity_max[v] - 0.63) ** 2 +
-                               x['v2gDchActPower'][v, t] * self.components['evs'].cost_discharge[v] +
-                               x['v2gChActPower'][v, t] * self.components['evs'].cost_charge[v] +
-                               6.5e-3 / self.components['evs'].capacity_max[v] * x['v2gChActPower'][v, t] ** 2
-                               for t in t_range for v in v2g_range])
-
-        temp_rest: float = sum([x['pImp'][t] * self.components['pimp'].cost[t] +
-                                x['pExp'][t] * self.components['pexp'].cost[t]
-                                for t in t_range])
-
-        obj_fn = temp_gens + temp_loads + temp_stor + temp_v2g + temp_rest + balance_penalty
+
+        obj_fn = self._total_cost(self.cost_breakdown(x))
 
         return obj_fn
 
+    def evaluate_population(self, x, return_breakdown=False):
+        """
+        Evaluate a whole population in one call.
+        :param x: Decoded population (see decode_population)
+        :param return_breakdown: Also return the cost terms of each member
+        :return: Fitness of each member (pop_size,), and the cost breakdown if requested
+        """
+
+        costs = self.cost_breakdown(x)
+        fitness = self._total_cost(costs)
+
+        if return_breakdown:
+            return fitness, costs
+
+        return fitness
+
+    def emissions(self, x):
+        """
+        Greenhouse gas emissions of the generators (see generator_emissions for the convention).
+        Works on a single decoded member or on a decoded population (leading pop_size axis, see decode_population).
+        :param x: Decoded member or population
+        :return: Emissions of each member
+        """
+
+        return generator_emissions(self.parsed_data.generator, x['genActPower'])
+
+    def evaluate_objectives(self, x) -> np.ndarray:
+        """
+        Operating cost and greenhouse gas emissions of a whole population in one call (e.g. for NSGA-II).
+        :param x: Decoded population (see decode_population)
+        :return: Objective matrix (pop_size, 2) with the cost and the emissions of each member
+        """
+
+        return np.stack([self.evaluate_population(x), self.emissions(x)], axis=-1)
+
+    def evaluate_population_delta(self, x) -> tuple:
+        """
+        Evaluate a population against the cached parents (member i is bred from cached member i).
+        Only the units whose repaired variables differ from the parent are recomputed, the other unit costs are
+        reused. Gives the same fitness as evaluate_population.
+        :param x: Decoded population (see decode_population)
+        :return: Fitness of each member (pop_size,) and the unit costs (see unit_costs)
+        """
+
+        parents = self.decode_population(self.delta_members)
+
+        unit_costs = {}
+        for block, variables in self.cost_blocks.items():
+            # Units with a changed trajectory
+            changed = np.zeros(self.delta_costs[block].shape, dtype=bool)
+            for name in variables:
+                changed |= np.any(x[name] != parents[name], axis=-1)
+            rows = np.nonzero(changed)
+
+            unit_costs[block] = self.delta_costs[block].copy()
+            unit_costs[block][rows] = self._block_costs(block, {name: x[name][rows] for name in variables},
+                                                        rows[-1])
+
+            self.delta_hits += changed.size - rows[0].shape[0]
+            self.delta_checks += changed.size
+
+        fitness = self._total_cost(self.cost_breakdown(x, unit_costs=unit_costs))
+
+        return fitness, unit_costs
+
+    def update_delta_cache(self, mask: np.ndarray, unit_costs: dict):
+        """
+        Make the selected members of the population buffer the parents of the next delta evaluation.
+        :param mask: Members that replaced their parents
+        :param unit_costs: Unit costs of the population buffer
+        :return: None
+        """
+
+        self.delta_members[mask] = self.population_buffer[mask]
+        for block in self.cost_blocks.keys():
+            self.delta_costs[block][mask] = unit_costs[block][mask]
+
+        return
+
+    def delta_hit_rate(self) -> float:
+        """
+        Share of the unit costs reused by the delta evaluation.
+        :return: Reused unit costs over checked unit costs (0 before any delta evaluation)
+        """
+
+        if self.delta_checks == 0:
+            return 0.0
+
+        return self.delta_hits / self.delta_checks
+
+    def _repair_population(self) -> np.ndarray:
+        """
+        Repair the algorithm population into the population buffer and write the repaired members back.
+        Genomes found in the fitness cache take their repaired member and fitness from it instead, and the others are
+        repaired together in one call.
+        :return: Mask of the members taken from the fitness cache
+        """
+
+        cached = np.zeros(self.algo.population.shape[0], dtype=bool)
+        for member_idx in np.arange(self.algo.population.shape[0]):
+            vector = self.algo.member(member_idx, out=self.vector_buffer)
+            expanded = self.population_buffer[member_idx]
+
+            entry = None
+            if self.fitness_cache is not None:
+                self.memo_keys[member_idx] = self.fitness_cache.key(vector)
+                entry = self.fitness_cache.get(self.memo_keys[member_idx])
+
+            if entry is not None:
+                np.copyto(expanded, entry[0])
+                self.algo.population_fitness[member_idx] = entry[1]
+                cached[member_idx] = True
+            else:
+                self.expand(vector, out=expanded)
+
+        # Repair the remaining members in one call
+        if not np.any(cached):
+            population = self.repair_population(self.decode_population(self.population_buffer))
+            self.encode_population(population, out=self.population_buffer)
+        elif not np.all(cached):
+            population = self.repair_population(self.decode_population(self.population_buffer[~cached]))
+            self.population_buffer[~cached] = self.encode_population(population)
+
+        # Update the population members
+        for member_idx in np.arange(self.algo.population.shape[0]):
+            vector = self.algo.member(member_idx, out=self.vector_buffer)
+            self.algo.set_member(member_idx, self.reduce(self.population_buffer[member_idx], out=vector))
+
+        return cached
+
+    def _cache_population(self, cached: np.ndarray):
+        """
+        Store the newly repaired members and their fitness in the fitness cache.
+        :param cached: Mask of the members taken from the fitness cache
+        :return: None
+        """
+
+        if self.fitness_cache is None:
+            return
+
+        for member_idx in np.flatnonzero(~cached):
+            self.fitness_cache.put(self.memo_keys[member_idx], self.population_buffer[member_idx],
+                                   self.algo.population_fitness[member_idx])
+
+        return
+
     def run(self):
 
         # Initialize the algorithm
@@ -236,29 +644,37 @@ class HMProblemScene(BaseScene):
                            pop_size=self.algo_pop_size,
                            pop_dim=self.lower_bounds.shape[0],
                            lower_bound=self.lower_bounds, upper_bound=self.upper_bounds,
-                           f_weight=0.5, f_cr=0.9)
+                           f_weight=0.5, f_cr=0.9, dtype=self.dtype, binary_idx=self.binary_idx)
         self.algo.initialize()  # Generates the initial population
 
         # Evaluate the initial population
         # Requires a decoding and initial fix
-        for member_idx in np.arange(self.algo.population.shape[0]):
-            member = self.decode(self.algo.population[member_idx])
-            member = self.repair(member)
-            member_fitness = self.evaluate(member)
+        cached = self._repair_population()
 
-            # Update the population fitness
-            self.objective_function_val.append(member_fitness)
-            self.algo.population[member_idx] = self.encode(member)
-            self.algo.population_fitness[member_idx] = member_fitness
+        # Evaluate the repaired population
+        population = self.decode_population(self.population_buffer)
+        unit_costs = self.unit_costs(population)
+        self.algo.population_fitness[:] = self._total_cost(self.cost_breakdown(population, unit_costs=unit_costs))
+        self.objective_function_val.extend(self.algo.population_fitness)
+        self._cache_population(cached)
+
+        # The repaired initial population is the first reference of the delta evaluation
+        if self.delta_evaluation:
+            self.delta_members = self.population_buffer.copy()
+            self.delta_costs = unit_costs
 
         # Update the best fitness
         self.current_best_fitness = np.min(self.algo.population_fitness)
         self.current_best_idx = np.argmin(self.algo.population_fitness)
-        self.current_best = self.decode(self.algo.population[self.current_best_idx])
+        # Repaired full member (the optimizer vector leaves out the variables derived by the repair)
+        self.current_best = self.decode(self.population_buffer[self.current_best_idx].copy())
 
         self.algo.current_best_fitness = self.current_best_fitness
         self.algo.current_best_idx = self.current_best_idx
-        self.algo.current_best = self.encode(self.current_best)
+        self.algo.current_best = self.algo.member(self.current_best_idx).copy()
+
+        # The evaluated initial population is the reference for the first elite selection
+        self.algo.population_old_fitness = self.algo.population_fitness.copy()
 
         for i in tqdm.tqdm(np.arange(self.algo.n_iter)):
 
@@ -269,27 +685,33 @@ class HMProblemScene(BaseScene):
             self.algo.update_population()
 
             # Repair the new population
-            for member_idx in np.arange(self.algo.population.shape[0]):
-                member = self.decode(self.algo.population[member_idx])
-                member = self.repair(member)
-                member_fitness = self.evaluate(member)
-
-                # Update the population member and its fitness
-                self.objective_function_val.append(member_fitness)
-                self.algo.population[member_idx] = self.encode(member)
-                self.algo.population_fitness[member_idx] = member_fitness
+            cached = self._repair_population()
+
+            # Evaluate the repaired population (only the members not found in the fitness cache)
+            if self.delta_evaluation:
+                population = self.decode_population(self.population_buffer)
+                self.algo.population_fitness[:], unit_costs = self.evaluate_population_delta(population)
+            else:
+                population = self.decode_population(self.population_buffer[~cached])
+                self.algo.population_fitness[~cached] = self.evaluate_population(population)
+            self.objective_function_val.extend(self.algo.population_fitness)
+            self._cache_population(cached)
 
             # Update the best fitness
             self.current_best_fitness = np.min(self.algo.population_fitness)
             self.current_best_idx = np.argmin(self.algo.population_fitness)
-            self.current_best = self.decode(self.algo.population[self.current_best_idx])
+            self.current_best = self.decode(self.population_buffer[self.current_best_idx].copy())
 
             self.algo.current_best_fitness = self.current_best_fitness
             self.algo.current_best_idx = self.current_best_idx
-            self.algo.current_best = self.encode(self.current_best)
+            self.algo.current_best = self.algo.member(self.current_best_idx).copy()
 
             # Elite selection
-            self.algo.selection_mechanism()
+            preserved = self.algo.selection_mechanism()
+
+            # Members that replaced their parents become the parents of the next delta evaluation
+            if self.delta_evaluation:
+                self.update_delta_cache(~preserved, unit_costs)
 
             # Update remaining parameters and history
             self.algo.post_update_cleanup()
@@ -1,2 +1,5 @@
 from .preprocessing import *
 from .battery import *
+from .precision import set_precision, get_dtype, as_dtype
+from .fitness_cache import FitnessCache
+from .emissions import generator_emissions
@@ -0,0 +1,20 @@
+# Greenhouse gas emissions of the generators, shared by HMProblemScene and HMProblemPymoo
+# GHG Cof A/B/C follow the quadratic convention of the cost parameters: a * P^2 + b * P + c per generator and step.
+# The constant c is the emission of a running unit (e.g. no-load fuel burn), so it is only counted while the
+# generator produces (P > 0): an idle generator emits nothing.
+# The operating cost keeps the baseline linear treatment (Cost Parameter B only) and is not affected by this.
+
+import numpy as np
+
+
+def generator_emissions(generator: dict, power: np.ndarray) -> np.ndarray:
+    """
+    Greenhouse gas emissions of the generators.
+    Works on a single decoded member (n_gens, n_steps) or on a decoded population (pop_size, n_gens, n_steps).
+    :param generator: Parsed generator data with the ghg_cof_a, ghg_cof_b and ghg_cof_c fields (n_gens, n_steps)
+    :param power: Active power of the generators
+    :return: Emissions of each member
+    """
+
+    return np.sum(generator['ghg_cof_a'] * power ** 2 + generator['ghg_cof_b'] * power +
+                  generator['ghg_cof_c'] * (power > 0), axis=(-2, -1))
@@ -0,0 +1,97 @@
+# Size-bounded LRU cache of repaired genomes and their fitness
+# Keys are fast hashes of the genome fed to the repair, so exact duplicates skip the repair and the evaluation.
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FitnessCache:
+
+    def __init__(self, max_size: int):
+        """
+        :param max_size: Maximum number of genomes kept. The least recently used genome is evicted beyond it
+        """
+
+        if max_size < 1:
+            raise ValueError('Cache size must be at least 1, got {}'.format(max_size))
+        self.max_size = max_size
+
+        # Key -> (repaired genome, fitness), least recently used first
+        self.entries = OrderedDict()
+
+        # Lookups that found / did not find their genome
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(genome: np.ndarray) -> bytes:
+        """
+        Hash of a genome (128-bit BLAKE2b digest of its bytes).
+        :param genome: Genome
+        :return: Key
+        """
+
+        return hashlib.blake2b(np.ascontiguousarray(genome).tobytes(), digest_size=16).digest()
+
+    def get(self, key: bytes):
+        """
+        Look up a genome and mark it as recently used.
+        :param key: Key of the genome (see key)
+        :return: Tuple with the repaired genome and its fitness, or None if the genome is not cached
+        """
+
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+
+        return entry
+
+    def put(self, key: bytes, genome: np.ndarray, fitness: float):
+        """
+        Store a repaired genome and its fitness, evicting the least recently used genome when full.
+        :param key: Key of the genome fed to the repair (see key)
+        :param genome: Repaired genome (copied)
+        :param fitness: Fitness of the repaired genome
+        :return: None
+        """
+
+        self.entries[key] = (genome.copy(), fitness)
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        return
+
+    def hit_rate(self) -> float:
+        """
+        Share of the lookups that found their genome.
+        :return: Hits over lookups (0 before any lookup)
+        """
+
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
+
+    def clear(self):
+        """
+        Remove every genome and reset the counters.
+        :return: None
+        """
+
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+        return
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,54 @@
+# Global floating point precision policy
+# Resources, HMProblemScene, HMRepair and HydeDF allocate their arrays with the policy dtype.
+# float32 halves the memory and bandwidth of populations and repair buffers at the cost of some objective drift.
+
+import numpy as np
+
+# Supported precisions
+_DTYPES = {'float32': np.float32, 'float64': np.float64}
+
+# Current policy dtype (float64 by default)
+_dtype = np.dtype(np.float64)
+
+
+def set_precision(dtype) -> np.dtype:
+    """
+    Set the global floating point precision.
+    Only affects objects created after the call.
+    :param dtype: 'float32', 'float64' or the matching NumPy dtype
+    :return: Previous precision, to restore it later
+    """
+
+    global _dtype
+
+    new_dtype = np.dtype(_DTYPES.get(dtype, dtype))
+    if new_dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError('Precision must be float32 or float64, got {}'.format(dtype))
+
+    previous, _dtype = _dtype, new_dtype
+
+    return previous
+
+
+def get_dtype() -> np.dtype:
+    """
+    Get the global floating point precision.
+    :return: Current policy dtype
+    """
+
+    return _dtype
+
+
+def as_dtype(values, dtype=None):
+    """
+    Cast floating point arrays to the policy dtype, without copying when they already match.
+    Scalars, None, integer and text arrays are returned as they are.
+    :param values: Values to cast
+    :param dtype: Target dtype. Defaults to the policy dtype
+    :return: Cast values
+    """
+
+    if not isinstance(values, np.ndarray) or values.dtype.kind != 'f':
+        return values
+
+    return values.astype(_dtype if dtype is None else dtype, copy=False)
@@ -0,0 +1,86 @@
+# Builds the HMProblemScene components from parsed data, as in pyecom_hydedf_example.ipynb
+# Shared by the tests that run the scene or the repair on EC_V4.xlsx or on synthetic instances.
+
+import numpy as np
+
+from src.resources import BinaryResource, Generator, Load, Storage, Vehicle
+
+
+def build_components(data) -> dict:
+    """
+    Build the scene components.
+    :param data: Parsed data (HMParser or SyntheticParser)
+    :return: Dictionary with the gen, loads, stor, evs, pimp and pexp components
+    """
+
+    gen_shape = data.generator['p_forecast'].shape
+    load_shape = data.load['p_forecast'].shape
+    stor_shape = data.storage['p_charge_limit'].shape
+    v2g_shape = data.vehicle['schedule_charge'].shape
+    peer_shape = data.peers['import_contracted_p_max'][0, :].shape
+
+    gens = Generator(name='gens',
+                     value=np.zeros(gen_shape),
+                     lower_bound=np.zeros(gen_shape),
+                     upper_bound=data.generator['p_forecast'],
+                     cost=data.generator['cost_parameter_b'],
+                     cost_nde=data.generator['cost_nde'],
+                     is_renewable=data.generator['type_generator'])
+
+    loads = Load(name='loads',
+                 value=data.load['p_forecast'],
+                 lower_bound=np.zeros(load_shape),
+                 upper_bound=data.load['p_forecast'],
+                 cost=np.ones(load_shape),
+                 cost_cut=data.load['cost_cut'],
+                 cost_reduce=data.load['cost_reduce'],
+                 cost_ens=data.load['cost_ens'])
+
+    stor = Storage(name='stor',
+                   value=np.zeros(stor_shape),
+                   lower_bound=np.zeros(stor_shape),
+                   upper_bound=(data.storage['energy_capacity'] * np.ones(stor_shape).transpose()).transpose(),
+                   cost=np.ones(stor_shape),
+                   cost_discharge=data.storage['discharge_price'],
+                   cost_charge=data.storage['charge_price'],
+                   capacity_max=data.storage['energy_capacity'],
+                   capacity_min=data.storage['energy_min_percentage'],
+                   initial_charge=data.storage['initial_state'],
+                   discharge_efficiency=data.storage['discharge_efficiency'],
+                   discharge_max=data.storage['p_discharge_limit'],
+                   charge_efficiency=data.storage['charge_efficiency'],
+                   charge_max=data.storage['p_charge_limit'],
+                   capital_cost=data.storage['capital_cost'])
+
+    v2g = Vehicle(name='evs',
+                  value=np.zeros(v2g_shape),
+                  lower_bound=(data.vehicle['e_capacity_max'] * data.vehicle['min_technical_soc'] *
+                               np.ones(v2g_shape).transpose()).transpose(),
+                  upper_bound=(data.vehicle['e_capacity_max'] * np.ones(v2g_shape).transpose()).transpose(),
+                  cost=np.ones(v2g_shape),
+                  cost_discharge=data.vehicle['discharge_price'][:, 0],
+                  cost_charge=data.vehicle['charge_price'][:, 0],
+                  capacity_max=data.vehicle['e_capacity_max'],
+                  initial_charge=np.ones(v2g_shape) * 0.8,
+                  min_charge=data.vehicle['min_technical_soc'],
+                  discharge_efficiency=data.vehicle['discharge_efficiency'],
+                  charge_efficiency=data.vehicle['charge_efficiency'],
+                  capital_cost=data.vehicle['capital_cost'],
+                  schedule_discharge=data.vehicle['schedule_discharge'],
+                  schedule_charge=data.vehicle['schedule_charge'])
+
+    pimp = BinaryResource(name='pImp',
+                          value=np.zeros(peer_shape),
+                          lower_bound=np.zeros(peer_shape),
+                          upper_bound=data.peers['import_contracted_p_max'][0, :],
+                          cost=data.peers['buy_price'][0, :],
+                          is_active=np.zeros(peer_shape))
+
+    pexp = BinaryResource(name='pExp',
+                          value=np.zeros(peer_shape),
+                          lower_bound=np.zeros(peer_shape),
+                          upper_bound=data.peers['export_contracted_p_max'][0, :],
+                          cost=data.peers['sell_price'][0, :],
+                          is_active=np.zeros(peer_shape))
+
+    return {'gen': gens, 'loads': loads, 'stor': stor, 'evs': v2g, 'pimp': pimp, 'pexp': pexp}
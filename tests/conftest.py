@@ -0,0 +1,19 @@
+# Shared fixtures of the tests
+
+import pytest
+
+from src.parsers import HMParser
+
+from tests.components import build_components
+
+
+@pytest.fixture(scope='session')
+def ec_v4():
+    """
+    Parsed EC_V4.xlsx (first community) and its HMProblemScene components.
+    """
+
+    data = HMParser(file_path='data/EC_V4.xlsx', ec_id=1)
+    data.parse()
+
+    return data, build_components(data)
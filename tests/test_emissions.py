@@ -0,0 +1,43 @@
+# Tests of the generator emissions objective
+
+import numpy as np
+import pytest
+
+from src.scenes import HMProblemPymoo, HMProblemScene
+from src.utils import generator_emissions
+
+
+def test_two_generators_by_hand():
+    generator = {'ghg_cof_a': np.array([[0.1, 0.1], [0.0, 0.0]]),
+                 'ghg_cof_b': np.array([[2.0, 2.0], [1.0, 1.0]]),
+                 'ghg_cof_c': np.array([[5.0, 5.0], [3.0, 3.0]])}
+    power = np.array([[10.0, 0.0],
+                      [4.0, 2.0]])
+
+    # Generator 1: 0.1 * 10^2 + 2 * 10 + 5 while producing, nothing while idle
+    # Generator 2: (4 + 3) + (2 + 3)
+    assert generator_emissions(generator, power) == pytest.approx(35.0 + 12.0)
+
+    # Populations give one value per member, an idle member emits nothing
+    np.testing.assert_allclose(generator_emissions(generator, np.stack([power, np.zeros_like(power)])), [47.0, 0.0])
+
+
+def test_problems_share_the_emissions(ec_v4, monkeypatch):
+    data, components = ec_v4
+
+    rng = np.random.default_rng(0)
+    for field in ['ghg_cof_a', 'ghg_cof_b', 'ghg_cof_c']:
+        monkeypatch.setitem(data.generator, field, rng.uniform(size=data.generator[field].shape))
+
+    problem = HMProblemPymoo(data=data, multi_objective=True)
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data)
+
+    members = problem.xl + rng.uniform(size=(5, problem.n_var)) * (problem.xu - problem.xl)
+    population = problem.decode_population(members)
+    expected = generator_emissions(data.generator, population['genActPower'])
+
+    np.testing.assert_allclose(problem.emissions(population), expected)
+    np.testing.assert_allclose(scene.emissions(population), expected)
+    out = {}
+    problem._evaluate(members, out)
+    np.testing.assert_allclose(out['F'][:, 1], expected)
@@ -0,0 +1,77 @@
+# Tests of the FitnessCache memo of repaired genomes
+
+import numpy as np
+import pytest
+
+from src.scenes import HMProblemScene
+from src.utils.fitness_cache import FitnessCache
+
+
+def test_least_recently_used_genome_is_evicted():
+    cache = FitnessCache(2)
+    genomes = [np.full(3, value) for value in [1.0, 2.0, 3.0]]
+    keys = [FitnessCache.key(genome) for genome in genomes]
+
+    cache.put(keys[0], genomes[0], 1.0)
+    cache.put(keys[1], genomes[1], 2.0)
+    assert cache.get(keys[0]) is not None
+
+    # The second genome is the least recently used one
+    cache.put(keys[2], genomes[2], 3.0)
+    assert len(cache) == 2
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0])[1] == 1.0
+    assert cache.get(keys[2])[1] == 3.0
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    with pytest.raises(ValueError):
+        FitnessCache(0)
+
+
+def test_cached_genomes_are_copies():
+    cache = FitnessCache(1)
+    genome = np.zeros(3)
+    cache.put(FitnessCache.key(genome), genome, 0.0)
+
+    genome[:] = 1.0
+    np.testing.assert_array_equal(cache.get(FitnessCache.key(np.zeros(3)))[0], np.zeros(3))
+
+
+def repair_and_evaluate(scene: HMProblemScene, population: np.ndarray):
+    # Repair and evaluation step of HMProblemScene.run
+    scene.algo.population[:] = population
+    cached = scene._repair_population()
+    scene.algo.population_fitness[~cached] = scene.evaluate_population(
+        scene.decode_population(scene.population_buffer[~cached]))
+    scene._cache_population(cached)
+
+    return cached, scene.population_buffer.copy(), scene.algo.population_fitness.copy()
+
+
+def test_cache_hits_match_a_recompute(ec_v4):
+    data, components = ec_v4
+
+    scenes = {}
+    for memo_size in [0, 100]:
+        np.random.seed(0)
+        scenes[memo_size] = HMProblemScene(name='EC_V4', data=components, hm_parser=data, n_iter=1, pop_size=10,
+                                           memo_size=memo_size)
+        scenes[memo_size].initialize()
+        scenes[memo_size].run()
+
+    # Population with duplicated members
+    population = scenes[0].algo.population.copy()
+    population[5:] = population[:5]
+
+    _, expected_members, expected_fitness = repair_and_evaluate(scenes[0], population)
+
+    scene = scenes[100]
+    repair_and_evaluate(scene, population)
+    hits = scene.fitness_cache.hits
+    cached, members, fitness = repair_and_evaluate(scene, population)
+
+    # Every genome was seen before, and the cache gives the repaired members and fitness of a recompute
+    assert np.all(cached)
+    assert scene.fitness_cache.hits == hits + 10
+    np.testing.assert_array_equal(members, expected_members)
+    np.testing.assert_array_equal(fitness, expected_fitness)
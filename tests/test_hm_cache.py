@@ -0,0 +1,100 @@
+# Tests of the HMCache binary cache of parsed scenarios
+
+import os
+
+import numpy as np
+import pytest
+
+from src.parsers import HMParser
+from src.parsers.hm_cache import HMCache
+
+
+def scenario(value: float) -> dict:
+    # Small scenario with a numeric and a text field in every section
+    return {section: {'p_max': np.full(3, value), 'owner': np.array(['a', 'b', 'c'], dtype=object)}
+            for section in HMCache.sections}
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    file_path = tmp_path / 'workbook.xlsx'
+    file_path.write_bytes(b'first contents')
+
+    return str(file_path)
+
+
+def test_parsed_scenario_round_trip(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+
+    parsed = HMParser(file_path='data/EC_V4.xlsx', ec_id=1, cache_dir=cache_dir)
+    parsed.parse()
+
+    cached = HMParser(file_path='data/EC_V4.xlsx', ec_id=1, cache_dir=cache_dir)
+    cached.parse()
+    assert cached._cached
+
+    for section in HMCache.sections:
+        assert getattr(cached, section).keys() == getattr(parsed, section).keys()
+        for field, values in getattr(parsed, section).items():
+            np.testing.assert_array_equal(getattr(cached, section)[field], values)
+
+
+def test_key_changes_with_the_scenario(workbook):
+    cache = HMCache('unused')
+    key = cache.key(workbook, 1, '4')
+
+    assert cache.key(workbook, 2, '4') != key
+    assert cache.key(workbook, 1, '5') != key
+
+    with open(workbook, 'wb') as file:
+        file.write(b'second contents')
+    assert cache.key(workbook, 1, '4') != key
+
+
+def test_hit_and_miss(tmp_path, workbook):
+    cache = HMCache(str(tmp_path / 'cache'))
+    assert cache.load(workbook, 1, '4') is None
+
+    cache.save(workbook, 1, '4', scenario(1.0))
+    data = cache.load(workbook, 1, '4')
+    np.testing.assert_array_equal(data['storage']['p_max'], np.full(3, 1.0))
+    np.testing.assert_array_equal(data['storage']['owner'], ['a', 'b', 'c'])
+
+    # A changed workbook misses the cache
+    with open(workbook, 'wb') as file:
+        file.write(b'second contents')
+    assert cache.load(workbook, 1, '4') is None
+
+
+def test_stale_bundles_are_removed(tmp_path, workbook):
+    cache = HMCache(str(tmp_path / 'cache'))
+    old_bundle = cache.save(workbook, 1, '4', scenario(1.0))
+    other_community = cache.save(workbook, 2, '4', scenario(2.0))
+
+    # New workbook contents replace the bundle of the same community only
+    with open(workbook, 'wb') as file:
+        file.write(b'second contents')
+    new_bundle = cache.save(workbook, 1, '4', scenario(3.0))
+
+    assert not os.path.exists(old_bundle)
+    assert os.path.isdir(other_community)
+    assert sorted(os.listdir(cache.cache_dir)) == sorted([os.path.basename(new_bundle),
+                                                          os.path.basename(other_community)])
+
+    # A new parser version also replaces it
+    newer_bundle = cache.save(workbook, 1, '5', scenario(4.0))
+    assert not os.path.exists(new_bundle)
+    np.testing.assert_array_equal(cache.load(workbook, 1, '5')['generator']['p_max'], np.full(3, 4.0))
+
+
+def test_failed_save_leaves_no_files(tmp_path, workbook, monkeypatch):
+    cache = HMCache(str(tmp_path / 'cache'))
+
+    def write_bundle(bundle_path, data, manifest=None):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(HMCache, 'write_bundle', staticmethod(write_bundle))
+    with pytest.raises(OSError):
+        cache.save(workbook, 1, '4', scenario(1.0))
+
+    assert os.listdir(cache.cache_dir) == []
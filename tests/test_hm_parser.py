@@ -0,0 +1,162 @@
+# Tests of HMParser on EC_V4.xlsx
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.parsers import HMParser
+
+
+@pytest.fixture
+def parser():
+    data = HMParser(file_path='data/EC_V4.xlsx', ec_id=1)
+    data.parse()
+
+    return data
+
+
+def test_more_events_than_the_sheet(parser):
+    n_vehicles = parser.vehicle['p_charge_max'].shape[0]
+    n_sheet_events = parser.vehicle['arrive_time_period'].shape[1]
+    sheet_prices = parser.vehicle['charge_price'].copy()
+
+    # Vehicle 1 gets one event more than the sheet holds, the others a single event
+    events = pd.DataFrame({'vehicle': [1] * (n_sheet_events + 1) + list(range(2, n_vehicles + 1)),
+                           'arrive_time_period': [1.0, 5.0, 20.0] + [3.0] * (n_vehicles - 1),
+                           'departure_time_period': [2.0, 6.0, 22.0] + [4.0] * (n_vehicles - 1),
+                           'place': [1.0, 2.0, 3.0] + [1.0] * (n_vehicles - 1),
+                           'soc_percentage_arriving': [0.3, 0.4, 0.5] + [0.6] * (n_vehicles - 1)})
+    parser.set_vehicle_events(events)
+
+    # Every event field has the same shape
+    for field in HMParser.event_fields:
+        assert parser.vehicle[field].shape == (n_vehicles, n_sheet_events + 1)
+
+    # Fields missing from the table keep the sheet values, padded with NaN
+    np.testing.assert_array_equal(parser.vehicle['charge_price'][:, :n_sheet_events], sheet_prices)
+    assert np.all(np.isnan(parser.vehicle['charge_price'][:, n_sheet_events:]))
+
+    # The schedule covers the extra event
+    np.testing.assert_array_equal(np.flatnonzero(parser.vehicle['schedule'][0]), [0, 1, 4, 5, 19, 20, 21])
+    np.testing.assert_array_equal(np.flatnonzero(parser.vehicle['schedule'][1]), [2, 3])
+
+
+def test_fewer_events_than_the_sheet(parser):
+    n_vehicles = parser.vehicle['p_charge_max'].shape[0]
+    n_sheet_events = parser.vehicle['arrive_time_period'].shape[1]
+
+    events = pd.DataFrame({'vehicle': np.arange(1, n_vehicles + 1),
+                           'arrive_time_period': np.full(n_vehicles, 3.0),
+                           'departure_time_period': np.full(n_vehicles, 4.0),
+                           'place': np.ones(n_vehicles)})
+    parser.set_vehicle_events(events)
+
+    for field in HMParser.event_fields:
+        assert parser.vehicle[field].shape == (n_vehicles, n_sheet_events)
+    assert np.all(np.isnan(parser.vehicle['arrive_time_period'][:, 1:]))
+    assert np.all(parser.vehicle['schedule'].sum(axis=1) == 2)
+
+
+def test_events_need_the_schedule_fields(parser):
+    events = pd.DataFrame({'vehicle': [1], 'arrive_time_period': [1.0], 'departure_time_period': [2.0]})
+
+    with pytest.raises(ValueError):
+        parser.set_vehicle_events(events)
+
+
+def test_capital_costs_are_read_from_the_workbook(parser):
+    np.testing.assert_array_equal(parser.storage['capital_cost'], [0.0525, 0.105, 0.01575])
+    np.testing.assert_array_equal(parser.vehicle['capital_cost'], [0.042, 0.063, 0.042, 0.042, 0.063])
+
+
+def test_capital_costs_given_to_the_parser():
+    data = HMParser(file_path='data/EC_V4.xlsx', ec_id=1, storage_capital_cost=[0.1, 0.2, 0.3])
+
+    np.testing.assert_array_equal(data.storage['capital_cost'], [0.1, 0.2, 0.3])
+    np.testing.assert_array_equal(data.vehicle['capital_cost'], [0.042, 0.063, 0.042, 0.042, 0.063])
+
+
+def test_capital_costs_must_match_the_units():
+    data = HMParser(file_path='data/EC_V4.xlsx', ec_id=1, vehicle_capital_cost=[0.042, 0.063])
+
+    with pytest.raises(ValueError):
+        data.parse()
+
+
+def test_missing_capital_costs_are_rejected(parser):
+    sheet = parser.get_sheet('Storage_EC1')
+    without_costs = sheet.values.copy()
+    without_costs[without_costs == HMParser.capital_cost_label] = None
+
+    capital_cost = HMParser.get_capital_costs(pd.DataFrame(without_costs), n_units=3)
+    assert np.all(np.isnan(capital_cost))
+
+    with pytest.raises(ValueError):
+        HMParser.check_capital_costs(capital_cost, 'storage')
+
+
+def assert_same_sections(parsed: HMParser, expected: HMParser):
+    for section in HMParser.readers:
+        assert getattr(parsed, section).keys() == getattr(expected, section).keys()
+        for field, values in getattr(expected, section).items():
+            np.testing.assert_array_equal(getattr(parsed, section)[field], values)
+
+
+def test_communities_of_ec_v4(parser):
+    parsed = HMParser.parse_communities('data/EC_V4.xlsx', max_workers=2)
+
+    assert list(parsed.keys()) == [1]
+    assert_same_sections(parsed[1], parser)
+
+
+def test_parallel_communities_match_sequential_parsing(tmp_path):
+    # EC_V4 with a second community, a copy of the first one with larger generators
+    file_path = str(tmp_path / 'EC_V4_two_communities.xlsx')
+    sheets = pd.read_excel('data/EC_V4.xlsx', sheet_name=None, header=None)
+    with pd.ExcelWriter(file_path) as writer:
+        for sheet_name, values in sheets.items():
+            values.to_excel(writer, sheet_name=sheet_name, header=False, index=False)
+            if sheet_name.endswith('_EC1'):
+                if sheet_name == 'Generator_EC1':
+                    values = values.map(lambda cell: cell * 2 if isinstance(cell, (int, float)) else cell)
+                values.to_excel(writer, sheet_name=sheet_name.replace('_EC1', '_EC2'), header=False, index=False)
+
+    parsed = HMParser.parse_communities(file_path, max_workers=2)
+    assert list(parsed.keys()) == [1, 2]
+
+    for ec_id, community in parsed.items():
+        expected = HMParser(file_path=file_path, ec_id=ec_id)
+        expected.parse()
+        assert_same_sections(community, expected)
+
+    assert not np.array_equal(parsed[2].generator['p_max'], parsed[1].generator['p_max'])
+
+
+def test_values_right_of_the_events_are_not_events(parser):
+    sheet = pd.read_excel('data/EC_V4.xlsx', sheet_name='Vehicle_EC1', header=None)
+    n_sheet_events = parser.vehicle['arrive_time_period'].shape[1]
+
+    # Unrelated column after an empty one, next to the event block
+    sheet[sheet.shape[1]] = np.nan
+    sheet[sheet.shape[1]] = np.where(sheet[5].notna(), 99.0, np.nan)
+
+    assert HMParser.count_events(sheet) == n_sheet_events
+    np.testing.assert_array_equal(HMParser.get_events(sheet, 'Arrive time period', n_events=n_sheet_events),
+                                  parser.vehicle['arrive_time_period'])
+
+
+@pytest.mark.parametrize('section, loaded, sheets', [
+    ('load', ['load'], ['Load_EC1']),
+    ('storage', ['storage'], ['Storage_EC1']),
+    ('vehicle', ['generator', 'charging_station', 'vehicle'], ['Generator_EC1', 'CStation_EC1', 'Vehicle_EC1'])])
+def test_sections_load_on_first_access(parser, section, loaded, sheets):
+    lazy = HMParser(file_path='data/EC_V4.xlsx', ec_id=1)
+    values = getattr(lazy, section)
+
+    # Only the section (and the sections it needs) is read
+    assert sorted(name for name, data in lazy._sections.items() if data is not None) == sorted(loaded)
+    assert sorted(lazy._sheets.keys()) == sorted(sheets)
+
+    assert values.keys() == getattr(parser, section).keys()
+    for field, expected in getattr(parser, section).items():
+        np.testing.assert_array_equal(values[field], expected)
@@ -0,0 +1,106 @@
+# Tests of the pymoo problem and repair on EC_V4.xlsx
+
+import numpy as np
+import pytest
+
+from src.repairs import HMRepairPymoo
+from src.scenes import HMProblemPymoo
+
+
+def random_population(problem: HMProblemPymoo, pop_size: int = 50, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return problem.xl + rng.uniform(-0.2, 1.2, size=(pop_size, problem.n_var)) * (problem.xu - problem.xl)
+
+
+def test_fixed_dimensions_are_kept_by_default(ec_v4):
+    data, _ = ec_v4
+
+    problem = HMProblemPymoo(data=data)
+
+    assert problem.free_idx is None
+    assert problem.n_var == sum(problem.__var_idx__)
+
+
+def test_eliminated_fixed_dimensions_match_the_full_problem(ec_v4):
+    data, _ = ec_v4
+
+    full = HMProblemPymoo(data=data)
+    reduced = HMProblemPymoo(data=data, eliminate_fixed=True)
+    assert reduced.n_var < full.n_var
+
+    # Repair full members whose fixed dimensions hold their value
+    members = reduced.expand(random_population(reduced))
+    repaired = HMRepairPymoo(data)._do(reduced, reduced.reduce(members))
+
+    repair = HMRepairPymoo(data)
+    repair.fixed_masks = reduced.fixed_masks
+    population = repair.decode_population(members.copy())
+    repair.check_imports_exports(population)
+    repair.check_generators(population)
+    repair.check_loads(population)
+    repair.check_storage(population)
+    repair.check_v2g(population)
+    repair.check_balance(population)
+    repaired_members = repair.encode_population(population)
+
+    # The reduction keeps every repaired value
+    assert np.array_equal(reduced.expand(repaired), repaired_members)
+
+    # Evaluating the reduced solutions matches evaluating their full members
+    reduced_out, full_out = {}, {}
+    reduced._evaluate(repaired, reduced_out)
+    full._evaluate(repaired_members, full_out)
+    assert np.array_equal(reduced_out['F'], full_out['F'])
+
+    # The decoded solution is the repaired member that was evaluated
+    decoded = reduced.decode(repaired[0])
+    assert np.array_equal(decoded['v2gChActPower'].value, population['v2gChActPower'][0])
+
+
+def feasible_member(problem: HMProblemPymoo) -> np.ndarray:
+    # Loads served by imports, storage and EVs idle at their minimum state of charge
+    data = problem.components
+    members = np.zeros((1, problem.n_var))
+    member = problem.decode_population(members)
+    member['pImp'][0] = np.sum(data.load['p_forecast'], axis=0)
+    member['storEnerState'][0] = (data.storage['energy_capacity'] * data.storage['energy_min_percentage'])[:, None]
+    member['v2gEnerState'][0] = (data.vehicle['e_capacity_max'] * data.vehicle['min_technical_soc'])[:, None]
+
+    return members
+
+
+def test_feasible_member_satisfies_every_constraint(ec_v4):
+    data, _ = ec_v4
+
+    problem = HMProblemPymoo(data=data, constraints=True)
+    out = {}
+    problem._evaluate(feasible_member(problem), out)
+
+    assert out['G'].shape == (1, problem.n_constr)
+    assert np.all(out['G'] <= 0)
+
+
+def test_violations_land_in_their_constraint_columns(ec_v4):
+    data, _ = ec_v4
+
+    problem = HMProblemPymoo(data=data, constraints=True)
+    n_steps = data.peers['import_contracted_p_max'].shape[1]
+    members = feasible_member(problem)
+
+    # Import 5 kW over the contracted limit at step 3, storage 2 over capacity for unit 1 at step 10
+    # (the decoded population is a view of the members)
+    member = problem.decode_population(members)
+    member['pImp'][0, 3] = data.peers['import_contracted_p_max'][0, 3] + 5
+    member['storEnerState'][0, 1, 10] = data.storage['energy_capacity'][1] + 2
+    out = {}
+    problem._evaluate(members, out)
+
+    # The extra import also breaks the balance of step 3
+    groups = problem.constraint_groups
+    expected = {groups['import'].start + 3: 5.0,
+                groups['stor_soc_max'].start + n_steps + 10: 2.0,
+                groups['balance'].start + 3: None}
+    assert sorted(np.flatnonzero(out['G'][0] > 0)) == sorted(expected.keys())
+    for column, value in expected.items():
+        if value is not None:
+            assert out['G'][0, column] == pytest.approx(value)
@@ -0,0 +1,114 @@
+# Tests of the HMProblemScene optimization loop on EC_V4.xlsx
+
+import numpy as np
+import pytest
+
+from src.scenes import HMProblemScene
+
+
+@pytest.mark.parametrize('encoding', ['full', 'reduced'])
+def test_current_best_matches_best_fitness(ec_v4, encoding):
+    data, components = ec_v4
+
+    np.random.seed(0)
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data, n_iter=5, pop_size=10,
+                           encoding=encoding)
+    scene.initialize()
+    scene.run()
+
+    # The reported best is the repaired member that was evaluated
+    assert scene.evaluate(scene.current_best) == pytest.approx(scene.current_best_fitness, rel=1e-12)
+    assert np.sum(scene.current_best['storEnerState']) > 0
+
+
+def test_best_fitness_never_worsens(ec_v4):
+    data, components = ec_v4
+
+    np.random.seed(0)
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data, n_iter=10, iter_tolerance=100,
+                           pop_size=10)
+    scene.initialize()
+    scene.run()
+
+    # The first elite selection compares against the evaluated initial population, not the placeholder zeros
+    initial_best = np.min(scene.objective_function_val[:10])
+    history = np.array(scene.algo.population_history_fitness)
+    assert np.all(np.diff(history) <= 0)
+    assert 0 < history[0] <= initial_best
+
+
+def test_fixed_dimensions_survive_the_repair(ec_v4):
+    data, components = ec_v4
+
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data, pop_size=50, eliminate_fixed=True)
+    scene.initialize()
+
+    rng = np.random.default_rng(0)
+    vectors = scene.lower_bounds + rng.uniform(-0.2, 1.2, size=(50, scene.lower_bounds.shape[0])) * \
+        (scene.upper_bounds - scene.lower_bounds)
+    members = np.stack([scene.expand(vector) for vector in vectors])
+    repaired = scene.encode_population(scene.repair_population(scene.decode_population(members)))
+
+    # Expanding the reduced repaired members gives them back unchanged
+    assert np.array_equal(np.stack([scene.expand(scene.reduce(member)) for member in repaired]), repaired)
+
+
+def test_fixed_dimensions_are_kept_by_default(ec_v4):
+    data, components = ec_v4
+
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data)
+    scene.initialize()
+
+    assert scene.free_idx is None
+    assert scene.lower_bounds.shape[0] == sum(scene.component_size_split)
+
+
+def repaired_population(scene: HMProblemScene, pop_size: int, seed: int) -> np.ndarray:
+    # Random members of the search space, repaired as in HMProblemScene.run
+    rng = np.random.default_rng(seed)
+    vectors = scene.lower_bounds + rng.uniform(size=(pop_size, scene.lower_bounds.shape[0])) * \
+        (scene.upper_bounds - scene.lower_bounds)
+    members = np.stack([scene.expand(vector) for vector in vectors])
+
+    return scene.encode_population(scene.repair_population(scene.decode_population(members)))
+
+
+def test_delta_evaluation_matches_full_evaluation(ec_v4):
+    data, components = ec_v4
+
+    scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data, pop_size=10, delta_evaluation=True)
+    scene.initialize()
+
+    # Parents, and trial members that take the storage and EV trajectories of other members for half the population
+    parents = repaired_population(scene, 10, seed=0)
+    others = scene.decode_population(repaired_population(scene, 10, seed=1))
+    members = parents.copy()
+    decoded = scene.decode_population(members)
+    for name in ['storDchActPower', 'storChActPower', 'storEnerState', 'v2gDchActPower', 'v2gChActPower',
+                 'v2gEnerState']:
+        decoded[name][:5] = others[name][:5]
+
+    scene.delta_members = parents
+    scene.delta_costs = scene.unit_costs(scene.decode_population(parents))
+    fitness, unit_costs = scene.evaluate_population_delta(scene.decode_population(members))
+
+    np.testing.assert_allclose(fitness, scene.evaluate_population(scene.decode_population(members)), rtol=1e-12)
+    for block, costs in scene.unit_costs(scene.decode_population(members)).items():
+        np.testing.assert_allclose(unit_costs[block], costs, rtol=1e-12)
+    assert 0 < scene.delta_hit_rate() < 1
+
+
+def test_delta_evaluation_run_matches_full_run(ec_v4):
+    data, components = ec_v4
+
+    objective = {}
+    for delta_evaluation in [False, True]:
+        np.random.seed(0)
+        scene = HMProblemScene(name='EC_V4', data=components, hm_parser=data, n_iter=10, iter_tolerance=100,
+                               pop_size=10, delta_evaluation=delta_evaluation)
+        scene.initialize()
+        scene.run()
+        objective[delta_evaluation] = np.array(scene.objective_function_val)
+
+    assert scene.delta_hit_rate() > 0
+    np.testing.assert_allclose(objective[True], objective[False], rtol=1e-12)
@@ -0,0 +1,34 @@
+# Tests of the HyDE-DF elite selection
+
+import numpy as np
+
+from src.algorithms import HydeDF
+
+
+def make_algorithm() -> HydeDF:
+    np.random.seed(0)
+    algo = HydeDF(n_iter=10, iter_tolerance=5, epsilon_tolerance=1e-6, pop_size=5, pop_dim=3,
+                  lower_bound=np.zeros(3), upper_bound=np.ones(3), f_weight=0.5, f_cr=0.9)
+    algo.initialize()
+
+    return algo
+
+
+def test_selection_keeps_the_better_parents():
+    algo = make_algorithm()
+
+    # Evaluated parents
+    algo.population_fitness[:] = [5.0, 4.0, 3.0, 2.0, 1.0]
+    algo.post_update_cleanup()
+    parents = algo.population.copy()
+
+    # Trial members, evaluated in place as HMProblemScene.run does
+    # With population_old_fitness aliasing population_fitness, the parents' fitness was overwritten here and no
+    # parent was ever kept
+    algo.update_population()
+    algo.population_fitness[:] = [1.0, 10.0, 1.0, 10.0, 1.0]
+    preserved = algo.selection_mechanism()
+
+    np.testing.assert_array_equal(preserved, [False, True, False, True, False])
+    np.testing.assert_array_equal(algo.population_fitness, [1.0, 4.0, 1.0, 2.0, 1.0])
+    np.testing.assert_array_equal(algo.population[preserved], parents[preserved])
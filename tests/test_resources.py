@@ -0,0 +1,93 @@
+# Tests of the resource fleets and of the resource views of encoded solutions
+
+import numpy as np
+import pytest
+
+from src.resources import BaseResource, ResourceFleet
+from src.scenes import HMProblemPymoo
+
+
+def test_bound_resource_is_a_view_of_the_genome():
+    genome = np.arange(10, dtype=np.float64)
+    first = BaseResource(name='first', value=np.zeros((2, 3)), lower_bound=np.zeros((2, 3)),
+                         upper_bound=np.ones((2, 3)), cost=np.ones((2, 3)))
+    second = BaseResource(name='second', value=np.zeros(4), lower_bound=np.zeros(4), upper_bound=np.ones(4),
+                          cost=np.ones(4))
+
+    end = first.bind(genome)
+    assert second.bind(genome, offset=end) == genome.shape[0]
+    assert np.shares_memory(first.value, genome) and np.shares_memory(second.value, genome)
+    np.testing.assert_array_equal(first.value, np.arange(6).reshape(2, 3))
+
+    # Writes and in-place operators change the genome
+    first.write(np.full((2, 3), 7.0))
+    second += 1.0
+    second *= 2.0
+    np.testing.assert_array_equal(genome, [7.0] * 6 + [14.0, 16.0, 18.0, 20.0])
+
+    # Writes into the genome show up in the resource
+    genome[:] = -1.0
+    np.testing.assert_array_equal(first.value, np.full((2, 3), -1.0))
+
+    with pytest.raises(ValueError):
+        second.bind(genome, offset=8)
+
+
+def test_bound_fleet_is_a_view_of_the_genome():
+    genome = np.zeros(8)
+    fleet = ResourceFleet(name='gen', value=np.zeros((2, 4)), lower_bound=np.zeros((2, 4)),
+                          upper_bound=np.ones((2, 4)), cost=np.ones((2, 1)))
+
+    assert fleet.bind(genome) == 8
+
+    # Units are views of the fleet, and so of the genome
+    fleet['gen_01'].write(np.arange(4.0))
+    np.testing.assert_array_equal(genome, [0.0] * 4 + [0.0, 1.0, 2.0, 3.0])
+
+    genome[:4] = 5.0
+    np.testing.assert_array_equal(fleet.unit(0).value, np.full(4, 5.0))
+    np.testing.assert_array_equal(fleet.sum(axis=1), [20.0, 6.0])
+
+
+def test_fleet_decode_matches_per_unit_resources(ec_v4):
+    data, _ = ec_v4
+    problem = HMProblemPymoo(data=data)
+
+    rng = np.random.default_rng(0)
+    x = problem.xl + rng.uniform(size=problem.n_var) * (problem.xu - problem.xl)
+    decoded = problem._decode(x)
+    fleets = problem.decode(x)
+
+    # Per-unit resources, as HMProblemPymoo.decode built them before the fleets
+    costs = {'genActPower': lambda g: data.generator['cost_parameter_b'][g],
+             'genExcActPower': lambda g: data.generator['cost_nde'][g],
+             'loadRedActPower': lambda l: data.load['cost_reduce'][l],
+             'loadCutActPower': lambda l: data.load['cost_cut'][l],
+             'loadENS': lambda l: data.load['cost_ens'][l],
+             'storDchActPower': lambda s: data.storage['discharge_price'][s],
+             'storChActPower': lambda s: data.storage['charge_price'][s],
+             'storEnerState': lambda s: np.zeros(problem.n_steps),
+             'v2gDchActPower': lambda v: data.vehicle['discharge_price'][v, 0],
+             'v2gChActPower': lambda v: data.vehicle['charge_price'][v, 0],
+             'v2gEnerState': lambda v: np.zeros(problem.n_steps)}
+
+    for name, cost in costs.items():
+        fleet = fleets[name]
+        assert isinstance(fleet, ResourceFleet)
+        assert len(fleet) == decoded[name].shape[0]
+
+        for idx, unit in enumerate(fleet):
+            expected = BaseResource(name='{}_{:02d}'.format(name, idx),
+                                    value=decoded[name][idx, :],
+                                    lower_bound=problem.xl_dict[name][idx, :],
+                                    upper_bound=problem.xu_dict[name][idx, :],
+                                    cost=cost(idx))
+
+            assert unit.name == expected.name
+            np.testing.assert_array_equal(unit.value, expected.value)
+            np.testing.assert_array_equal(unit.lower_bound, expected.lower_bound)
+            np.testing.assert_array_equal(unit.upper_bound, expected.upper_bound)
+            np.testing.assert_array_equal(unit.cost, np.broadcast_to(expected.cost, unit.value.shape))
+
+        # Fleet totals match the per-unit sums
+        np.testing.assert_allclose(fleet.total_cost(), sum(np.sum(unit.value * unit.cost) for unit in fleet))